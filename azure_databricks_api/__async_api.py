@@ -0,0 +1,1000 @@
+# Copyright (c) 2018 Microsoft
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+"""
+asyncio versions of the API objects.
+
+Each method is a coroutine with the same arguments and return values as the method of the same name on the
+synchronous API object. Request building and error mapping are shared with the synchronous API objects.
+"""
+import asyncio
+import base64
+import os
+import posixpath
+import time
+
+from azure_databricks_api.__async_base import AsyncRESTBase
+from azure_databricks_api.__cache import MetadataCache
+from azure_databricks_api.__clusters import _validate_cluster_types, _build_cluster_config, _select_cluster_id, \
+    _available_node_type_names, _ClusterNameIndex, _is_missing_cluster, _StateWaiters, _next_poll_interval, \
+    MIN_STATE_POLL_INTERVAL, MAX_STATE_POLL_INTERVAL
+from azure_databricks_api.__dbfs import FileReadInfo, MB_BYTES, TransferResult, _check_bytes_read, _file_info, \
+    _get_chunks, _raise_for_failures, _transfer_report
+from azure_databricks_api.__jobs import DEFAULT_JOBS_PAGE_SIZE, RUN_POLL_INTERVALS, TERMINAL_LIFE_CYCLE_STATES, \
+    RunResult, SubmittedRunResult, _life_cycle_state, _next_run_poll_interval, _with_idempotency_token
+from azure_databricks_api.__libraries import _find_library, _library_name, _check_libraries, LibraryIndex, \
+    MIN_INSTALL_POLL_INTERVAL, MAX_INSTALL_POLL_INTERVAL, ClusterLibraryResult, _advance_fleet, _cluster_result
+from azure_databricks_api.__token import TokenInfo
+from azure_databricks_api.__utils import choose_exception, file_content_to_b64, dict_update, Base64JSONBody
+from azure_databricks_api.__workspace import EXPORT_FORMATS, EXPORT_CHUNK_SIZE, _validate_import, \
+    _build_import_payload, _export_destination, _workspace_object
+from azure_databricks_api.exceptions import ResourceDoesNotExist, ResourceAlreadyExists, \
+    UnknownFormat
+
+
+async def _paginate(fetch_page, items_key, offset, limit, prefetch):
+    """asyncio version of __jobs._paginate - an async generator of the items of each page"""
+    page = await fetch_page(offset, limit)
+    next_page = None
+
+    try:
+        while True:
+            items = page.get(items_key, [])
+            has_more = page.get('has_more', False) and len(items) > 0
+            offset += len(items)
+
+            next_page = asyncio.ensure_future(fetch_page(offset, limit)) if has_more and prefetch else None
+
+            for item in items:
+                yield item
+
+            if not has_more:
+                return
+
+            page = await (next_page or fetch_page(offset, limit))
+            next_page = None
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+
+class AsyncClusterAPI(AsyncRESTBase):
+    """asyncio version of ClusterAPI"""
+
+    def __init__(self, **kwargs):
+        self._cluster_index = _ClusterNameIndex(ttl=kwargs.pop('cluster_index_ttl', 60))
+        self._metadata_cache = kwargs.pop('metadata_cache', None) or MetadataCache()
+        self.__listing = None
+
+        self.min_poll_interval = MIN_STATE_POLL_INTERVAL
+        self.max_poll_interval = MAX_STATE_POLL_INTERVAL
+        self._state_waiters = _StateWaiters(timeout_error=asyncio.TimeoutError)
+        self._state_poll_wakeup = None
+
+        super().__init__(**kwargs)
+
+    def invalidate_cluster_index(self):
+        self._cluster_index.invalidate()
+
+    async def create(self, cluster_name, num_workers, spark_version, node_type_id,
+                     python_version=3, autotermination_minutes=60, custom_spark_version=False, validate=True,
+                     **kwargs):
+        METHOD = 'POST'
+        API_PATH = 'clusters/create'
+
+        if validate:
+            spark_versions = None if custom_spark_version else await self.spark_versions()
+            _validate_cluster_types(spark_version=spark_version,
+                                    node_type_id=node_type_id,
+                                    driver_node_type_id=kwargs.get('driver_node_type_id'),
+                                    spark_versions=spark_versions,
+                                    available_node_types=await self.list_available_node_type_names())
+
+        cluster_config = _build_cluster_config(cluster_name=cluster_name, num_workers=num_workers,
+                                               spark_version=spark_version, node_type_id=node_type_id,
+                                               python_version=python_version,
+                                               autotermination_minutes=autotermination_minutes, **kwargs)
+
+        resp = await self._rest_call[METHOD](API_PATH, data=cluster_config)
+
+        if resp.status_code == 200:
+            self._cluster_index.invalidate()
+            return resp.json()['cluster_id']
+        else:
+            raise choose_exception(resp)
+
+    async def start(self, cluster_name=None, cluster_id=None):
+        return await self.__send_cluster_id_to_endpoint('POST', 'clusters/start', cluster_name, cluster_id)
+
+    async def restart(self, cluster_name=None, cluster_id=None):
+        return await self.__send_cluster_id_to_endpoint('POST', 'clusters/restart', cluster_name, cluster_id)
+
+    async def terminate(self, cluster_name=None, cluster_id=None):
+        return await self.__send_cluster_id_to_endpoint('POST', 'clusters/delete', cluster_name, cluster_id)
+
+    async def permanent_delete(self, cluster_name=None, cluster_id=None):
+        cluster_id = await self.__send_cluster_id_to_endpoint('POST', 'clusters/permanent-delete', cluster_name,
+                                                              cluster_id)
+        self._cluster_index.invalidate()
+        return cluster_id
+
+    async def get(self, cluster_name=None, cluster_id=None):
+        return await self.__send_cluster_id_to_endpoint('GET', 'clusters/get', cluster_name, cluster_id)
+
+    async def pin(self, cluster_name=None, cluster_id=None):
+        return await self.__send_cluster_id_to_endpoint('POST', 'clusters/pin', cluster_name, cluster_id,
+                                                        idempotent=True)
+
+    async def unpin(self, cluster_name=None, cluster_id=None):
+        return await self.__send_cluster_id_to_endpoint('POST', 'clusters/unpin', cluster_name, cluster_id,
+                                                        idempotent=True)
+
+    async def __send_cluster_id_to_endpoint(self, method, api_path, cluster_name, cluster_id, idempotent=False):
+        if not (cluster_name or cluster_id):
+            raise ValueError("Either cluster_id or cluster_name must be specified")
+
+        indexed_id = None
+        if cluster_name and not cluster_id:
+            indexed_id = self._cluster_index.get(cluster_name)
+            cluster_id = indexed_id or await self.get_cluster_id(cluster_name)
+
+        retry = {'retry': True} if idempotent else {}
+        resp = await self._rest_call[method](api_path, data={"cluster_id": cluster_id}, **retry)
+
+        if indexed_id and _is_missing_cluster(resp):
+            self._cluster_index.invalidate()
+            cluster_id = await self.get_cluster_id(cluster_name)
+
+            if cluster_id != indexed_id:
+                resp = await self._rest_call[method](api_path, data={"cluster_id": cluster_id}, **retry)
+
+        if resp.status_code == 200 and method == 'GET':
+            return resp.json()
+        elif resp.status_code == 200:
+            return cluster_id
+        else:
+            raise choose_exception(resp)
+
+    async def get_cluster_id(self, cluster_name):
+        cluster_id = self._cluster_index.get(cluster_name)
+        if cluster_id is None:
+            cluster_id = _select_cluster_id(await self.__list_once(), cluster_name)
+
+        return cluster_id
+
+    async def __list_once(self):
+        # Concurrent lookups that miss the index share one clusters/list call
+        if self.__listing is None:
+            self.__listing = asyncio.ensure_future(self.list())
+            try:
+                return await self.__listing
+            finally:
+                self.__listing = None
+
+        return await self.__listing
+
+    async def list(self):
+        resp = await self._rest_call['GET']('clusters/list')
+
+        if resp.status_code == 200:
+            clusters = resp.json().get('clusters', [])
+            self._cluster_index.update(clusters)
+            return clusters
+        else:
+            raise choose_exception(resp)
+
+    async def list_node_types(self):
+        cache_key = MetadataCache.key(self._host, 'clusters/list-node-types')
+        node_types = self._metadata_cache.get(cache_key)
+        if node_types is not None:
+            return node_types
+
+        resp = await self._rest_call['GET']('clusters/list-node-types')
+
+        if resp.status_code == 200:
+            node_types = resp.json()['node_types']
+            self._metadata_cache.set(cache_key, node_types)
+            return node_types
+        else:
+            raise choose_exception(resp)
+
+    async def list_available_node_type_names(self):
+        return _available_node_type_names(await self.list_node_types())
+
+    async def spark_versions(self):
+        cache_key = MetadataCache.key(self._host, 'clusters/spark-versions')
+        spark_versions = self._metadata_cache.get(cache_key)
+        if spark_versions is not None:
+            return spark_versions
+
+        resp = await self._rest_call['GET']('clusters/spark-versions')
+
+        if resp.status_code == 200:
+            spark_versions = {item['key']: item['name'] for item in resp.json()['versions']}
+            self._metadata_cache.set(cache_key, spark_versions)
+            return spark_versions
+        else:
+            raise choose_exception(resp)
+
+    async def wait_for_states(self, targets, timeout=None, callback=None):
+        """
+        asyncio version of ClusterAPI.wait_for_states
+
+        Returns a dict of cluster ID to asyncio.Future, e.g.
+
+            futures = await client.clusters.wait_for_states({cluster_id: 'RUNNING'})
+            clusters = await asyncio.gather(*futures.values())
+        """
+        loop = asyncio.get_running_loop()
+        if self._state_poll_wakeup is None:
+            self._state_poll_wakeup = asyncio.Event()
+
+        futures = {}
+        start_poller = False
+
+        for cluster_id, target_states in targets.items():
+            future = loop.create_future()
+            if callback is not None:
+                future.add_done_callback(callback)
+
+            start_poller = self._state_waiters.add(cluster_id, target_states, timeout, future) or start_poller
+            futures[cluster_id] = future
+
+        if start_poller:
+            loop.create_task(self.__poll_states())
+        else:
+            self._state_poll_wakeup.set()
+
+        return futures
+
+    async def __poll_states(self):
+        interval = self.min_poll_interval
+
+        while True:
+            self._state_poll_wakeup.clear()
+
+            try:
+                clusters = await self.list()
+            except Exception as exception:
+                self._state_waiters.fail_all(exception)
+                return
+
+            changed, active = self._state_waiters.advance(clusters)
+            if not active:
+                return
+
+            interval = _next_poll_interval(interval, changed, self.min_poll_interval, self.max_poll_interval)
+
+            next_deadline = self._state_waiters.next_deadline()
+            try:
+                await asyncio.wait_for(self._state_poll_wakeup.wait(),
+                                       interval if next_deadline is None else min(interval, next_deadline))
+            except asyncio.TimeoutError:
+                pass
+
+
+class AsyncGroupsAPI(AsyncRESTBase):
+    """asyncio version of GroupsAPI"""
+
+    @staticmethod
+    def __prep_group_or_user(group_name=None, user_name=None):
+        if group_name and user_name:
+            raise ValueError("Both group_name and user_name were defined. Only of these values can be defined.")
+        elif not group_name and not user_name:
+            raise ValueError("Neither group_name or user_name were defined. One of these values are required.")
+
+        if group_name:
+            return {'group_name': group_name}, group_name
+        else:
+            return {'user_name': user_name}, user_name
+
+    async def __call(self, method, api_path, data=None):
+        resp = await self._rest_call[method](api_path, data=data)
+
+        if resp.status_code == 200:
+            return resp.json()
+        else:
+            raise choose_exception(resp)
+
+    async def add_member(self, parent_group, group_name=None, user_name=None):
+        data, target_name = self.__prep_group_or_user(group_name=group_name, user_name=user_name)
+        data['parent_name'] = parent_group
+
+        await self.__call('POST', '/groups/add-member', data)
+        return target_name
+
+    async def create(self, group_name):
+        return await self.__call('POST', '/groups/create', {'group_name': group_name})
+
+    async def list_members(self, group_name):
+        return (await self.__call('GET', '/groups/list-members', {'group_name': group_name})).get('members')
+
+    async def list(self):
+        return (await self.__call('GET', '/groups/list')).get('group_names')
+
+    async def list_parents(self, group_name=None, user_name=None):
+        data, target_name = self.__prep_group_or_user(group_name=group_name, user_name=user_name)
+        return (await self.__call('GET', '/groups/list-parents', data)).get('group_names')
+
+    async def remove_member(self, parent_group, remove_group=None, remove_user=None):
+        data, target_name = self.__prep_group_or_user(group_name=remove_group, user_name=remove_user)
+        data['parent_name'] = parent_group
+
+        await self.__call('POST', '/groups/remove-member', data)
+        return target_name
+
+    async def delete(self, group_name):
+        await self.__call('POST', '/groups/delete', {'group_name': group_name})
+        return group_name
+
+
+class AsyncTokensAPI(AsyncRESTBase):
+    """asyncio version of TokensAPI"""
+
+    async def create(self, comment, lifetime_seconds=7776000):
+        data = {'lifetime_seconds': lifetime_seconds,
+                'comment': comment}
+
+        resp = await self._rest_call['POST']('/token/create', data=data)
+
+        if resp.status_code == 200:
+            resp_json = resp.json()
+            return {'token_value': resp_json.get('token_value'),
+                    'token_info': TokenInfo(**resp_json.get('token_info'))}
+        else:
+            raise choose_exception(resp)
+
+    async def list(self):
+        resp = await self._rest_call['GET']('/token/list')
+
+        if resp.status_code == 200:
+            return [TokenInfo(**token) for token in resp.json().get('token_infos', [])]
+        else:
+            raise choose_exception(resp)
+
+    async def revoke(self, token_id):
+        resp = await self._rest_call['POST']('/token/delete', data={'token_id': token_id})
+
+        if resp.status_code == 200:
+            return token_id
+        else:
+            raise choose_exception(resp)
+
+
+class AsyncWorkspaceAPI(AsyncRESTBase):
+    """asyncio version of WorkspaceAPI"""
+
+    async def delete(self, path, recursive=False, not_exists_ok=False):
+        resp = await self._rest_call['POST']('/workspace/delete', data={'path': path, 'recursive': recursive})
+
+        if resp.status_code == 200:
+            return path
+        else:
+            exception = choose_exception(resp)
+            if not_exists_ok and isinstance(exception, ResourceDoesNotExist):
+                return path
+            raise exception
+
+    async def export(self, dbx_path, file_path, file_format='DBC', chunk_size=EXPORT_CHUNK_SIZE):
+        if file_format.upper() not in EXPORT_FORMATS:
+            raise UnknownFormat('{0} is not a supported format type. Please use DBC, SOURCE, HTML, or JUPYTER'
+                                .format(file_format))
+
+        data = {'path': dbx_path,
+                'format': file_format,
+                'direct_download': True}
+
+        with _export_destination(file_path) as fo:
+            resp = await self._rest_call['GET']('/workspace/export', data=data, stream_to=fo.write,
+                                                chunk_size=chunk_size)
+
+            if resp.status_code != 200:
+                raise choose_exception(resp)
+
+        return file_path
+
+    async def get_status(self, path):
+        resp = await self._rest_call['GET']('/workspace/get-status', data={'path': path})
+
+        if resp.status_code == 200:
+            return _workspace_object(resp.json())
+        else:
+            raise choose_exception(resp)
+
+    async def import_file(self, dbx_path, file_format, language="", overwrite=False, url=None, filepath=None):
+        _validate_import(file_format=file_format, language=language, url=url, filepath=filepath)
+
+        if url:
+            async with self._session.session.get(url) as url_resp:
+                content = base64.b64encode(await url_resp.read())
+        else:
+            content = file_content_to_b64(filepath)
+
+        data = _build_import_payload(dbx_path=dbx_path, file_format=file_format, language=language,
+                                     overwrite=overwrite, content=content)
+
+        resp = await self._rest_call['POST']('/workspace/import', data=data, retry=overwrite)
+
+        if resp.status_code == 200:
+            return dbx_path
+        else:
+            raise choose_exception(resp)
+
+    async def list(self, path):
+        resp = await self._rest_call['GET']('/workspace/list', data={'path': path})
+
+        if resp.status_code == 200:
+            return [_workspace_object(obj) for obj in resp.json().get('objects') or []]
+        else:
+            raise choose_exception(resp)
+
+    async def mkdirs(self, path, exists_ok=False):
+        resp = await self._rest_call['POST']('/workspace/mkdirs', data={'path': path}, retry=True)
+
+        if resp.status_code == 200:
+            return path
+        else:
+            exception = choose_exception(resp)
+            if exists_ok and isinstance(exception, ResourceAlreadyExists):
+                return path
+            raise exception
+
+
+class AsyncDbfsAPI(AsyncRESTBase):
+    """asyncio version of DbfsAPI"""
+
+    async def __call(self, method, api_path, data, retry=False):
+        retry = {'retry': True} if retry else {}
+        resp = await self._rest_call[method](api_path, data=data, **retry)
+
+        if resp.status_code == 200:
+            return resp.json()
+        else:
+            raise choose_exception(resp)
+
+    async def add_block(self, handle, data_block):
+        await self.__call('POST', '/dbfs/add-block', {"handle": handle, "data": data_block.decode('utf-8')})
+        return handle
+
+    async def close(self, handle):
+        await self.__call('POST', '/dbfs/close', {"handle": handle})
+        return handle
+
+    async def create(self, path, overwrite=False):
+        return (await self.__call('POST', '/dbfs/create', {"path": path, "overwrite": overwrite})).get('handle')
+
+    async def delete(self, path, recursive=False, not_exists_ok=False):
+        try:
+            await self.__call('POST', '/dbfs/delete', {"path": path, "recursive": recursive})
+        except ResourceDoesNotExist:
+            if not not_exists_ok:
+                raise
+        return path
+
+    async def get_status(self, path):
+        return _file_info(await self.__call('GET', '/dbfs/get-status', {"path": path}))
+
+    async def list(self, path):
+        return [_file_info(file) for file in (await self.__call('GET', '/dbfs/list', {"path": path})).get('files')]
+
+    async def mkdirs(self, path):
+        await self.__call('POST', '/dbfs/mkdirs', {"path": path}, retry=True)
+        return path
+
+    async def move(self, source_path, destination_path):
+        await self.__call('POST', '/dbfs/move', {"source_path": source_path,
+                                                 "destination_path": destination_path})
+        return destination_path
+
+    async def __put(self, path, file_obj, length, overwrite=False):
+        # The file is base64 encoded as the request is sent
+        payload = Base64JSONBody({"path": path, "overwrite": overwrite}, "contents", file_obj, offset=0,
+                                 length=length)
+        await self.__call('POST', '/dbfs/put', payload, retry=overwrite)
+        return path
+
+    async def __add_file_block(self, handle, file_obj, offset, length):
+        # The block is base64 encoded as the request is sent
+        payload = Base64JSONBody({"handle": handle}, "data", file_obj, offset=offset, length=length)
+        await self.__call('POST', '/dbfs/add-block', payload)
+        return handle
+
+    async def __read(self, path, offset, length=MB_BYTES):
+        return FileReadInfo(**(await self.__call('GET', '/dbfs/read', {"path": path,
+                                                                       "offset": offset,
+                                                                       "length": length})))
+
+    async def download_file(self, local_path, dbfs_path, overwrite=False, chunk_size=MB_BYTES, workers=8):
+        """
+        asyncio version of DbfsAPI.download_file. A directory is downloaded with download_directory, and workers
+        is the number of its files downloaded at the same time.
+        """
+        if os.path.exists(local_path) and not overwrite:
+            raise FileExistsError("The local path {0} already exists.".format(local_path))
+
+        file_info = await self.get_status(dbfs_path)
+
+        if file_info.is_dir:
+            report = await self.download_directory(dbfs_path, local_path, overwrite=overwrite, workers=workers,
+                                                   chunk_size=chunk_size)
+            _raise_for_failures(report, "download", dbfs_path)
+            return local_path
+
+        return await self.__download(local_path, dbfs_path, file_info.file_size, chunk_size)
+
+    async def __download(self, local_path, dbfs_path, file_size, chunk_size):
+        with open(local_path, 'wb') as file_obj:
+            downloaded_size = 0
+
+            while downloaded_size < file_size:
+                chunk = await self.__read(path=dbfs_path, offset=downloaded_size, length=chunk_size)
+                _check_bytes_read(chunk, dbfs_path, downloaded_size)
+
+                file_obj.write(base64.b64decode(chunk.data))
+                downloaded_size += chunk.bytes_read
+
+        return local_path
+
+    async def download_directory(self, dbfs_dir, local_dir, overwrite=False, workers=8, chunk_size=MB_BYTES):
+        """
+        asyncio version of DbfsAPI.download_directory - at most workers list calls or file downloads run at the
+        same time
+        """
+        start_time = time.time()
+        semaphore = asyncio.Semaphore(workers)
+
+        async def list_directory(path):
+            async with semaphore:
+                return await self.list(path)
+
+        directories, files = [], []
+        pending = {asyncio.ensure_future(list_directory(dbfs_dir))}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    for file in task.result():
+                        if file.is_dir:
+                            directories.append(file)
+                            pending.add(asyncio.ensure_future(list_directory(file.path)))
+                        else:
+                            files.append(file)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        def local_path(file):
+            relative_path = posixpath.relpath(file.path, dbfs_dir)
+            return os.path.join(local_dir, *relative_path.split('/'))
+
+        os.makedirs(local_dir, exist_ok=True)
+        for directory in directories:
+            os.makedirs(local_path(directory), exist_ok=True)
+
+        async def download_one(file):
+            async with semaphore:
+                return await self.__download_one(file, local_path(file), overwrite, chunk_size)
+
+        results = await asyncio.gather(*[download_one(file) for file in files])
+        return _transfer_report(list(results), start_time)
+
+    async def __download_one(self, file, local_path, overwrite, chunk_size):
+        start_time = time.time()
+        try:
+            if os.path.exists(local_path) and not overwrite:
+                raise FileExistsError("The local path {0} already exists.".format(local_path))
+
+            await self.__download(local_path, file.path, file.file_size, chunk_size)
+        except Exception as error:
+            return TransferResult(source=file.path, destination=local_path, bytes=0,
+                                  seconds=time.time() - start_time, error=error)
+
+        return TransferResult(source=file.path, destination=local_path, bytes=file.file_size,
+                              seconds=time.time() - start_time, error=None)
+
+    async def upload_file_by_path(self, file_path, dbfs_path, overwrite=False, chunk_size=MB_BYTES):
+        file_size = os.path.getsize(file_path)
+
+        with open(file_path, 'rb') as file_obj:
+            if file_size <= MB_BYTES:
+                return await self.__put(dbfs_path, file_obj, file_size, overwrite=overwrite)
+
+            stream_handle = await self.create(dbfs_path, overwrite)
+
+            offset = 0
+            for chunk in _get_chunks(file_size, chunk_size):
+                await self.__add_file_block(stream_handle, file_obj, offset, chunk)
+                offset += chunk
+
+            await self.close(handle=stream_handle)
+
+        return dbfs_path
+
+
+class AsyncLibrariesAPI(AsyncRESTBase):
+    """asyncio version of LibrariesAPI"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self._library_index = None
+
+    async def library_index(self):
+        if self._library_index is None:
+            self._library_index = LibraryIndex(await self.all_cluster_statuses())
+
+        return self._library_index
+
+    async def refresh_library_index(self):
+        all_cluster_statuses = await self.all_cluster_statuses()
+
+        if self._library_index is None:
+            self._library_index = LibraryIndex(all_cluster_statuses)
+        else:
+            self._library_index.update(all_cluster_statuses)
+
+        return self._library_index
+
+    async def all_cluster_statuses(self):
+        resp = await self._rest_call['GET']('/libraries/all-cluster-statuses')
+
+        if resp.status_code == 200:
+            return resp.json()
+        else:
+            raise choose_exception(resp)
+
+    async def cluster_status(self, cluster_id):
+        resp = await self._rest_call['GET']('/libraries/cluster-status', data={'cluster_id': cluster_id})
+
+        if resp.status_code == 200:
+            return resp.json()
+        else:
+            raise choose_exception(resp)
+
+    async def get_library_details(self, cluster_id, library_name, library_type=None):
+        return _find_library(await self.cluster_status(cluster_id), cluster_id, library_name, library_type)
+
+    async def wait_for_install_complete(self, cluster_id, library_name, library_type=None, timeout=120):
+        _, library_statuses = await self.__wait_for_libraries(cluster_id, [(library_type, library_name)], timeout)
+        return library_statuses[0]
+
+    async def wait_for_libraries(self, cluster_id, libraries, timeout=120):
+        _, library_statuses = await self.__wait_for_libraries(cluster_id,
+                                                              [_library_name(library) for library in libraries],
+                                                              timeout)
+        return library_statuses
+
+    async def __wait_for_libraries(self, cluster_id, library_keys, timeout):
+        deadline = time.monotonic() + timeout
+        interval = MIN_INSTALL_POLL_INTERVAL
+
+        while True:
+            cluster_status = await self.cluster_status(cluster_id)
+            library_statuses, done = _check_libraries(cluster_status, cluster_id, library_keys)
+
+            if done:
+                return cluster_status, library_statuses
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("The status check timed out")
+
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(MAX_INSTALL_POLL_INTERVAL, interval * 2)
+
+    async def install(self, cluster_id, libraries, wait_for_completion=False, timeout=120, return_status=True):
+        resp = await self._rest_call['POST']('/libraries/install', data={'cluster_id': cluster_id,
+                                                                          'libraries': libraries}, retry=True)
+
+        if resp.status_code == 200 and wait_for_completion:
+            cluster_status, _ = await self.__wait_for_libraries(cluster_id,
+                                                                [_library_name(library) for library in libraries],
+                                                                timeout)
+            return cluster_status
+        elif resp.status_code == 200:
+            return await self.cluster_status(cluster_id) if return_status else None
+        else:
+            raise choose_exception(resp)
+
+    async def install_many(self, cluster_ids, libraries, workers=8, wait_for_completion=False, timeout=600,
+                           return_status=False):
+        results = await self.__for_each_cluster(
+            cluster_ids, workers, lambda cluster_id: self.install(cluster_id, libraries, return_status=return_status))
+
+        if wait_for_completion:
+            pending = {cluster_id for cluster_id, result in results.items() if result.error is None}
+            results.update(await self.__wait_for_fleet(pending, [_library_name(library) for library in libraries],
+                                                       timeout))
+
+        return results
+
+    async def __for_each_cluster(self, cluster_ids, workers, call):
+        semaphore = asyncio.Semaphore(workers)
+
+        async def call_one(cluster_id):
+            async with semaphore:
+                try:
+                    cluster_status = await call(cluster_id)
+                except Exception as error:
+                    return ClusterLibraryResult(cluster_id=cluster_id, library_statuses=None, error=error)
+
+            return _cluster_result(cluster_id, cluster_status)
+
+        results = await asyncio.gather(*[call_one(cluster_id) for cluster_id in cluster_ids])
+        return {result.cluster_id: result for result in results}
+
+    async def __wait_for_fleet(self, pending, library_keys, timeout):
+        deadline = time.monotonic() + timeout
+        interval = MIN_INSTALL_POLL_INTERVAL
+        results = {}
+
+        while pending:
+            finished = _advance_fleet(await self.all_cluster_statuses(), pending, library_keys)
+            results.update(finished)
+            pending = pending - set(finished)
+
+            remaining = deadline - time.monotonic()
+            if pending and remaining <= 0:
+                for cluster_id in pending:
+                    results[cluster_id] = ClusterLibraryResult(
+                        cluster_id=cluster_id, library_statuses=None,
+                        error=TimeoutError("The status check timed out"))
+                break
+
+            if pending:
+                await asyncio.sleep(min(interval, remaining))
+                interval = min(MAX_INSTALL_POLL_INTERVAL, interval * 2)
+
+        return results
+
+    async def __install_one(self, cluster_id, library, library_name, wait_for_completion, timeout):
+        resp = await self.install(cluster_id, [library])
+
+        if wait_for_completion:
+            resp = await self.wait_for_install_complete(cluster_id, library_name, list(library)[0], timeout)
+
+        return resp
+
+    async def install_pypi(self, cluster_id, package, repo=None, wait_for_completion=False, timeout=120):
+        library = {'pypi': {"package": package}}
+
+        if repo is not None:
+            library['pypi']['repo'] = repo
+
+        return await self.__install_one(cluster_id, library, package, wait_for_completion, timeout)
+
+    async def install_cran(self, cluster_id, package, repo=None, wait_for_completion=False, timeout=120):
+        library = {'cran': {"package": package}}
+
+        if repo is not None:
+            library['cran']['repo'] = repo
+
+        return await self.__install_one(cluster_id, library, package, wait_for_completion, timeout)
+
+    async def install_maven(self, cluster_id, coordinates, repo=None, exclusions=None, wait_for_completion=False,
+                            timeout=120):
+        library = {'maven': {"coordinates": coordinates}}
+
+        if repo is not None:
+            library['maven']['repo'] = repo
+
+        if exclusions is not None:
+            if type(exclusions) != list:
+                exclusions = [exclusions]
+
+            library['maven']['exclusions'] = exclusions
+
+        return await self.__install_one(cluster_id, library, coordinates, wait_for_completion, timeout)
+
+    async def uninstall(self, cluster_id, libraries, return_status=True):
+        resp = await self._rest_call['POST']('/libraries/uninstall', data={'cluster_id': cluster_id,
+                                                                            'libraries': libraries}, retry=True)
+
+        if resp.status_code == 200:
+            return await self.cluster_status(cluster_id) if return_status else None
+        else:
+            raise choose_exception(resp)
+
+    async def uninstall_many(self, cluster_ids, libraries, workers=8, return_status=False):
+        return await self.__for_each_cluster(
+            cluster_ids, workers, lambda cluster_id: self.uninstall(cluster_id, libraries, return_status=return_status))
+
+    async def uninstall_pypi(self, cluster_id, package):
+        return await self.uninstall(cluster_id, [{'pypi': {"package": package}}])
+
+    async def uninstall_cran(self, cluster_id, package):
+        return await self.uninstall(cluster_id, [{'cran': {"package": package}}])
+
+    async def uninstall_maven(self, cluster_id, coordinates):
+        return await self.uninstall(cluster_id, [{'maven': {"coordinates": coordinates}}])
+
+
+class AsyncJobsAPI(AsyncRESTBase):
+    """asyncio version of JobsAPI. list() and runs_list() are async generators."""
+
+    async def __call(self, method, api_path, data=None, retry=False):
+        retry = {'retry': True} if retry else {}
+        resp = await self._rest_call[method](api_path, data=data, **retry)
+
+        if resp.status_code == 200:
+            return resp.json()
+        else:
+            raise choose_exception(resp)
+
+    async def create(self, name, **kwargs):
+        return (await self.__call('POST', '/jobs/create', dict_update(kwargs, {'name': name})))['job_id']
+
+    async def list(self, offset=0, limit=DEFAULT_JOBS_PAGE_SIZE, prefetch=False):
+        async def fetch_page(page_offset, page_limit):
+            return await self.__call('GET', '/jobs/list', {'offset': page_offset, 'limit': page_limit})
+
+        async for job in _paginate(fetch_page, 'jobs', offset, limit, prefetch):
+            yield job
+
+    async def delete(self, job_id):
+        await self.__call('POST', '/jobs/delete', {'job_id': job_id})
+        return job_id
+
+    async def get(self, job_id):
+        return await self.__call('GET', '/jobs/get', {'job_id': job_id})
+
+    async def reset(self, job_id, new_settings):
+        await self.__call('POST', '/jobs/reset', {'job_id': job_id, 'new_settings': new_settings}, retry=True)
+        return job_id
+
+    async def run_now(self, job_id, jar_params=None, notebook_params=None, python_params=None,
+                      spark_submit_params=None):
+        data = {'job_id': job_id}
+        for key, value in [('jar_params', jar_params), ('notebook_params', notebook_params),
+                           ('python_params', python_params), ('spark_submit_params', spark_submit_params)]:
+            if value is not None:
+                data[key] = value
+
+        return await self.__call('POST', '/jobs/run-now', data)
+
+    async def runs_submit(self, run_name=None, **kwargs):
+        data = dict(kwargs)
+        if run_name is not None:
+            data['run_name'] = run_name
+
+        return (await self.__call('POST', '/jobs/runs/submit', data,
+                                  retry=bool(data.get('idempotency_token'))))['run_id']
+
+    async def runs_list(self, job_id=None, active_only=False, completed_only=False, offset=0,
+                        limit=DEFAULT_JOBS_PAGE_SIZE, prefetch=False):
+        if active_only and completed_only:
+            raise ValueError("Only one of active_only and completed_only can be set")
+
+        data = {'active_only': active_only, 'completed_only': completed_only}
+        if job_id is not None:
+            data['job_id'] = job_id
+
+        async def fetch_page(page_offset, page_limit):
+            return await self.__call('GET', '/jobs/runs/list', dict(data, offset=page_offset, limit=page_limit))
+
+        async for run in _paginate(fetch_page, 'runs', offset, limit, prefetch):
+            yield run
+
+    async def runs_get(self, run_id):
+        return await self.__call('GET', '/jobs/runs/get', {'run_id': run_id})
+
+    async def runs_export(self, run_id, views_to_export='CODE'):
+        return (await self.__call('GET', '/jobs/runs/export',
+                                  {'run_id': run_id, 'views_to_export': views_to_export})).get('views', [])
+
+    async def runs_cancel(self, run_id):
+        await self.__call('POST', '/jobs/runs/cancel', {'run_id': run_id}, retry=True)
+        return run_id
+
+    async def runs_get_output(self, run_id):
+        return await self.__call('GET', '/jobs/runs/get-output', {'run_id': run_id})
+
+    async def runs_delete(self, run_id):
+        await self.__call('POST', '/jobs/runs/delete', {'run_id': run_id})
+        return run_id
+
+    def track_runs(self, run_ids, workers=8, fetch_output=True, poll_intervals=None, callback=None):
+        """
+        asyncio version of JobsAPI.run_tracker().track() - polls each run in its own task, with at most workers
+        calls in flight at once. Must be called from a running event loop.
+
+        Returns a dict of run ID to asyncio.Task, resolved with a RunResult(run_id, run, output), e.g.
+
+            tasks = client.jobs.track_runs(run_ids)
+            results = await asyncio.gather(*tasks.values())
+        """
+        semaphore = asyncio.Semaphore(workers)
+        poll_intervals = dict(RUN_POLL_INTERVALS, **(poll_intervals or {}))
+
+        tasks = {}
+        for run_id in dict.fromkeys(run_ids):
+            task = asyncio.ensure_future(self.__track_run(run_id, semaphore, fetch_output, poll_intervals))
+            if callback is not None:
+                task.add_done_callback(callback)
+            tasks[run_id] = task
+
+        return tasks
+
+    async def __track_run(self, run_id, semaphore, fetch_output, poll_intervals):
+        state, interval = None, None
+
+        while True:
+            async with semaphore:
+                run = await self.runs_get(run_id)
+
+            previous_state, state = state, _life_cycle_state(run)
+            if state in TERMINAL_LIFE_CYCLE_STATES:
+                break
+
+            interval = _next_run_poll_interval(state, previous_state, interval, poll_intervals)
+            await asyncio.sleep(interval)
+
+        output = None
+        if fetch_output:
+            async with semaphore:
+                output = await self.runs_get_output(run_id)
+
+        return RunResult(run_id=run_id, run=run, output=output)
+
+    async def wait_for_runs(self, run_ids, timeout=None, workers=8, fetch_output=True):
+        """asyncio version of JobsAPI.wait_for_runs"""
+        tasks = self.track_runs(run_ids, workers=workers, fetch_output=fetch_output)
+        if not tasks:
+            return {}
+
+        _, not_done = await asyncio.wait(list(tasks.values()), timeout=timeout)
+        if not_done:
+            for task in not_done:
+                task.cancel()
+            raise TimeoutError("{0} of {1} runs haven't finished".format(len(not_done), len(tasks)))
+
+        return {run_id: task.result() for run_id, task in tasks.items()}
+
+    async def submit_many(self, specs, max_in_flight=10, workers=8, fetch_output=True, poll_intervals=None):
+        """
+        asyncio version of JobsAPI.submit_many - an async generator of SubmittedRunResult, in the order the runs
+        finish. Runs still being tracked when iteration stops are no longer polled, but aren't cancelled.
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        semaphore = asyncio.Semaphore(workers)
+        poll_intervals = dict(RUN_POLL_INTERVALS, **(poll_intervals or {}))
+
+        specs = enumerate(specs)
+        pending = set()
+        try:
+            while True:
+                while len(pending) < max_in_flight:
+                    index, spec = next(specs, (None, None))
+                    if spec is None:
+                        break
+
+                    pending.add(asyncio.ensure_future(
+                        self.__submit_and_track(index, _with_idempotency_token(spec), semaphore, fetch_output,
+                                                poll_intervals)))
+
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def __submit_and_track(self, index, spec, semaphore, fetch_output, poll_intervals):
+        run_id = None
+        try:
+            async with semaphore:
+                run_id = await self.runs_submit(**spec)
+
+            result = await self.__track_run(run_id, semaphore, fetch_output, poll_intervals)
+        except Exception as exception:
+            return SubmittedRunResult(index=index, spec=spec, run_id=run_id, run=None, output=None, error=exception)
+
+        return SubmittedRunResult(index=index, spec=spec, run_id=run_id, run=result.run, output=result.output,
+                                  error=None)
@@ -0,0 +1,226 @@
+# Copyright (c) 2018 Microsoft
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import asyncio
+import json
+import time
+
+from azure_databricks_api.__base import RESTBase, DEFAULT_POOL_MAXSIZE
+from azure_databricks_api.__metrics import ConnectionTimings, RequestMetrics, notify_observers
+
+# Bytes of a streamed response body read at a time
+STREAM_CHUNK_SIZE = 1048576
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+class AsyncResponse(object):
+    """
+    The parts of an HTTP response used by the API objects, read in full from an aiohttp response.
+
+    Mirrors the requests.Response attributes used by choose_exception, so error handling is shared with
+    the synchronous client.
+    """
+
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+
+async def _read_body(body, chunk_size=STREAM_CHUNK_SIZE):
+    """Stream a file-like request body from its start, so that it is sent again in full if the request is retried"""
+    body.seek(0)
+    while True:
+        chunk = body.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _timing_trace_config():
+    """
+    An aiohttp TraceConfig recording DNS and connect times into the ConnectionTimings passed to a request as its
+    trace_request_ctx
+    """
+    trace_config = aiohttp.TraceConfig()
+
+    def timer(attribute, start):
+        async def record(session, context, params):
+            timings = context.trace_request_ctx
+            if not isinstance(timings, ConnectionTimings):
+                return
+            if start:
+                setattr(context, attribute + '_started', time.perf_counter())
+            else:
+                started = getattr(context, attribute + '_started')
+                setattr(timings, attribute, getattr(timings, attribute) + time.perf_counter() - started)
+        return record
+
+    # aiohttp resolves the host while creating the connection, so DNS time is taken out of connect time below
+    trace_config.on_dns_resolvehost_start.append(timer('dns_seconds', start=True))
+    trace_config.on_dns_resolvehost_end.append(timer('dns_seconds', start=False))
+    trace_config.on_connection_create_start.append(timer('connect_seconds', start=True))
+    trace_config.on_connection_create_end.append(timer('connect_seconds', start=False))
+
+    return trace_config
+
+
+class AsyncConnectionPool(object):
+    """
+    Lazily creates a single aiohttp.ClientSession, shared by all of the API objects of an async client.
+
+    aiohttp sessions must be created inside a running event loop, so the session is created on first use. With
+    timed_connections, the session records the DNS and connect times of new connections for request observers.
+    """
+
+    def __init__(self, limit=DEFAULT_POOL_MAXSIZE, limit_per_host=0, keepalive_timeout=15, timed_connections=False):
+        if aiohttp is None:
+            raise ImportError("The async client requires aiohttp. "
+                              "Install it with 'pip install azure-databricks-api[async]'")
+
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._timed_connections = timed_connections
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._limit, limit_per_host=self._limit_per_host,
+                                             keepalive_timeout=self._keepalive_timeout)
+            trace_configs = [_timing_trace_config()] if self._timed_connections else None
+            self._session = aiohttp.ClientSession(connector=connector, trace_configs=trace_configs)
+
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncRESTBase(RESTBase):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self._rest_call = {'GET': self.__get,
+                          'POST': self.__post}
+
+    async def __get(self, api_endpoint, data=None, retry=True, stream_to=None, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Send HTTP GET request to REST API endpoint with data as a JSON body
+
+        :param api_endpoint: string : The api endpoint to be called - after version number
+        :param data: dict : Data to be passed in the request
+        :param retry: bool : Retry the call if it is throttled or fails with a 5xx error
+        :param stream_to: callable : Called with each chunk of a successful response's body, instead of reading
+                                     the body into the AsyncResponse
+        :param chunk_size: int : The largest chunk passed to stream_to
+        :return: AsyncResponse
+        """
+        return await self.__request('GET', api_endpoint, data=data, retry=retry, stream_to=stream_to,
+                                    chunk_size=chunk_size)
+
+    async def __post(self, api_endpoint, data, retry=False):
+        """
+        Send HTTP POST request to REST API endpoint with data as JSON object
+
+        :param api_endpoint: string : The api endpoint to be called - after version number
+        :param data: dict : Data to be passed in the request
+        :param retry: bool : Set to True if the call is idempotent, so it can be retried if it is throttled
+                             or fails with a 5xx error
+        :return: AsyncResponse
+        """
+        return await self.__request('POST', api_endpoint, data=data, retry=retry)
+
+    async def __request(self, method, api_endpoint, data=None, retry=False, stream_to=None,
+                        chunk_size=STREAM_CHUNK_SIZE):
+        uri = self._build_uri(api_endpoint)
+        retryable = self._retry_policy.is_retryable(method, api_endpoint, retry)
+
+        headers = dict(self._headers)
+        body = None
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+            # File-like bodies (e.g. Base64JSONBody) are streamed as they are read
+            body = data if hasattr(data, 'read') else json.dumps(data, ensure_ascii=False).encode('utf-8')
+            headers['Content-Length'] = str(len(body))
+
+        attempt = 1
+        while True:
+            if self._rate_limiter is not None:
+                delay = self._rate_limiter.reserve(api_endpoint)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            timings = ConnectionTimings() if self._observers else None
+            started = time.perf_counter()
+            ttfb_seconds = None
+            streamed = 0
+            try:
+                request_body = _read_body(body) if hasattr(body, 'read') else body
+                async with self._session.session.request(method, uri, headers=headers, data=request_body,
+                                                         trace_request_ctx=timings) as resp:
+                    ttfb_seconds = time.perf_counter() - started
+
+                    if stream_to is not None and resp.status == 200:
+                        async for chunk in resp.content.iter_chunked(chunk_size):
+                            stream_to(chunk)
+                            streamed += len(chunk)
+                        response = AsyncResponse(resp.status, b'', resp.headers)
+                    else:
+                        response = AsyncResponse(resp.status, await resp.read(), resp.headers)
+            # A ClientPayloadError is a response body cut short, e.g. by the connection closing
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as exception:
+                if timings is not None:
+                    self.__observe(method, api_endpoint, attempt, started, ttfb_seconds, timings, body, streamed,
+                                   error=exception)
+                # Part of the body has been handed on, so the request can't be repeated
+                if not retryable or streamed:
+                    raise
+                if not self._retry_policy.should_retry(attempt):
+                    self._retry_policy.record_exhausted()
+                    raise
+                delay = self._retry_policy.get_delay(attempt)
+            else:
+                if timings is not None:
+                    self.__observe(method, api_endpoint, attempt, started, ttfb_seconds, timings, body,
+                                   streamed or len(response.content), response=response)
+                if not (retryable and response.status_code in self._retry_policy.retry_statuses):
+                    return response
+                if not self._retry_policy.should_retry(attempt, response.status_code):
+                    self._retry_policy.record_exhausted()
+                    return response
+                delay = self._retry_policy.get_delay(attempt, response.headers.get('Retry-After'))
+                if response.status_code == 429 and self._rate_limiter is not None:
+                    self._rate_limiter.throttled(api_endpoint, delay)
+
+            self._retry_policy.record_retry(delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def __observe(self, method, api_endpoint, attempt, started, ttfb_seconds, timings, body, bytes_received,
+                  response=None, error=None):
+        """Report the metrics of one request to the observers"""
+        total_seconds = time.perf_counter() - started
+        # The DNS lookup happens within the connection's creation
+        connect_seconds = max(0.0, timings.connect_seconds - timings.dns_seconds)
+
+        notify_observers(self._observers, RequestMetrics(
+            method=method, endpoint=api_endpoint.lstrip('/'),
+            status_code=response.status_code if response is not None else None, error=error, retries=attempt - 1,
+            bytes_sent=len(body) if body is not None else 0,
+            bytes_received=bytes_received,
+            dns_seconds=timings.dns_seconds, connect_seconds=connect_seconds,
+            ttfb_seconds=ttfb_seconds if ttfb_seconds is not None else total_seconds, total_seconds=total_seconds))
@@ -0,0 +1,110 @@
+# Copyright (c) 2018 Microsoft
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+from azure_databricks_api.__async_api import AsyncClusterAPI, AsyncGroupsAPI, AsyncTokensAPI, AsyncWorkspaceAPI, \
+    AsyncDbfsAPI, AsyncLibrariesAPI, AsyncJobsAPI
+from azure_databricks_api.__async_base import AsyncConnectionPool
+from azure_databricks_api.__cache import MetadataCache
+from azure_databricks_api.__base import workspace_host, DEFAULT_POOL_MAXSIZE
+from azure_databricks_api.__retry import RetryPolicy
+
+
+class AsyncAzureDatabricksRESTClient(object):
+    """
+    asyncio version of AzureDatabricksRESTClient.
+
+    Every API method is a coroutine, and all calls share one aiohttp connection pool. Requires aiohttp.
+
+    Use as an async context manager, or await close() when finished:
+
+        async with AsyncAzureDatabricksRESTClient(region=region, token=token) as client:
+            clusters = await client.clusters.list()
+    """
+
+    def __init__(self, region=None, token=None, pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_maxsize_per_host=0,
+                 keepalive_timeout=15, retry_policy=None, rate_limiter=None,
+                 cluster_index_ttl=60, metadata_cache=None, host=None,
+                 observers=None):
+        """
+        Parameters
+        ----------
+        region : str
+            The Azure region the workspace is located in. Not needed if host is given.
+
+        token : str
+            A Databricks Personal Access Token
+
+        pool_maxsize : int, optional, default=10
+            The maximum number of simultaneous connections. 0 means unlimited.
+
+        pool_maxsize_per_host : int, optional, default=0
+            The maximum number of simultaneous connections to the workspace. 0 means unlimited.
+
+        keepalive_timeout : float, optional, default=15
+            Seconds an idle connection is kept open for reuse
+
+        retry_policy : RetryPolicy, optional
+            When and how long to wait before retrying throttled or failed calls. Defaults to RetryPolicy().
+
+        rate_limiter : RateLimiter, optional
+            Limits the rate of calls made through this client. Defaults to no limit.
+
+        cluster_index_ttl : float, optional, default=60
+            Seconds the cluster name to cluster ID index is reused for, by calls that take a cluster_name.
+            0 lists the clusters on every such call.
+
+        metadata_cache : MetadataCache, optional
+            Caches the available Spark versions and node types. Defaults to an in-memory MetadataCache that
+            keeps them for an hour. Pass MetadataCache(path=...) to reuse them between process runs.
+
+        host : str, optional
+            The base URL of the workspace, e.g. 'http://localhost:8080' for a local test server. Defaults to
+            https://{region}.azuredatabricks.net
+
+        observers : list of RequestObserver, optional
+            Called with the RequestMetrics - endpoint, status, bytes, timings and retries - of every request made
+            through this client. Pass a MetricsAggregator to collect latency histograms per endpoint. DNS and
+            connect times are only measured if observers are given here - observers added to client.observers
+            later get 0 for them.
+        """
+        if token is None:
+            raise ValueError("A token must be given")
+
+        self._region = region
+        self._token = token
+        self._host = workspace_host(region=region, host=host)
+        self.api_version = '2.0'
+
+        # One connection pool is shared by all of the API objects below
+        self._session = AsyncConnectionPool(limit=pool_maxsize, limit_per_host=pool_maxsize_per_host,
+                                            keepalive_timeout=keepalive_timeout, timed_connections=bool(observers))
+
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.observers = list(observers or [])
+
+        parameters = {'host': self._host, 'api_version': self.api_version, 'token': self._token,
+                      'session': self._session, 'retry_policy': self.retry_policy,
+                      'rate_limiter': self.rate_limiter, 'observers': self.observers}
+
+        self.metadata_cache = metadata_cache if metadata_cache is not None else MetadataCache()
+        self.clusters = AsyncClusterAPI(cluster_index_ttl=cluster_index_ttl, metadata_cache=self.metadata_cache,
+                                        **parameters)
+        self.groups = AsyncGroupsAPI(**parameters)
+        self.tokens = AsyncTokensAPI(**parameters)
+        self.workspace = AsyncWorkspaceAPI(**parameters)
+        self.dbfs = AsyncDbfsAPI(**parameters)
+        self.libraries = AsyncLibrariesAPI(**parameters)
+        self.jobs = AsyncJobsAPI(**parameters)
+
+    async def close(self):
+        """Close all pooled connections to the workspace"""
+        await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -4,8 +4,77 @@
 # https://opensource.org/licenses/MIT
 
 import json
+import time
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from azure_databricks_api.__metrics import TimedHTTPAdapter, RequestMetrics, body_size, notify_observers, \
+    start_connection_timing
+from azure_databricks_api.__retry import RetryPolicy
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+def workspace_host(region=None, host=None):
+    """
+    The base URL of a workspace - the given host, or that of the Azure Databricks workspace in region
+
+    Raises
+    ------
+    ValueError
+        If neither region nor host is given
+    """
+    if host is not None:
+        return host.rstrip('/')
+
+    if region is None:
+        raise ValueError("Either region or host must be given")
+
+    return 'https://{region}.azuredatabricks.net'.format(region=region)
+
+
+def create_session(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                   pool_block=False, keep_alive=True, timed_connections=False):
+    """
+    Create a requests.Session backed by a pool of keep-alive connections
+
+    Parameters
+    ----------
+    pool_connections : int, optional, default=10
+        The number of per-host connection pools to cache
+
+    pool_maxsize : int, optional, default=10
+        The maximum number of connections kept open to a single host
+
+    pool_block : bool, optional, default=False
+        If True, requests wait for a free connection once pool_maxsize connections to a host are in use,
+        strictly limiting the number of connections per host. If False, extra connections are opened
+        but are not returned to the pool.
+
+    keep_alive : bool, optional, default=True
+        If False, every request asks the server to close the connection after the response
+
+    timed_connections : bool, optional, default=False
+        Record the DNS and connect times of new connections, for request observers - see TimedHTTPAdapter
+
+    Returns
+    -------
+    requests.Session
+    """
+    session = requests.Session()
+
+    # The timed adapter's connections record their DNS and connect times, for the request observers
+    adapter_class = TimedHTTPAdapter if timed_connections else HTTPAdapter
+    adapter = adapter_class(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+
+    return session
 
 
 class RESTBase(object):
@@ -17,41 +86,127 @@ class RESTBase(object):
         self._uri = "{host}/api/{api_version}/".format(host=self._host, api_version=self._api_version)
         self._token = kwargs.pop('token')
         self._headers = {'Authorization': 'Bearer {0}'.format(self._token)}
+
+        # The session is normally shared by every API object of a client, so connections are reused across calls
+        self._session = kwargs.pop('session', None) or create_session()
+        self._retry_policy = kwargs.pop('retry_policy', None) or RetryPolicy()
+        self._rate_limiter = kwargs.pop('rate_limiter', None)
+        # Shared with the client, so observers added to client.observers later see every API object's requests
+        self._observers = kwargs.pop('observers', None)
+
         self._rest_call = {'GET': self.__get,
                           'POST': self.__post}
 
-    def __get(self, api_endpoint, data=None):
+    def _build_uri(self, api_endpoint):
         """
-        Send HTTP GET request to REST API endpoint with data as query string
+        Build the full URI of a REST API endpoint
 
         :param api_endpoint: string : The api endpoint to be called - after version number
-        :param data: dict : Data to be passed as query string in url
-        :return: Partial function requests.get with URL populated
+        :return: string : The URI of the endpoint
         """
-
         # Check that API_endpoint does not start with a '/', if so, remove it.
         # Because self.uri already contains the necessary '/'
         if api_endpoint.startswith('/'):
             api_endpoint = api_endpoint[1:]
 
-        uri = self._uri + api_endpoint
-        return requests.get(url=uri, headers=self._headers, json=data)
+        return self._uri + api_endpoint
+
+    def __get(self, api_endpoint, data=None, retry=True, stream=False):
+        """
+        Send HTTP GET request to REST API endpoint with data as query string
 
-    def __post(self, api_endpoint, data):
+        :param api_endpoint: string : The api endpoint to be called - after version number
+        :param data: dict : Data to be passed as query string in url
+        :param retry: bool : Retry the call if it is throttled or fails with a 5xx error
+        :param stream: bool : Don't read the body - the caller reads it with iter_content() and must close the
+                              response
+        :return: requests.Response
+        """
+        return self.__send('GET', api_endpoint, retry=retry, json=data, stream=stream)
+
+    def __post(self, api_endpoint, data, retry=False):
         """
         Send HTTP POST request to REST API endpoint with data as JSON object
 
-        :param api_endpoint:
-        :param data:
-        :return:
+        :param api_endpoint: string : The api endpoint to be called - after version number
+        :param data: dict, or a file-like object that reads as an already encoded JSON body
+        :param retry: bool : Set to True if the call is idempotent, so it can be retried if it is throttled
+                             or fails with a 5xx error
+        :return: requests.Response
         """
 
-        # Check that API_endpoint does not start with a '/', if so, remove it.
-        # Because self.uri already contains the necessary '/'
-        if api_endpoint.startswith('/'):
-            api_endpoint = api_endpoint[1:]
+        # File-like bodies (e.g. Base64JSONBody) are streamed as they are read
+        data_json = data if hasattr(data, 'read') else json.dumps(data, ensure_ascii=False)
+
+        return self.__send('POST', api_endpoint, retry=retry, data=data_json)
+
+    def __send(self, method, api_endpoint, retry, **request_kwargs):
+        """Send a request, retrying it according to the retry policy, and waiting for the rate limiter"""
+        uri = self._build_uri(api_endpoint)
+        retryable = self._retry_policy.is_retryable(method, api_endpoint, retry)
+
+        attempt = 1
+        while True:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(api_endpoint)
+
+            timings = start_connection_timing() if self._observers else None
+            started = time.perf_counter()
+            try:
+                resp = self._session.request(method, uri, headers=self._headers, **request_kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exception:
+                if timings is not None:
+                    self.__observe(method, api_endpoint, attempt, started, timings, request_kwargs, error=exception)
+                if not retryable:
+                    raise
+                if not self._retry_policy.should_retry(attempt):
+                    self._retry_policy.record_exhausted()
+                    raise
+                delay = self._retry_policy.get_delay(attempt)
+            else:
+                if timings is not None:
+                    self.__observe(method, api_endpoint, attempt, started, timings, request_kwargs, resp=resp)
+                if not (retryable and resp.status_code in self._retry_policy.retry_statuses):
+                    return resp
+                if not self._retry_policy.should_retry(attempt, resp.status_code):
+                    self._retry_policy.record_exhausted()
+                    return resp
+                delay = self._retry_policy.get_delay(attempt, resp.headers.get('Retry-After'))
+                if resp.status_code == 429 and self._rate_limiter is not None:
+                    self._rate_limiter.throttled(api_endpoint, delay)
+
+                # Release the connection of a streamed response that won't be read
+                resp.close()
+
+            self._retry_policy.record_retry(delay)
+            time.sleep(delay)
+
+            # Streamed bodies have to be rewound before they can be sent again
+            body = request_kwargs.get('data')
+            if hasattr(body, 'seek'):
+                body.seek(0)
+
+            attempt += 1
+
+    def __observe(self, method, api_endpoint, attempt, started, timings, request_kwargs, resp=None, error=None):
+        """Report the metrics of one request to the observers"""
+        total_seconds = time.perf_counter() - started
 
-        data_json = json.dumps(data, ensure_ascii=False)
+        if resp is not None:
+            bytes_sent = body_size(resp.request.body)
+            # The body of a streamed response hasn't been read yet, so only its declared length is known
+            bytes_received = (int(resp.headers.get('Content-Length', 0)) if request_kwargs.get('stream')
+                              else len(resp.content))
+            ttfb_seconds = resp.elapsed.total_seconds()
+        else:
+            bytes_sent = body_size(request_kwargs.get('data'))
+            bytes_received = 0
+            ttfb_seconds = total_seconds
 
-        uri = self._uri + api_endpoint
-        return requests.post(url=uri, headers=self._headers, data=data_json)
\ No newline at end of file
+        notify_observers(self._observers, RequestMetrics(method=method, endpoint=api_endpoint.lstrip('/'),
+                                                         status_code=resp.status_code if resp is not None else None,
+                                                         error=error, retries=attempt - 1, bytes_sent=bytes_sent,
+                                                         bytes_received=bytes_received,
+                                                         dns_seconds=timings.dns_seconds,
+                                                         connect_seconds=timings.connect_seconds,
+                                                         ttfb_seconds=ttfb_seconds, total_seconds=total_seconds))
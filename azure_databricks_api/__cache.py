@@ -0,0 +1,96 @@
+# Copyright (c) 2018 Microsoft
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_METADATA_TTL = 3600
+
+
+class MetadataCache(object):
+    """
+    A thread-safe cache of catalog API results that rarely change, such as the available Spark versions and
+    node types, so that they aren't requested again on every call that needs them.
+
+    Entries expire ttl seconds after they were cached. If a path is given, the cache is loaded from and saved
+    to that JSON file, so it is reused between process runs. Entries are keyed by workspace, so one file can
+    be shared by clients of different workspaces.
+
+    Parameters
+    ----------
+    ttl : float, optional, default=3600
+        Seconds an entry is reused for. 0 disables the cache.
+
+    path : str, optional
+        A JSON file to persist the cache in
+    """
+
+    def __init__(self, ttl=DEFAULT_METADATA_TTL, path=None):
+        self.ttl = ttl
+        self.path = os.path.expanduser(path) if path else None
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        if self.path and os.path.exists(self.path):
+            self.__load()
+
+    def __load(self):
+        try:
+            with open(self.path, 'r') as cache_file:
+                self._entries = json.load(cache_file)
+        except (OSError, ValueError):
+            # A missing or corrupt cache file is treated as an empty cache
+            self._entries = {}
+
+    def __save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file first, so other processes never read a partly written cache
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as cache_file:
+                json.dump(self._entries, cache_file)
+            os.replace(temp_path, self.path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def key(host, api_endpoint):
+        """The cache key of an API endpoint of a workspace"""
+        return '{0}/{1}'.format(host.rstrip('/'), api_endpoint.lstrip('/'))
+
+    def get(self, key):
+        """Returns the cached value for key, or None if there is none or it has expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or time.time() >= entry['expires']:
+                return None
+
+            return entry['value']
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = {'expires': time.time() + self.ttl, 'value': value}
+
+            if self.path:
+                self.__save()
+
+    def clear(self):
+        """Discard every entry, so the next call to each catalog endpoint requests it again"""
+        with self._lock:
+            self._entries = {}
+
+            if self.path:
+                self.__save()
@@ -4,19 +4,288 @@
 # https://opensource.org/licenses/MIT
 
 import collections
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 
 from azure_databricks_api.__base import RESTBase
+from azure_databricks_api.__cache import MetadataCache
 from azure_databricks_api.__utils import dict_update, choose_exception
-from azure_databricks_api.exceptions import ResourceDoesNotExist, APIError, AuthorizationError, ERROR_CODES
+from azure_databricks_api.exceptions import ResourceDoesNotExist, APIError, AuthorizationError, ERROR_CODES, \
+    InvalidParameterValue, InvalidState
+
+ClusterInfo = collections.namedtuple('ClusterInfo', ['id', 'state', 'start_time'])
+
+# Seconds between clusters/list calls while waiting for cluster states - see ClusterAPI.wait_for_states
+MIN_STATE_POLL_INTERVAL = 2.0
+MAX_STATE_POLL_INTERVAL = 30.0
+STATE_POLL_BACKOFF = 1.5
+
+
+def _validate_cluster_types(spark_version, node_type_id, driver_node_type_id, spark_versions, available_node_types):
+    """
+    Raise a ValueError if the Spark version or node types requested for a cluster aren't available.
+
+    Pass spark_versions=None to skip checking the Spark version (e.g. for custom Spark versions)
+    """
+    if spark_versions is not None and spark_version not in spark_versions:
+        raise ValueError("'{0}' is not a recognized spark_version. Please see the ".format(spark_version) +
+                         "spark_versions() method for available Spark Versions. ")
+
+    if node_type_id not in available_node_types or \
+            (driver_node_type_id and driver_node_type_id not in available_node_types):
+        raise ValueError("'{0}' is not an available VM type. Please see the ".format(node_type_id) +
+                         "list_available_node_type_names() method for available node types")
+
+
+def _build_cluster_config(cluster_name, num_workers, spark_version, node_type_id, python_version,
+                          autotermination_minutes, **kwargs):
+    """Build the JSON payload sent to clusters/create"""
+    cluster_config = {'cluster_name': cluster_name,
+                      'spark_version': spark_version,
+                      'node_type_id': node_type_id}
+
+    # If python_version is set to Python 3, then overwrite the PYSPARK_PYTHON environment variable
+    if python_version == 3:
+        if kwargs.get('spark_env_vars'):
+            kwargs['spark_env_vars']['PYSPARK_PYTHON'] = '/databricks/python3/bin/python3'
+        else:
+            kwargs['spark_env_vars'] = {'PYSPARK_PYTHON': '/databricks/python3/bin/python3'}
+
+    # Set default value of autotermination minutes - this defaults to 60 minutes.
+    if autotermination_minutes:
+        kwargs['autotermination_minutes'] = autotermination_minutes
+
+    # Specify the size of the cluster
+    if isinstance(num_workers, dict):
+        cluster_config['autoscale'] = num_workers
+    else:
+        cluster_config['num_workers'] = int(num_workers)
+
+    # Merge kwargs and cluster_config
+    return dict_update(kwargs, cluster_config)
+
+
+def _preferred_cluster_id(found_clusters):
+    """Choose between clusters with the same name - prefers RUNNING clusters, then the oldest start_time"""
+    found_clusters = sorted(found_clusters, key=lambda cluster: cluster.start_time)
+    running_clusters = list(filter(lambda cluster: cluster.state == 'RUNNING', found_clusters))
+
+    if len(running_clusters) >= 1:
+        return running_clusters[0].id
+    else:
+        return found_clusters[0].id
+
+
+def _select_cluster_id(clusters, cluster_name):
+    """
+    Choose the cluster ID for cluster_name from the output of clusters/list.
+
+    Prefers RUNNING clusters, then the cluster with the oldest start_time.
+    """
+    found_clusters = [
+        ClusterInfo(id=cluster['cluster_id'], state=cluster['state'], start_time=cluster['start_time'])
+        for cluster in clusters if cluster['cluster_name'] == cluster_name]
+
+    if len(found_clusters) == 0:
+        raise ResourceDoesNotExist("No cluster named '{0}' was found".format(cluster_name))
+
+    return _preferred_cluster_id(found_clusters)
+
+
+def _is_missing_cluster(resp):
+    """Whether a failed response to a cluster_id-only call means the cluster no longer exists"""
+    return resp.status_code != 200 and isinstance(choose_exception(resp), (InvalidParameterValue,
+                                                                           ResourceDoesNotExist))
+
+
+class _ClusterNameIndex(object):
+    """
+    A thread-safe index of cluster name to cluster ID, built from the output of clusters/list
+
+    The index expires ttl seconds after it was built. get() returns None for names that aren't in the index
+    or once it has expired, and the caller then refreshes the index with a new call to clusters/list.
+    A ttl of 0 disables the index.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._ids = {}
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, clusters):
+        """Rebuild the index from the output of clusters/list"""
+        found_clusters = collections.defaultdict(list)
+        for cluster in clusters:
+            found_clusters[cluster['cluster_name']].append(
+                ClusterInfo(id=cluster['cluster_id'], state=cluster['state'], start_time=cluster['start_time']))
+
+        ids = {name: _preferred_cluster_id(named_clusters) for name, named_clusters in found_clusters.items()}
+
+        with self._lock:
+            self._ids = ids
+            self._expires = time.monotonic() + self.ttl
+
+    def get(self, cluster_name):
+        with self._lock:
+            if time.monotonic() >= self._expires:
+                return None
+            return self._ids.get(cluster_name)
+
+    def invalidate(self):
+        with self._lock:
+            self._ids = {}
+            self._expires = 0.0
+
+
+def _available_node_type_names(node_types):
+    """Filter the output of clusters/list-node-types down to the node_type_ids usable in the subscription"""
+    return [node['node_type_id'] for node in node_types if
+            node['node_info'].get('status') is None and node['node_info'].get('available_core_quota', 0) >= node[
+                'num_cores']]
+
+
+class _StateWaiters(object):
+    """
+    The clusters being waited for by wait_for_states, advanced together by the output of one clusters/list call
+
+    Each waiter has a future, resolved with the cluster's details when it reaches one of its target states.
+    A waiter fails with InvalidState if its cluster goes into ERROR, or terminates after being seen in another
+    state, with ResourceDoesNotExist if the cluster isn't listed, and with timeout_error at its deadline.
+
+    Also tracks whether a poller is running, so that exactly one poller runs while there are waiters.
+    """
+
+    def __init__(self, timeout_error):
+        self._timeout_error = timeout_error
+        self._waiters = []
+        self._states = {}
+        self._polling = False
+        self._lock = threading.Lock()
+
+    def add(self, cluster_id, target_states, timeout, future):
+        """
+        Register a waiter
+
+        Returns
+        -------
+        bool - True if a poller must be started for it
+        """
+        if isinstance(target_states, str):
+            target_states = (target_states,)
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        with self._lock:
+            self._waiters.append((cluster_id, frozenset(target_states), deadline, future, set()))
+
+            start_poller = not self._polling
+            self._polling = True
+
+        return start_poller
+
+    def advance(self, clusters):
+        """
+        Resolve the waiters whose clusters have reached their target states, failed, or timed out
+
+        Returns
+        -------
+        (changed, active) - whether any cluster being waited for changed state, and whether the poller should
+        keep running. Once active is False, the poller must exit.
+        """
+        clusters = {cluster['cluster_id']: cluster for cluster in clusters}
+        now = time.monotonic()
+
+        with self._lock:
+            changed = False
+            pending = []
+
+            for waiter in self._waiters:
+                cluster_id, target_states, deadline, future, seen_states = waiter
+                cluster = clusters.get(cluster_id)
+
+                if future.done():
+                    # Cancelled by the caller
+                    continue
+
+                if cluster is None:
+                    future.set_exception(ResourceDoesNotExist("No cluster with id '{0}' was found".format(cluster_id)))
+                    continue
+
+                state = cluster['state']
+                if self._states.get(cluster_id) != state:
+                    self._states[cluster_id] = state
+                    changed = True
+
+                if state in target_states:
+                    future.set_result(cluster)
+                elif state == 'ERROR' or (state == 'TERMINATED' and seen_states - {'TERMINATED'}):
+                    future.set_exception(InvalidState("Cluster '{0}' is {1}: {2}".format(
+                        cluster_id, state, cluster.get('state_message', ''))))
+                elif deadline is not None and now >= deadline:
+                    future.set_exception(self._timeout_error("Cluster '{0}' is still {1}".format(cluster_id, state)))
+                else:
+                    seen_states.add(state)
+                    pending.append(waiter)
+
+            self._waiters = pending
+            self._polling = bool(pending)
+
+            if not pending:
+                self._states = {}
+
+            return changed, self._polling
+
+    def fail_all(self, exception):
+        """Fail every waiter, e.g. when clusters/list fails. The poller must exit."""
+        with self._lock:
+            for _, _, _, future, _ in self._waiters:
+                if not future.done():
+                    future.set_exception(exception)
+
+            self._waiters = []
+            self._states = {}
+            self._polling = False
+
+    def next_deadline(self):
+        """Seconds until the earliest waiter times out, or None"""
+        with self._lock:
+            deadlines = [deadline for _, _, deadline, _, _ in self._waiters if deadline is not None]
+
+        return max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+
+
+def _next_poll_interval(interval, changed, min_interval, max_interval):
+    """Poll again quickly after a state change, and back off while states stay the same"""
+    return min_interval if changed else min(max_interval, interval * STATE_POLL_BACKOFF)
 
 
 class ClusterAPI(RESTBase):
 
     def __init__(self, **kwargs):
+        # Name-based calls look cluster IDs up in an index built from one clusters/list call
+        self._cluster_index = _ClusterNameIndex(ttl=kwargs.pop('cluster_index_ttl', 60))
+        # Spark versions and node types are cached, as create() needs them on every call
+        self._metadata_cache = kwargs.pop('metadata_cache', None) or MetadataCache()
+
+        self.min_poll_interval = MIN_STATE_POLL_INTERVAL
+        self.max_poll_interval = MAX_STATE_POLL_INTERVAL
+        self._state_waiters = _StateWaiters(timeout_error=FutureTimeoutError)
+        self._state_poll_wakeup = threading.Event()
+
         super().__init__(**kwargs)
 
+    def invalidate_cluster_index(self):
+        """
+        Discard the cluster name to cluster ID index, so the next name-based call lists the clusters again
+
+        Call this after clusters have been created, deleted or renamed outside of this client.
+        """
+        self._cluster_index.invalidate()
+
     def create(self, cluster_name, num_workers, spark_version, node_type_id,
-               python_version=3, autotermination_minutes=60, custom_spark_version=False, **kwargs):
+               python_version=3, autotermination_minutes=60, custom_spark_version=False, validate=True, **kwargs):
         """
         Creates a new cluster in the given
         Parameters
@@ -42,6 +311,10 @@ class ClusterAPI(RESTBase):
         custom_spark_version : bool, optional, default=False
             If a custom Spark version is passed - then this prevents error checking for supported Spark versions
 
+        validate : bool, optional, default=True
+            Check that spark_version and the node types are available before creating the cluster. Set to False
+            to skip the checks - and the catalog calls they need - when the values are known to be valid.
+
         kwargs : optional
             Other keyword arguments are passed to the API in the JSON payload. See supported arguments here:
             https://docs.azuredatabricks.net/api/latest/clusters.html#create
@@ -53,46 +326,23 @@ class ClusterAPI(RESTBase):
         METHOD = 'POST'
         API_PATH = 'clusters/create'
 
-        # Check if spark_version supported:
-        if not spark_version in self.spark_versions() and not custom_spark_version:
-            raise ValueError("'{0}' is not a recognized spark_version. Please see the ".format(spark_version) +
-                             "spark_versions() method for available Spark Versions. ")
-
-        available_vms = self.list_available_node_type_names()
-        driver_vm_id = kwargs.get('driver_node_type_id')
-
-        # Check if node_type available supported:
-        if not node_type_id in available_vms or (driver_vm_id and driver_vm_id not in available_vms):
-            raise ValueError("'{0}' is not an available VM type. Please see the ".format(node_type_id) +
-                             "list_available_node_type_names() method for available node types")
-
-        cluster_config = {'cluster_name': cluster_name,
-                          'spark_version': spark_version,
-                          'node_type_id': node_type_id}
-
-        # If python_version is set to Python 3, then overwrite the PYSPARK_PYTHON environment variable
-        if python_version == 3:
-            if kwargs.get('spark_env_vars'):
-                kwargs['spark_env_vars']['PYSPARK_PYTHON'] = '/databricks/python3/bin/python3'
-            else:
-                kwargs['spark_env_vars'] = {'PYSPARK_PYTHON': '/databricks/python3/bin/python3'}
-
-        # Set default value of autotermination minutes - this defaults to 60 minutes.
-        if autotermination_minutes:
-            kwargs['autotermination_minutes'] = autotermination_minutes
-
-        # Specify the size of the cluster
-        if isinstance(num_workers, dict):
-            cluster_config['autoscale'] = num_workers
-        else:
-            cluster_config['num_workers'] = int(num_workers)
+        # Check if spark_version and node types are supported:
+        if validate:
+            _validate_cluster_types(spark_version=spark_version,
+                                    node_type_id=node_type_id,
+                                    driver_node_type_id=kwargs.get('driver_node_type_id'),
+                                    spark_versions=None if custom_spark_version else self.spark_versions(),
+                                    available_node_types=self.list_available_node_type_names())
 
-        # Merge kwargs and cluster_config
-        cluster_config = dict_update(kwargs, cluster_config)
+        cluster_config = _build_cluster_config(cluster_name=cluster_name, num_workers=num_workers,
+                                               spark_version=spark_version, node_type_id=node_type_id,
+                                               python_version=python_version,
+                                               autotermination_minutes=autotermination_minutes, **kwargs)
 
         resp = self._rest_call[METHOD](API_PATH, data=cluster_config)
 
         if resp.status_code == 200:
+            self._cluster_index.invalidate()
             return resp.json()['cluster_id']
         else:
             exception = choose_exception(resp)
@@ -170,7 +420,7 @@ class ClusterAPI(RESTBase):
         METHOD = 'POST'
         raise NotImplementedError
 
-    def __send_cluster_id_to_endpoint(self, method, api_path, cluster_name, cluster_id):
+    def __send_cluster_id_to_endpoint(self, method, api_path, cluster_name, cluster_id, idempotent=False):
         """
         Private method to post cluster id only to a given endpoint
 
@@ -187,6 +437,9 @@ class ClusterAPI(RESTBase):
         cluster_id : str, optional
             The id of the cluster to be terminated.
 
+        idempotent : bool, optional
+            Set to True if repeating a POST request has no further effect, so it can be retried
+
         Returns
         -------
             The cluster ID of a stopped cluster
@@ -205,15 +458,28 @@ class ClusterAPI(RESTBase):
         if not (cluster_name or cluster_id):
             raise ValueError("Either cluster_id or cluster_name must be specified")
 
+        indexed_id = None
         if cluster_name and not cluster_id:
+            indexed_id = self._cluster_index.get(cluster_name)
             try:
-                cluster_id = self.get_cluster_id(cluster_name)
+                cluster_id = indexed_id or self.get_cluster_id(cluster_name)
             except ResourceDoesNotExist:
                 raise ResourceDoesNotExist("No cluster named '{0}' was found".format(cluster_name))
 
         data = {"cluster_id": cluster_id}
 
-        resp = self._rest_call[method](api_path, data=data)
+        # GET requests are retried by default
+        retry = {'retry': True} if idempotent else {}
+        resp = self._rest_call[method](api_path, data=data, **retry)
+
+        # A cluster ID from the index may have been deleted since - if so, list the clusters again
+        if indexed_id and _is_missing_cluster(resp):
+            self._cluster_index.invalidate()
+            cluster_id = self.get_cluster_id(cluster_name)
+
+            if cluster_id != indexed_id:
+                data = {"cluster_id": cluster_id}
+                resp = self._rest_call[method](api_path, data=data, **retry)
 
         if resp.status_code == 200 and method == 'GET':
             return resp.json()
@@ -288,10 +554,12 @@ class ClusterAPI(RESTBase):
         """
         METHOD = 'POST'
         API_PATH = 'clusters/permanent-delete'
-        return self.__send_cluster_id_to_endpoint(method=METHOD,
-                                                  api_path=API_PATH,
-                                                  cluster_name=cluster_name,
-                                                  cluster_id=cluster_id)
+        cluster_id = self.__send_cluster_id_to_endpoint(method=METHOD,
+                                                        api_path=API_PATH,
+                                                        cluster_name=cluster_name,
+                                                        cluster_id=cluster_id)
+        self._cluster_index.invalidate()
+        return cluster_id
 
     def get_cluster_id(self, cluster_name):
         """
@@ -307,30 +575,20 @@ class ClusterAPI(RESTBase):
             Sorts clusters by last_activity_time then returns ID of the first cluster found with matching cluster_name
             where state is RUNNING. If no clusters with that name are running, returns the first cluster
 
+            The ID is taken from an index of the cluster list, which is rebuilt when it is older than
+            cluster_index_ttl seconds or doesn't contain cluster_name.
+
         Raises
         ------
         ResourceDoesNotExist
             When no matching cluster name and cluster state are found
         """
-        ClusterInfo = collections.namedtuple('ClusterInfo', ['id', 'state', 'start_time'])
-
-        # Get all clusters
-        clusters = self.list()
+        cluster_id = self._cluster_index.get(cluster_name)
+        if cluster_id is None:
+            # list() rebuilds the index
+            cluster_id = _select_cluster_id(self.list(), cluster_name)
 
-        found_clusters = [
-            ClusterInfo(id=cluster['cluster_id'], state=cluster['state'], start_time=cluster['start_time'])
-            for cluster in clusters if cluster['cluster_name'] == cluster_name]
-
-        if len(found_clusters) == 0:
-            raise ResourceDoesNotExist("No cluster named '{0}' was found".format(cluster_name))
-
-        found_clusters = sorted(found_clusters, key=lambda cluster: cluster.start_time)
-        running_clusters = list(filter(lambda cluster: cluster.state == 'RUNNING', found_clusters))
-
-        if len(running_clusters) >= 1:
-            return running_clusters[0].id
-        else:
-            return found_clusters[0].id
+        return cluster_id
 
     def get(self, cluster_name=None, cluster_id=None):
         """
@@ -394,7 +652,8 @@ class ClusterAPI(RESTBase):
         return self.__send_cluster_id_to_endpoint(method=METHOD,
                                                   api_path=API_PATH,
                                                   cluster_name=cluster_name,
-                                                  cluster_id=cluster_id)
+                                                  cluster_id=cluster_id,
+                                                  idempotent=True)
 
     def unpin(self, cluster_name=None, cluster_id=None):
         """
@@ -426,7 +685,8 @@ class ClusterAPI(RESTBase):
         return self.__send_cluster_id_to_endpoint(method=METHOD,
                                                   api_path=API_PATH,
                                                   cluster_name=cluster_name,
-                                                  cluster_id=cluster_id)
+                                                  cluster_id=cluster_id,
+                                                  idempotent=True)
 
     def list(self):
         METHOD = 'GET'
@@ -435,7 +695,9 @@ class ClusterAPI(RESTBase):
         resp = self._rest_call[METHOD](API_PATH)
 
         if resp.status_code == 200:
-            return resp.json().get('clusters', [])
+            clusters = resp.json().get('clusters', [])
+            self._cluster_index.update(clusters)
+            return clusters
 
         else:
             exception = choose_exception(resp)
@@ -448,15 +710,24 @@ class ClusterAPI(RESTBase):
 
         Not all node types will be available for the given subscription.
 
+        The result is cached by the client's MetadataCache.
+
         :return: List object with information (dict) of all possible node
         """
         METHOD = 'GET'
         API_PATH = 'clusters/list-node-types'
 
+        cache_key = MetadataCache.key(self._host, API_PATH)
+        node_types = self._metadata_cache.get(cache_key)
+        if node_types is not None:
+            return node_types
+
         resp = self._rest_call[METHOD](API_PATH)
 
         if resp.status_code == 200:
-            return resp.json()['node_types']
+            node_types = resp.json()['node_types']
+            self._metadata_cache.set(cache_key, node_types)
+            return node_types
 
         else:
             exception = choose_exception(resp)
@@ -468,24 +739,109 @@ class ClusterAPI(RESTBase):
         Filter out
         :return:
         """
-        nodes = self.list_node_types()
-        return [node['node_type_id'] for node in nodes if
-                node['node_info'].get('status') is None and node['node_info'].get('available_core_quota', 0) >= node[
-                    'num_cores']]
+        return _available_node_type_names(self.list_node_types())
 
     def spark_versions(self):
+        """
+        Get the available Spark versions, as a dict of version key to display name
+
+        The result is cached by the client's MetadataCache.
+        """
         METHOD = 'GET'
         API_PATH = 'clusters/spark-versions'
 
+        cache_key = MetadataCache.key(self._host, API_PATH)
+        spark_versions = self._metadata_cache.get(cache_key)
+        if spark_versions is not None:
+            return spark_versions
+
         resp = self._rest_call[METHOD](API_PATH)
         if resp.status_code == 200:
-            return {item['key']: item['name'] for item in resp.json()['versions']}
+            spark_versions = {item['key']: item['name'] for item in resp.json()['versions']}
+            self._metadata_cache.set(cache_key, spark_versions)
+            return spark_versions
 
         else:
             exception = choose_exception(resp)
             raise exception
 
 
+    def wait_for_states(self, targets, timeout=None, callback=None):
+        """
+        Wait for clusters to reach target states, without blocking
+
+        All of the clusters being waited for - by this and any other call to wait_for_states - are polled
+        together with one clusters/list call per interval. The interval adapts: it drops to min_poll_interval
+        after any of the clusters changes state, and grows by half each time nothing changes, up to
+        max_poll_interval.
+
+        Parameters
+        ----------
+        targets : dict
+            Maps cluster IDs to the state, or a list of states, to wait for - e.g. {cluster_id: 'RUNNING'}
+
+        timeout : float, optional
+            Seconds after which a cluster that hasn't reached its target state fails with a TimeoutError.
+            By default, wait indefinitely.
+
+        callback : callable, optional
+            Called with the future of each cluster when it is resolved
+
+        Returns
+        -------
+        dict of cluster ID to concurrent.futures.Future, resolved with the cluster's details from clusters/list
+        once it reaches its target state. The future fails with:
+
+            InvalidState - if the cluster goes into the ERROR state, or terminates after it was seen in another state
+            ResourceDoesNotExist - if the cluster doesn't exist
+            concurrent.futures.TimeoutError - if the cluster hasn't reached its target state after timeout seconds
+
+        Examples
+        --------
+        >>> futures = client.clusters.wait_for_states({cluster_id: 'RUNNING' for cluster_id in cluster_ids})
+        >>> concurrent.futures.wait(futures.values())
+        """
+        futures = {}
+        start_poller = False
+
+        for cluster_id, target_states in targets.items():
+            future = Future()
+            if callback is not None:
+                future.add_done_callback(callback)
+
+            start_poller = self._state_waiters.add(cluster_id, target_states, timeout, future) or start_poller
+            futures[cluster_id] = future
+
+        if start_poller:
+            threading.Thread(target=self.__poll_states, name='cluster-state-poller', daemon=True).start()
+        else:
+            # Check the new clusters now rather than at the end of the current interval
+            self._state_poll_wakeup.set()
+
+        return futures
+
+    def __poll_states(self):
+        """Advance the state waiters until none are left"""
+        interval = self.min_poll_interval
+
+        while True:
+            self._state_poll_wakeup.clear()
+
+            try:
+                clusters = self.list()
+            except Exception as exception:
+                self._state_waiters.fail_all(exception)
+                return
+
+            changed, active = self._state_waiters.advance(clusters)
+            if not active:
+                return
+
+            interval = _next_poll_interval(interval, changed, self.min_poll_interval, self.max_poll_interval)
+
+            next_deadline = self._state_waiters.next_deadline()
+            self._state_poll_wakeup.wait(interval if next_deadline is None else min(interval, next_deadline))
+
     def events(self):
         METHOD = 'POST'
 
@@ -4,16 +4,144 @@
 # https://opensource.org/licenses/MIT
 import base64
 import os
+import posixpath
+import threading
+import time
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 
 from azure_databricks_api.__base import RESTBase
-from azure_databricks_api.__utils import file_content_to_b64, choose_exception
+from azure_databricks_api.__utils import choose_exception, minimal_directories, walk_concurrently, Base64JSONBody, \
+    file_sha256, load_manifest, remove_local_file, save_manifest, SYNC_DIRECTIONS, SyncTransfer, SyncPlan, SyncReport, \
+    delete_remote
 from azure_databricks_api.exceptions import *
 
 MB_BYTES = 1048576
 
-FileInfo = namedtuple("FileInfo", ['path', 'is_dir', 'file_size'])
+FileInfo = namedtuple("FileInfo", ['path', 'is_dir', 'file_size', 'modification_time'])
+FileInfo.__new__.__defaults__ = (None, )
 FileReadInfo = namedtuple("FileReadInfo", ['bytes_read', 'data'])
+TransferResult = namedtuple("TransferResult", ['source', 'destination', 'bytes', 'seconds', 'error'])
+TransferReport = namedtuple("TransferReport", ['results', 'total_bytes', 'seconds', 'bytes_per_second'])
+
+
+def _file_info(file):
+    """A FileInfo from a file returned by the API, ignoring any fields it doesn't have"""
+    return FileInfo(**{field: value for field, value in file.items() if field in FileInfo._fields})
+
+
+def _get_chunks(file_size, chunk_size=MB_BYTES):
+    """Yield the sizes of the blocks a file of file_size bytes is uploaded in"""
+    chunk_start = 0
+    while chunk_start + chunk_size < file_size:
+        yield chunk_size
+        chunk_start += chunk_size
+
+    final_chunk_size = file_size - chunk_start
+    yield final_chunk_size
+
+
+def _transfer_report(results, start_time):
+    """Summarize a list of TransferResults into a TransferReport"""
+    elapsed = time.time() - start_time
+    total_bytes = sum(result.bytes for result in results)
+
+    return TransferReport(results=results, total_bytes=total_bytes, seconds=elapsed,
+                          bytes_per_second=total_bytes / elapsed if elapsed > 0 else 0.0)
+
+
+def _local_files(local_dir, exclude=None):
+    """The files below a local directory, except exclude, as a dict of their '/' separated relative path to path"""
+    exclude = os.path.abspath(exclude) if exclude else None
+
+    files = {}
+    for root, dir_names, file_names in os.walk(local_dir):
+        relative_root = os.path.relpath(root, local_dir).replace(os.sep, '/')
+        for file_name in file_names:
+            file_path = os.path.join(root, file_name)
+            if os.path.abspath(file_path) != exclude:
+                files[file_name if relative_root == '.' else relative_root + '/' + file_name] = file_path
+
+    return files
+
+
+def _content_hash(entry, file_path, stat):
+    """The SHA-256 of a local file - reused from its manifest entry if its size and modification time match"""
+    if entry and entry.get('size') == stat.st_size and entry.get('local_mtime') == stat.st_mtime_ns:
+        return entry.get('hash')
+
+    return file_sha256(file_path)
+
+
+def _manifest_entry(file_path, content_hash, file):
+    """The manifest entry of a local file that is the same as the DBFS file described by the FileInfo file"""
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'local_mtime': stat.st_mtime_ns, 'hash': content_hash,
+            'modification_time': file.modification_time}
+
+
+def _file_sync_reason(stat, file, entry, content_hash, use_manifest):
+    """
+    Why a file needs to be synced - 'new' or 'changed' - or None if it is unchanged
+
+    stat is the os.stat of the local file and file the FileInfo of the DBFS file, either None if the file is
+    missing on that side. Without a manifest, files are compared by size alone.
+    """
+    if stat is None or file is None:
+        return 'new'
+
+    if stat.st_size != file.file_size:
+        return 'changed'
+
+    if use_manifest and (entry is None or entry.get('hash') != content_hash or
+                         entry.get('modification_time') != file.modification_time):
+        return 'changed'
+
+    return None
+
+
+def _check_bytes_read(chunk, dbfs_path, offset):
+    """Raise an IOError if a read returned no data - the file is shorter than when its status was read"""
+    if chunk.bytes_read == 0:
+        raise IOError("{0} ended at byte {1}, before the size it had when the download started. "
+                      "It may have been changed during the download.".format(dbfs_path, offset))
+
+
+def _raise_for_failures(report, operation, path):
+    """Raise a TransferFailed if any file of a directory transfer failed"""
+    failures = [result for result in report.results if result.error is not None]
+    if failures:
+        raise TransferFailed("{0} of {1} files failed to {2} from {3}. The first failure: {4}: {5!r}"
+                             .format(len(failures), len(report.results), operation, path, failures[0].source,
+                                     failures[0].error), report)
+
+
+class _PositionalWriter(object):
+    """Writes blocks of data at given offsets of a file, from any number of threads"""
+
+    def __init__(self, path):
+        self._fd = os.open(path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+        self._lock = threading.Lock()
+
+    def write_at(self, offset, data):
+        if hasattr(os, 'pwrite'):
+            os.pwrite(self._fd, data, offset)
+        else:  # pragma: no cover
+            # Windows has no pwrite - seeking and writing have to happen together
+            with self._lock:
+                os.lseek(self._fd, offset, os.SEEK_SET)
+                os.write(self._fd, data)
+
+    def close(self):
+        os.close(self._fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
 
 class DbfsAPI(RESTBase):
@@ -233,7 +361,7 @@ class DbfsAPI(RESTBase):
         resp = self._rest_call[METHOD](API_PATH, data=data)
 
         if resp.status_code == 200:
-            return FileInfo(**resp.json())
+            return _file_info(resp.json())
         else:
             exception = choose_exception(resp)
             raise exception
@@ -251,7 +379,7 @@ class DbfsAPI(RESTBase):
 
         Returns
         -------
-        Array of FileInfo named tuples (with path, is_dir and file_size)
+        Array of FileInfo named tuples (with path, is_dir, file_size and modification_time, if the service returns it)
 
         Raises
         ------
@@ -272,7 +400,7 @@ class DbfsAPI(RESTBase):
         resp = self._rest_call[METHOD](API_PATH, data=data)
 
         if resp.status_code == 200:
-            return [FileInfo(**file) for file in resp.json().get('files')]
+            return [_file_info(file) for file in resp.json().get('files')]
         else:
             exception = choose_exception(resp)
             raise exception
@@ -308,7 +436,8 @@ class DbfsAPI(RESTBase):
 
         data = {"path": path}
 
-        resp = self._rest_call[METHOD](API_PATH, data=data)
+        # DBFS mkdirs succeeds on an existing directory, so repeating it is harmless
+        resp = self._rest_call[METHOD](API_PATH, data=data, retry=True)
 
         if resp.status_code == 200:
             return path
@@ -364,15 +493,16 @@ class DbfsAPI(RESTBase):
             raise exception
 
 
-    def __put(self, path, data, overwrite=False):
+    def __put(self, path, file_obj, length, overwrite=False):
         METHOD = 'POST'
         API_PATH = '/dbfs/put'
 
-        payload = {"path": path,
-                   "contents": data.decode('utf-8'),
-                   "overwrite": overwrite}
+        # The file is base64 encoded as the request is sent
+        payload = Base64JSONBody({"path": path, "overwrite": overwrite}, "contents", file_obj, offset=0,
+                                 length=length)
 
-        resp = self._rest_call[METHOD](API_PATH, data=payload)
+        # A repeated put without overwrite would fail on the file written by an attempt that reached the server
+        resp = self._rest_call[METHOD](API_PATH, data=payload, retry=overwrite)
 
         if resp.status_code == 200:
             return path
@@ -381,6 +511,22 @@ class DbfsAPI(RESTBase):
             exception = choose_exception(resp)
             raise exception
 
+    def __add_file_block(self, handle, file_obj, offset, length):
+        METHOD = 'POST'
+        API_PATH = '/dbfs/add-block'
+
+        # The block is base64 encoded as the request is sent
+        payload = Base64JSONBody({"handle": handle}, "data", file_obj, offset=offset, length=length)
+
+        resp = self._rest_call[METHOD](API_PATH, data=payload)
+
+        if resp.status_code == 200:
+            return handle
+
+        else:
+            exception = choose_exception(resp)
+            raise exception
+
 
     def __read(self, path, offset, length=MB_BYTES):
         METHOD = 'GET'
@@ -399,10 +545,13 @@ class DbfsAPI(RESTBase):
             raise exception
 
 
-    def download_file(self, local_path, dbfs_path, overwrite=False, chunk_size=MB_BYTES):
+    def download_file(self, local_path, dbfs_path, overwrite=False, chunk_size=MB_BYTES, workers=1, max_retries=3):
         """
         Downloads a file from DBFS and saves to a local path
 
+        With workers > 1 the file is split into ranges of chunk_size bytes, which are read concurrently and
+        written at their offsets into a preallocated local file.
+
         Parameters
         ----------
         local_path : str
@@ -413,11 +562,22 @@ class DbfsAPI(RESTBase):
             If a file exists at the destination, overwrite the file
         chunk_size : int
             The size (in bytes) to be read during each call of the API
+        workers : int
+            The number of ranges read at the same time. If dbfs_path is a directory, it is downloaded with
+            download_directory and this is the number of files downloaded at the same time
+        max_retries : int
+            When downloading with workers > 1, the number of times a range is retried after a connection error or
+            timeout. Throttled and 5xx responses are retried by the client's RetryPolicy.
 
         Returns
         -------
         local path if successful
 
+        Raises
+        ------
+        TransferFailed:
+            If dbfs_path is a directory and any of its files failed to download. The exception's report is the
+            TransferReport of download_directory.
         """
 
         if os.path.exists(local_path) and not overwrite:
@@ -426,21 +586,68 @@ class DbfsAPI(RESTBase):
         # Get the file info from the get_status endpoint
         file_info = self.get_status(dbfs_path)
 
-        if file_info.is_dir:  # pragma: no cover
-            raise NotImplementedError("Downloading an entire DBFS directory is not currently supported.")
+        if file_info.is_dir:
+            report = self.download_directory(dbfs_dir=dbfs_path, local_dir=local_path, overwrite=overwrite,
+                                             workers=workers, chunk_size=chunk_size)
+            _raise_for_failures(report, "download", dbfs_path)
+            return local_path
+
+        return self.__download(local_path, dbfs_path, file_info.file_size, chunk_size=chunk_size, workers=workers,
+                               max_retries=max_retries)
+
+    def __download(self, local_path, dbfs_path, file_size, chunk_size, workers=1, max_retries=3):
+        if workers > 1 and file_size > chunk_size:
+            return self.__download_ranges(local_path, dbfs_path, file_size, chunk_size=chunk_size,
+                                          workers=workers, max_retries=max_retries)
 
         with open(local_path, 'wb') as file_obj:
             downloaded_size = 0
 
             # Loop until we've downloaded the whole file
-            while downloaded_size < file_info.file_size:
+            while downloaded_size < file_size:
                 chunk = self.__read(path=dbfs_path, offset=downloaded_size, length=chunk_size)
+                _check_bytes_read(chunk, dbfs_path, downloaded_size)
 
                 file_obj.write(base64.b64decode(chunk.data))
                 downloaded_size += chunk.bytes_read
 
         return local_path
 
+    def __download_ranges(self, local_path, dbfs_path, file_size, chunk_size, workers, max_retries):
+        # Preallocate the local file, so each range can be written directly at its offset
+        with open(local_path, 'wb') as file_obj:
+            file_obj.truncate(file_size)
+
+        ranges = [(offset, min(chunk_size, file_size - offset)) for offset in range(0, file_size, chunk_size)]
+
+        with _PositionalWriter(local_path) as writer, ThreadPoolExecutor(max_workers=workers) as executor:
+            # Consume the results so that the first failed range raises its exception
+            list(executor.map(lambda byte_range: self.__download_range(dbfs_path, writer, *byte_range,
+                                                                       max_retries=max_retries),
+                              ranges))
+
+        return local_path
+
+    def __download_range(self, dbfs_path, writer, offset, length, max_retries):
+        end = offset + length
+        attempt = 0
+
+        while offset < end:
+            # Throttled and 5xx responses are already retried by the client's RetryPolicy. Other API errors, such
+            # as ResourceDoesNotExist, won't go away by reading the range again.
+            try:
+                chunk = self.__read(path=dbfs_path, offset=offset, length=end - offset)
+            except (requests.ConnectionError, requests.Timeout):
+                attempt += 1
+                if attempt > max_retries:
+                    raise
+                time.sleep(0.5 * attempt)
+                continue
+
+            _check_bytes_read(chunk, dbfs_path, offset)
+            writer.write_at(offset, base64.b64decode(chunk.data))
+            offset += chunk.bytes_read
+
     def upload_file_by_path(self, file_path, dbfs_path, overwrite=False, chunk_size=MB_BYTES):
         """
         Uploads a file to DBFS and from a local path
@@ -463,26 +670,308 @@ class DbfsAPI(RESTBase):
         """
         file_size = os.path.getsize(file_path)
 
-        if file_size <= MB_BYTES:
-            return self.__put(dbfs_path, file_content_to_b64(file_path), overwrite=overwrite)
-
         with open(file_path, 'rb') as file_obj:
+            if file_size <= MB_BYTES:
+                return self.__put(dbfs_path, file_obj, file_size, overwrite=overwrite)
+
             stream_handle = self.create(dbfs_path, overwrite)
 
-            for chunk in self.__get_chunks(file_size, chunk_size):
-                data = file_obj.read(chunk)
-                self.add_block(stream_handle, base64.b64encode(data))
+            offset = 0
+            for chunk in _get_chunks(file_size, chunk_size):
+                self.__add_file_block(stream_handle, file_obj, offset, chunk)
+                offset += chunk
 
             self.close(handle=stream_handle)
 
         return dbfs_path
 
-    @staticmethod
-    def __get_chunks(file_size, chunk_size=MB_BYTES):
-        chunk_start = 0
-        while chunk_start + chunk_size < file_size:
-            yield chunk_size
-            chunk_start += chunk_size
+    def download_directory(self, dbfs_dir, local_dir, overwrite=False, workers=8, chunk_size=MB_BYTES):
+        """
+        Downloads the contents of a DBFS directory, recursively, to a local directory
+
+        The DBFS tree is discovered with concurrent list calls, and files are downloaded concurrently.
+        For best performance, the client's pool_maxsize should be at least the number of workers.
+
+        Parameters
+        ----------
+        dbfs_dir : str
+            The DBFS directory to be downloaded
+        local_dir : str
+            The local directory the contents of dbfs_dir are saved into. It is created if it doesn't exist.
+        overwrite : bool
+            If a file exists at the destination, overwrite the file
+        workers : int
+            The number of list calls or files downloaded at the same time
+        chunk_size : int
+            The size (in bytes) to be read during each call of the API
+
+        Returns
+        -------
+        TransferReport named tuple with a TransferResult per file (source, destination, bytes, seconds and error -
+        the exception raised if the file failed to download, otherwise None), the total bytes downloaded, the
+        elapsed seconds and the overall bytes per second
+
+        Raises
+        ------
+        ResourceDoesNotExist:
+            If dbfs_dir does not exist
+        """
+        start_time = time.time()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            directories, files = walk_concurrently(executor, dbfs_dir, self.list, lambda file: file.is_dir)
+
+            def local_path(file):
+                relative_path = posixpath.relpath(file.path, dbfs_dir)
+                return os.path.join(local_dir, *relative_path.split('/'))
+
+            os.makedirs(local_dir, exist_ok=True)
+            for directory in directories:
+                os.makedirs(local_path(directory), exist_ok=True)
+
+            results = list(executor.map(lambda file: self.__download_one(file, local_path(file), overwrite=overwrite,
+                                                                         chunk_size=chunk_size),
+                                        files))
+
+        return _transfer_report(results, start_time)
+
+    def __download_one(self, file, local_path, overwrite, chunk_size):
+        start_time = time.time()
+        try:
+            if os.path.exists(local_path) and not overwrite:
+                raise FileExistsError("The local path {0} already exists.".format(local_path))
+
+            # The size is already known from listing the directory, so there's no need for get_status
+            self.__download(local_path, file.path, file.file_size, chunk_size=chunk_size)
+        except Exception as error:
+            return TransferResult(source=file.path, destination=local_path, bytes=0,
+                                  seconds=time.time() - start_time, error=error)
+
+        return TransferResult(source=file.path, destination=local_path, bytes=file.file_size,
+                              seconds=time.time() - start_time, error=None)
+
+    def upload_directory(self, local_dir, dbfs_dir, overwrite=False, workers=8, chunk_size=MB_BYTES):
+        """
+        Uploads the contents of a local directory, recursively, to a DBFS directory
+
+        The DBFS directories are created first - only the deepest directories of the tree are sent to mkdirs.
+        Files are then uploaded concurrently with upload_file_by_path. For best performance, the client's
+        pool_maxsize should be at least the number of workers.
+
+        Parameters
+        ----------
+        local_dir : str
+            The local directory to be uploaded
+        dbfs_dir : str
+            The DBFS directory the contents of local_dir are uploaded into
+        overwrite : bool
+            If a file exists at the destination, overwrite the file
+        workers : int
+            The number of files uploaded at the same time
+        chunk_size : int
+            The size (in bytes) of each block sent for files larger than 1 MB
+
+        Returns
+        -------
+        TransferReport named tuple with a TransferResult per file (source, destination, bytes, seconds and error -
+        the exception raised if the file failed to upload, otherwise None), the total bytes uploaded, the elapsed
+        seconds and the overall bytes per second
+
+        Raises
+        ------
+        FileNotFoundError:
+            If local_dir is not a directory
+
+        ResourceAlreadyExists:
+            If a DBFS directory can't be created because a file exists at that path
+        """
+        if not os.path.isdir(local_dir):
+            raise FileNotFoundError("The local directory {0} does not exist.".format(local_dir))
+
+        dbfs_dir = dbfs_dir.rstrip('/')
+        start_time = time.time()
+
+        directories = {dbfs_dir or '/'}
+        transfers = []
+        for root, dir_names, file_names in os.walk(local_dir):
+            relative_root = os.path.relpath(root, local_dir).replace(os.sep, '/')
+            dbfs_root = dbfs_dir if relative_root == '.' else dbfs_dir + '/' + relative_root
+
+            directories.add(dbfs_root)
+            for file_name in file_names:
+                transfers.append((os.path.join(root, file_name), dbfs_root + '/' + file_name))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(self.mkdirs, minimal_directories(directories)))
+
+            results = list(executor.map(lambda transfer: self.__upload_one(*transfer, overwrite=overwrite,
+                                                                           chunk_size=chunk_size),
+                                        transfers))
+
+        return _transfer_report(results, start_time)
+
+    def __upload_one(self, file_path, dbfs_path, overwrite, chunk_size):
+        start_time = time.time()
+        try:
+            self.upload_file_by_path(file_path=file_path, dbfs_path=dbfs_path, overwrite=overwrite,
+                                     chunk_size=chunk_size)
+        except Exception as error:
+            return TransferResult(source=file_path, destination=dbfs_path, bytes=0,
+                                  seconds=time.time() - start_time, error=error)
+
+        return TransferResult(source=file_path, destination=dbfs_path, bytes=os.path.getsize(file_path),
+                              seconds=time.time() - start_time, error=None)
+
+    def sync(self, local_dir, dbfs_dir, direction='push', delete=False, dry_run=False, workers=8,
+             chunk_size=MB_BYTES, manifest_path=None):
+        """
+        Synchronizes a local directory and a DBFS directory, recursively, transferring only new and changed files
+
+        The DBFS tree is discovered with concurrent list calls and compared with the local files by size. If a
+        manifest_path is given, the manifest also records the SHA-256 and DBFS modification time of each file
+        as of its last sync, so that a file that changed without changing size is transferred too. Local files
+        are only hashed again if their size or modification time have changed. New and changed files are then
+        transferred concurrently.
+
+        Parameters
+        ----------
+        local_dir : str
+            The local directory
+        dbfs_dir : str
+            The DBFS directory
+        direction : str, optional, default='push'
+            'push' uploads new and changed local files to DBFS; 'pull' downloads new and changed DBFS files to
+            local_dir
+        delete : bool, optional
+            Also delete the files at the destination that don't exist at the source
+        dry_run : bool, optional
+            Return the plan without transferring or deleting anything
+        workers : int, optional, default=8
+            The number of list calls, or files transferred, at the same time
+        chunk_size : int, optional
+            The size (in bytes) of each block read or written
+        manifest_path : str, optional
+            A JSON file recording the hash of each synced file. It is created if it doesn't exist, and is never
+            synced itself.
+
+        Returns
+        -------
+        SyncReport named tuple with the SyncPlan (the direction, a SyncTransfer per file to be transferred - its
+        source, destination and the reason, 'new' or 'changed' - the paths to be deleted and the number of
+        unchanged files), a TransferResult per file transferred, a DeleteResult per path deleted, the total bytes
+        transferred, the elapsed seconds and the overall bytes per second
+
+        Raises
+        ------
+        ValueError:
+            If direction is not 'push' or 'pull'
+
+        FileNotFoundError:
+            If direction is 'push' and local_dir is not a directory
 
-        final_chunk_size = file_size - chunk_start
-        yield final_chunk_size
+        ResourceDoesNotExist:
+            If direction is 'pull' and dbfs_dir does not exist
+        """
+        if direction not in SYNC_DIRECTIONS:
+            raise ValueError("direction must be one of {0}".format(', '.join(SYNC_DIRECTIONS)))
+
+        # A mistyped local_dir must not look like an empty one, or a push with delete would empty dbfs_dir
+        if direction == 'push' and not os.path.isdir(local_dir):
+            raise FileNotFoundError("The local directory {0} does not exist.".format(local_dir))
+
+        start_time = time.time()
+        dbfs_dir = dbfs_dir.rstrip('/') or '/'
+
+        manifest = load_manifest(manifest_path) if manifest_path else {}
+        # A manifest of another DBFS directory says nothing about this one
+        entries = manifest.get('files', {}) if manifest.get('dbfs_dir') == dbfs_dir else {}
+
+        local = _local_files(local_dir, exclude=manifest_path) if os.path.isdir(local_dir) else {}
+        stats = {relative_path: os.stat(file_path) for relative_path, file_path in local.items()}
+
+        def dbfs_path(relative_path):
+            return posixpath.join(dbfs_dir, relative_path)
+
+        def local_path(relative_path):
+            return os.path.join(local_dir, *relative_path.split('/'))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                directories, files = walk_concurrently(executor, dbfs_dir, self.list, lambda file: file.is_dir)
+                existing_directories = {dbfs_dir} | {directory.path for directory in directories}
+            except ResourceDoesNotExist:
+                if direction == 'pull':
+                    raise
+                files, existing_directories = [], set()
+
+            remote = {posixpath.relpath(file.path, dbfs_dir): file for file in files}
+
+            hashes = {}
+            if manifest_path:
+                hashes = dict(zip(local, executor.map(lambda relative_path: _content_hash(entries.get(relative_path),
+                                                                                          local[relative_path],
+                                                                                          stats[relative_path]),
+                                                      local)))
+
+            changes, unchanged = [], []
+            for relative_path in sorted(local if direction == 'push' else remote):
+                reason = _file_sync_reason(stats.get(relative_path), remote.get(relative_path),
+                                           entries.get(relative_path), hashes.get(relative_path), bool(manifest_path))
+                if reason:
+                    changes.append((relative_path, reason))
+                else:
+                    unchanged.append(relative_path)
+
+            if direction == 'push':
+                transfers = [SyncTransfer(local[relative_path], dbfs_path(relative_path), reason)
+                             for relative_path, reason in changes]
+                deletes = [remote[relative_path].path for relative_path in sorted(remote) if relative_path not in local]
+            else:
+                transfers = [SyncTransfer(remote[relative_path].path, local_path(relative_path), reason)
+                             for relative_path, reason in changes]
+                deletes = [local[relative_path] for relative_path in sorted(local) if relative_path not in remote]
+
+            plan = SyncPlan(direction=direction, transfers=transfers, deletes=deletes if delete else [],
+                            unchanged=len(unchanged))
+
+            if dry_run:
+                return SyncReport(plan=plan, results=[], deleted=[], total_bytes=0,
+                                  seconds=time.time() - start_time, bytes_per_second=0.0)
+
+            if direction == 'push':
+                parents = {posixpath.dirname(transfer.destination) for transfer in transfers}
+                list(executor.map(self.mkdirs, minimal_directories(parents - existing_directories)))
+
+                results = list(executor.map(lambda transfer: self.__upload_one(transfer.source, transfer.destination,
+                                                                               overwrite=True, chunk_size=chunk_size),
+                                            transfers))
+                deleted = list(executor.map(lambda path: delete_remote(self.delete, path), plan.deletes))
+            else:
+                for transfer in transfers:
+                    os.makedirs(os.path.dirname(transfer.destination), exist_ok=True)
+
+                results = list(executor.map(lambda transfer: self.__download_one(remote[transfer[0]],
+                                                                                 local_path(transfer[0]),
+                                                                                 overwrite=True, chunk_size=chunk_size),
+                                            changes))
+                deleted = [remove_local_file(path) for path in plan.deletes]
+
+            if manifest_path:
+                synced = [relative_path for (relative_path, _), result in zip(changes, results) if result.error is None]
+                if direction == 'push':
+                    # The DBFS modification time of an uploaded file is only known once it has been uploaded
+                    remote.update(zip(synced, executor.map(self.get_status, map(dbfs_path, synced))))
+                else:
+                    hashes.update(zip(synced, executor.map(lambda relative_path: file_sha256(local_path(relative_path)),
+                                                           synced)))
+
+                # Record the files that are now the same locally and on DBFS
+                save_manifest(manifest_path, {'dbfs_dir': dbfs_dir,
+                                              'files': {relative_path: _manifest_entry(local_path(relative_path),
+                                                                                       hashes[relative_path],
+                                                                                       remote[relative_path])
+                                                        for relative_path in unchanged + synced}})
+
+        report = _transfer_report(results, start_time)
+        return SyncReport(plan=plan, results=results, deleted=deleted, total_bytes=report.total_bytes,
+                          seconds=report.seconds, bytes_per_second=report.bytes_per_second)
@@ -4,3 +4,9 @@
 # https://opensource.org/licenses/MIT
 
 from azure_databricks_api.__rest_client import AzureDatabricksRESTClient
+from azure_databricks_api.__cache import MetadataCache
+from azure_databricks_api.__metrics import MetricsAggregator, RequestMetrics, RequestObserver
+from azure_databricks_api.__ratelimit import RateLimiter
+from azure_databricks_api.__retry import RetryPolicy
+
+from azure_databricks_api.__async_rest_client import AsyncAzureDatabricksRESTClient
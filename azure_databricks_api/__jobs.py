@@ -3,7 +3,276 @@
 # This software is released under the MIT License.
 # https://opensource.org/licenses/MIT
 
+import heapq
+import queue
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_for_futures
+
 from azure_databricks_api.__base import RESTBase
+from azure_databricks_api.__utils import choose_exception, dict_update
+
+# Jobs or runs fetched per page - the largest page jobs/list accepts
+DEFAULT_JOBS_PAGE_SIZE = 25
+
+# Life cycle states after which a run won't change state again
+TERMINAL_LIFE_CYCLE_STATES = ('TERMINATED', 'SKIPPED', 'INTERNAL_ERROR')
+
+# The (shortest, longest) seconds between runs/get calls for a run in each life cycle state. A run is polled at
+# the shortest interval after it changes state, backing off towards the longest while its state stays the same.
+RUN_POLL_INTERVALS = {'PENDING': (5.0, 30.0),
+                      'RUNNING': (2.0, 60.0),
+                      'TERMINATING': (1.0, 5.0)}
+DEFAULT_RUN_POLL_INTERVAL = (5.0, 60.0)
+RUN_POLL_BACKOFF = 1.5
+
+RunResult = namedtuple('RunResult', ['run_id', 'run', 'output'])
+SubmittedRunResult = namedtuple('SubmittedRunResult', ['index', 'spec', 'run_id', 'run', 'output', 'error'])
+
+
+def _life_cycle_state(run):
+    return run.get('state', {}).get('life_cycle_state')
+
+
+def _with_idempotency_token(spec):
+    """A copy of a runs/submit spec with an idempotency_token, so that submitting it may be retried"""
+    if spec.get('idempotency_token'):
+        return dict(spec)
+
+    return dict(spec, idempotency_token=uuid.uuid4().hex)
+
+
+def _next_run_poll_interval(state, previous_state, interval, poll_intervals):
+    """The seconds until a run in the given life cycle state is polled again"""
+    shortest, longest = poll_intervals.get(state, DEFAULT_RUN_POLL_INTERVAL)
+
+    if interval is None or state != previous_state:
+        return shortest
+
+    return max(shortest, min(longest, interval * RUN_POLL_BACKOFF))
+
+
+def _paginate(fetch_page, items_key, offset, limit, prefetch):
+    """
+    Lazily yield the items of an offset/limit paginated endpoint, fetching each page when it is reached
+
+    Parameters
+    ----------
+    fetch_page : callable
+        Called with (offset, limit), returns the JSON response of one page
+    items_key : str
+        The key of the items in each page, e.g. 'runs'
+    offset : int
+        The offset of the first item
+    limit : int
+        The number of items requested per page
+    prefetch : bool
+        Fetch the next page in a background thread while the items of the current page are being consumed
+    """
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    try:
+        page = fetch_page(offset, limit)
+
+        while True:
+            items = page.get(items_key, [])
+            has_more = page.get('has_more', False) and len(items) > 0
+            offset += len(items)
+
+            next_page = executor.submit(fetch_page, offset, limit) if has_more and executor else None
+
+            for item in items:
+                yield item
+
+            if not has_more:
+                return
+
+            page = next_page.result() if next_page else fetch_page(offset, limit)
+    finally:
+        if executor:
+            # Don't wait for a prefetch the caller no longer needs
+            executor.shutdown(wait=False)
+
+
+class _TrackedRun(object):
+    __slots__ = ('future', 'state', 'interval')
+
+    def __init__(self, future):
+        self.future = future
+        self.state = None
+        self.interval = None
+
+
+class RunTracker(object):
+    """
+    Tracks many job runs until they finish, with a bounded number of runs/get calls in flight
+
+    Each run is polled on its own schedule, depending on its life cycle state - see RUN_POLL_INTERVALS. A run that
+    has just changed state is polled soon after; one that has been PENDING or RUNNING for a while is polled less
+    and less often. When a run reaches a terminal state its output is fetched with runs/get-output, once, and its
+    future is resolved.
+
+    Create one with JobsAPI.run_tracker(), and close() it - or use it as a context manager - when finished.
+
+    Parameters
+    ----------
+    jobs_api : JobsAPI
+        The API object used to poll the runs
+    workers : int, optional, default=8
+        The largest number of runs/get and runs/get-output calls made at the same time
+    fetch_output : bool, optional, default=True
+        Fetch the output of each run once it has finished
+    poll_intervals : dict, optional
+        Overrides RUN_POLL_INTERVALS - maps life cycle states to (shortest, longest) seconds between polls
+    """
+
+    def __init__(self, jobs_api, workers=8, fetch_output=True, poll_intervals=None):
+        self._jobs = jobs_api
+        self.fetch_output = fetch_output
+        self.poll_intervals = dict(RUN_POLL_INTERVALS, **(poll_intervals or {}))
+
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._condition = threading.Condition()
+        self._schedule = []
+        self._runs = {}
+        # Every future handed out, including those of finished runs, which are dropped from _runs
+        self._futures = []
+        self._scheduler = None
+        self._closed = False
+
+    def track(self, run_ids, callback=None):
+        """
+        Start tracking runs
+
+        Parameters
+        ----------
+        run_ids : iterable of int
+            The IDs of the runs - e.g. from run_now() or runs_submit()
+        callback : callable, optional
+            Called with the future of each run when it is resolved
+
+        Returns
+        -------
+        dict of run ID to concurrent.futures.Future, resolved with a RunResult(run_id, run, output) once the run
+        reaches a terminal life cycle state. run is the output of runs/get, and output of runs/get-output - or
+        None if fetch_output isn't set. The future fails with the exception raised if the run can't be polled.
+        """
+        futures = {}
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The run tracker is closed")
+
+            now = time.monotonic()
+            for run_id in run_ids:
+                if run_id not in self._runs:
+                    self._runs[run_id] = _TrackedRun(Future())
+                    self._futures.append(self._runs[run_id].future)
+                    heapq.heappush(self._schedule, (now, run_id))
+
+                # A run that is already tracked keeps its future, which the callback is added to
+                future = self._runs[run_id].future
+                if callback is not None and run_id not in futures:
+                    future.add_done_callback(callback)
+
+                futures[run_id] = future
+
+            if self._scheduler is None:
+                self._scheduler = threading.Thread(target=self.__run_schedule, name='run-tracker', daemon=True)
+                self._scheduler.start()
+
+            self._condition.notify()
+
+        return futures
+
+    def wait(self, timeout=None):
+        """
+        Block until every tracked run has finished, or timeout seconds have passed
+
+        Returns
+        -------
+        (done, not_done) - the sets of futures that are resolved, and that aren't, for every run ever tracked -
+        including runs that finished before wait was called
+        """
+        with self._condition:
+            futures = list(self._futures)
+
+        return wait_for_futures(futures, timeout=timeout)
+
+    def pending(self):
+        """The IDs of the runs that haven't finished"""
+        with self._condition:
+            return list(self._runs)
+
+    def __run_schedule(self):
+        """Hand runs that are due to be polled to the workers, until there are no runs left"""
+        with self._condition:
+            while not self._closed:
+                if not self._schedule:
+                    if not self._runs:
+                        self._scheduler = None
+                        return
+
+                    # Every run is being polled - wait for them to be rescheduled
+                    self._condition.wait()
+                    continue
+
+                due, run_id = self._schedule[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+
+                heapq.heappop(self._schedule)
+                self._executor.submit(self.__poll, run_id)
+
+    def __poll(self, run_id):
+        """Poll one run, then resolve its future or schedule its next poll"""
+        with self._condition:
+            tracked = self._runs[run_id]
+
+        result, error = None, None
+        try:
+            run = self._jobs.runs_get(run_id)
+            state = _life_cycle_state(run)
+
+            if state in TERMINAL_LIFE_CYCLE_STATES:
+                output = self._jobs.runs_get_output(run_id) if self.fetch_output else None
+                result = RunResult(run_id=run_id, run=run, output=output)
+        except Exception as exception:
+            error = exception
+
+        with self._condition:
+            if result is None and error is None:
+                tracked.interval = _next_run_poll_interval(state, tracked.state, tracked.interval,
+                                                           self.poll_intervals)
+                tracked.state = state
+                heapq.heappush(self._schedule, (time.monotonic() + tracked.interval, run_id))
+            else:
+                del self._runs[run_id]
+
+            self._condition.notify()
+
+        if error is not None:
+            tracked.future.set_exception(error)
+        elif result is not None:
+            tracked.future.set_result(result)
+
+    def close(self):
+        """Stop polling. Runs that haven't finished are left unresolved."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
 
 class JobsAPI(RESTBase):
@@ -11,80 +280,464 @@ class JobsAPI(RESTBase):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def create(self):
+    def __call(self, method, api_path, data=None, retry=False):
+        """Make a call, returning the JSON response or raising the matching exception"""
+        retry = {'retry': True} if retry else {}
+        resp = self._rest_call[method](api_path, data=data, **retry)
+
+        if resp.status_code == 200:
+            return resp.json()
+
+        else:
+            exception = choose_exception(resp)
+            raise exception
+
+    def create(self, name, **kwargs):
+        """
+        Creates a new job
+
+        Parameters
+        ----------
+        name : str
+            The name of the job
+
+        kwargs : optional
+            The other job settings - e.g. new_cluster or existing_cluster_id, and notebook_task - are passed to the
+            API in the JSON payload. See supported arguments here:
+            https://docs.azuredatabricks.net/dev-tools/api/latest/jobs.html#create
+
+        Returns
+        -------
+        The ID of the new job
+        """
         METHOD = 'POST'
         API_PATH = '/jobs/create'
 
-        raise NotImplementedError
+        data = dict_update(kwargs, {'name': name})
+
+        return self.__call(METHOD, API_PATH, data)['job_id']
+
+    def list(self, offset=0, limit=DEFAULT_JOBS_PAGE_SIZE, prefetch=False):
+        """
+        Lists the jobs in the workspace
+
+        The jobs are returned by a generator, which fetches each page of jobs when it is reached.
+
+        Parameters
+        ----------
+        offset : int, optional, default=0
+            The offset of the first job to return
+        limit : int, optional, default=25
+            The number of jobs fetched per page
+        prefetch : bool, optional, default=False
+            Fetch the next page in the background while the current page is being iterated over
 
-    def list(self):
+        Returns
+        -------
+        A generator of job details - see https://docs.azuredatabricks.net/dev-tools/api/latest/jobs.html#job
+        """
         METHOD = 'GET'
         API_PATH = '/jobs/list'
 
-        raise NotImplementedError
+        def fetch_page(page_offset, page_limit):
+            return self.__call(METHOD, API_PATH, {'offset': page_offset, 'limit': page_limit})
 
-    def delete(self):
+        return _paginate(fetch_page, 'jobs', offset, limit, prefetch)
+
+    def delete(self, job_id):
+        """
+        Deletes a job
+
+        Parameters
+        ----------
+        job_id : int
+            The ID of the job to delete
+
+        Returns
+        -------
+        The ID of the deleted job
+        """
         METHOD = 'POST'
         API_PATH = '/jobs/delete'
 
-        raise NotImplementedError
+        self.__call(METHOD, API_PATH, {'job_id': job_id})
+        return job_id
+
+    def get(self, job_id):
+        """
+        Gets the details of a job
 
-    def get(self):
+        Parameters
+        ----------
+        job_id : int
+            The ID of the job
+
+        Returns
+        -------
+        The job's details - see https://docs.azuredatabricks.net/dev-tools/api/latest/jobs.html#job
+        """
         METHOD = 'GET'
         API_PATH = '/jobs/get'
 
-        raise NotImplementedError
+        return self.__call(METHOD, API_PATH, {'job_id': job_id})
+
+    def reset(self, job_id, new_settings):
+        """
+        Overwrites the settings of a job
 
-    def reset(self):
+        Parameters
+        ----------
+        job_id : int
+            The ID of the job
+        new_settings : dict
+            The new settings of the job - see https://docs.azuredatabricks.net/dev-tools/api/latest/jobs.html#reset
+
+        Returns
+        -------
+        The ID of the job
+        """
         METHOD = 'POST'
         API_PATH = '/jobs/reset'
 
-        raise NotImplementedError
+        self.__call(METHOD, API_PATH, {'job_id': job_id, 'new_settings': new_settings}, retry=True)
+        return job_id
+
+    def run_now(self, job_id, jar_params=None, notebook_params=None, python_params=None, spark_submit_params=None):
+        """
+        Runs a job now
 
-    def run_now(self):
+        Parameters
+        ----------
+        job_id : int
+            The ID of the job
+        jar_params : list of str, optional
+            Parameters for jobs with a JAR task
+        notebook_params : dict, optional
+            Parameters for jobs with a notebook task
+        python_params : list of str, optional
+            Parameters for jobs with a Python task
+        spark_submit_params : list of str, optional
+            Parameters for jobs with a spark submit task
+
+        Returns
+        -------
+        dict with the 'run_id' of the new run and its 'number_in_job'
+        """
         METHOD = 'POST'
         API_PATH = '/jobs/run-now'
 
-        raise NotImplementedError
+        data = {'job_id': job_id}
+        for key, value in [('jar_params', jar_params), ('notebook_params', notebook_params),
+                           ('python_params', python_params), ('spark_submit_params', spark_submit_params)]:
+            if value is not None:
+                data[key] = value
+
+        return self.__call(METHOD, API_PATH, data)
+
+    def runs_submit(self, run_name=None, **kwargs):
+        """
+        Submits a one-time run, without creating a job
+
+        Parameters
+        ----------
+        run_name : str, optional
+            The name of the run
 
-    def runs_submit(self):
+        kwargs : optional
+            The run's settings - e.g. new_cluster or existing_cluster_id, and notebook_task - are passed to the API
+            in the JSON payload. See supported arguments here:
+            https://docs.azuredatabricks.net/dev-tools/api/latest/jobs.html#runs-submit
+
+            If an idempotency_token is given the submission is retried if it fails, as the workspace won't
+            start a second run with the same token.
+
+        Returns
+        -------
+        The ID of the new run
+        """
         METHOD = 'POST'
         API_PATH = '/jobs/runs/submit'
 
-        raise NotImplementedError
+        data = dict(kwargs)
+        if run_name is not None:
+            data['run_name'] = run_name
+
+        return self.__call(METHOD, API_PATH, data, retry=bool(data.get('idempotency_token')))['run_id']
+
+    def runs_list(self, job_id=None, active_only=False, completed_only=False, offset=0,
+                  limit=DEFAULT_JOBS_PAGE_SIZE, prefetch=False):
+        """
+        Lists runs, from the most recently started to the least
 
-    def runs_list(self):
+        The runs are returned by a generator, which fetches each page of runs when it is reached - so iterating
+        over the most recent runs doesn't fetch the whole run history.
+
+        Parameters
+        ----------
+        job_id : int, optional
+            Only list the runs of this job
+        active_only : bool, optional, default=False
+            Only list active runs
+        completed_only : bool, optional, default=False
+            Only list completed runs
+        offset : int, optional, default=0
+            The offset of the first run to return
+        limit : int, optional, default=25
+            The number of runs fetched per page
+        prefetch : bool, optional, default=False
+            Fetch the next page in the background while the current page is being iterated over
+
+        Returns
+        -------
+        A generator of run details - see https://docs.azuredatabricks.net/dev-tools/api/latest/jobs.html#run
+        """
         METHOD = 'GET'
         API_PATH = '/jobs/runs/list'
 
-        raise NotImplementedError
+        if active_only and completed_only:
+            raise ValueError("Only one of active_only and completed_only can be set")
+
+        data = {'active_only': active_only, 'completed_only': completed_only}
+        if job_id is not None:
+            data['job_id'] = job_id
+
+        def fetch_page(page_offset, page_limit):
+            return self.__call(METHOD, API_PATH, dict(data, offset=page_offset, limit=page_limit))
 
-    def runs_get(self):
+        return _paginate(fetch_page, 'runs', offset, limit, prefetch)
+
+    def runs_get(self, run_id):
+        """
+        Gets the details of a run
+
+        Parameters
+        ----------
+        run_id : int
+            The ID of the run
+
+        Returns
+        -------
+        The run's details - see https://docs.azuredatabricks.net/dev-tools/api/latest/jobs.html#run
+        """
         METHOD = 'GET'
         API_PATH = '/jobs/runs/get'
 
-        raise NotImplementedError
+        return self.__call(METHOD, API_PATH, {'run_id': run_id})
+
+    def runs_export(self, run_id, views_to_export='CODE'):
+        """
+        Exports the notebook views of a run
 
-    def runs_export(self):
+        Parameters
+        ----------
+        run_id : int
+            The ID of the run
+        views_to_export : str, optional, default='CODE'
+            Which views to export - CODE, DASHBOARDS or ALL
+
+        Returns
+        -------
+        A list of the exported views, each a dict with 'content', 'name' and 'type'
+        """
         METHOD = 'GET'
         API_PATH = '/jobs/runs/export'
 
-        raise NotImplementedError
+        return self.__call(METHOD, API_PATH, {'run_id': run_id, 'views_to_export': views_to_export}).get('views', [])
+
+    def runs_cancel(self, run_id):
+        """
+        Cancels a run. The run is cancelled asynchronously, so it may still be running when this returns.
 
-    def runs_cancel(self):
+        Parameters
+        ----------
+        run_id : int
+            The ID of the run
+
+        Returns
+        -------
+        The ID of the run
+        """
         METHOD = 'POST'
         API_PATH = '/jobs/runs/cancel'
 
-        raise NotImplementedError
+        self.__call(METHOD, API_PATH, {'run_id': run_id}, retry=True)
+        return run_id
+
+    def runs_get_output(self, run_id):
+        """
+        Gets the output of a run - e.g. the value passed to dbutils.notebook.exit()
 
-    def runs_get_output(self):
+        Parameters
+        ----------
+        run_id : int
+            The ID of the run
+
+        Returns
+        -------
+        dict with the run's 'metadata', and its 'notebook_output' or 'error'
+        """
         METHOD = 'GET'
         API_PATH = '/jobs/runs/get-output'
 
-        raise NotImplementedError
+        return self.__call(METHOD, API_PATH, {'run_id': run_id})
+
+    def runs_delete(self, run_id):
+        """
+        Deletes a non-active run
 
-    def runs_delete(self):
+        Parameters
+        ----------
+        run_id : int
+            The ID of the run
+
+        Returns
+        -------
+        The ID of the deleted run
+        """
         METHOD = 'POST'
         API_PATH = '/jobs/runs/delete'
 
-        raise NotImplementedError
+        self.__call(METHOD, API_PATH, {'run_id': run_id})
+        return run_id
+
+    def run_tracker(self, workers=8, fetch_output=True, poll_intervals=None):
+        """
+        Create a RunTracker, to wait for many runs with few runs/get calls
+
+        Parameters
+        ----------
+        workers : int, optional, default=8
+            The largest number of runs/get and runs/get-output calls made at the same time
+        fetch_output : bool, optional, default=True
+            Fetch the output of each run once it has finished
+        poll_intervals : dict, optional
+            Overrides RUN_POLL_INTERVALS - maps life cycle states to (shortest, longest) seconds between polls
+
+        Returns
+        -------
+        RunTracker
+
+        Examples
+        --------
+        >>> with client.jobs.run_tracker() as tracker:
+        ...     futures = tracker.track(client.jobs.run_now(job_id)['run_id'] for job_id in job_ids)
+        ...     tracker.wait()
+        """
+        return RunTracker(self, workers=workers, fetch_output=fetch_output, poll_intervals=poll_intervals)
+
+    def wait_for_runs(self, run_ids, timeout=None, workers=8, fetch_output=True):
+        """
+        Block until all of the runs have finished
+
+        Parameters
+        ----------
+        run_ids : iterable of int
+            The IDs of the runs
+        timeout : float, optional
+            The most seconds to wait. By default, wait indefinitely.
+        workers : int, optional, default=8
+            The largest number of runs/get and runs/get-output calls made at the same time
+        fetch_output : bool, optional, default=True
+            Fetch the output of each run once it has finished
+
+        Returns
+        -------
+        dict of run ID to RunResult(run_id, run, output)
+
+        Raises
+        ------
+        TimeoutError
+            If any of the runs hasn't finished after timeout seconds
+        """
+        with self.run_tracker(workers=workers, fetch_output=fetch_output) as tracker:
+            futures = tracker.track(run_ids)
+            _, not_done = wait_for_futures(list(futures.values()), timeout=timeout)
+
+            if not_done:
+                raise TimeoutError("{0} of {1} runs haven't finished".format(len(not_done), len(futures)))
+
+            return {run_id: future.result() for run_id, future in futures.items()}
+
+    def submit_many(self, specs, max_in_flight=10, workers=8, fetch_output=True, poll_intervals=None):
+        """
+        Submits many one-time runs, keeping at most max_in_flight of them active at once
+
+        The next spec is submitted as soon as an active run finishes, so the workspace is kept busy without being
+        overloaded. Each spec is given an idempotency_token, unless it has one, so that submissions that are
+        throttled or fail are retried without starting a run twice. Calls go through the client's retry policy
+        and rate limiter.
+
+        Specs are read lazily. If iteration stops early, runs that were already submitted aren't cancelled.
+
+        Parameters
+        ----------
+        specs : iterable of dict
+            The settings of each run, as passed to runs_submit - e.g. {'run_name': ..., 'existing_cluster_id':
+            ..., 'notebook_task': ...}
+        max_in_flight : int, optional, default=10
+            The largest number of runs submitted but not finished at any time
+        workers : int, optional, default=8
+            The largest number of API calls made at the same time
+        fetch_output : bool, optional, default=True
+            Fetch the output of each run once it has finished
+        poll_intervals : dict, optional
+            Overrides RUN_POLL_INTERVALS - maps life cycle states to (shortest, longest) seconds between polls
+
+        Returns
+        -------
+        An iterator of SubmittedRunResult(index, spec, run_id, run, output, error), in the order the runs finish.
+        index is the position of the spec in specs. error is the exception raised submitting or polling the
+        run - and run_id is None if it couldn't be submitted - or None.
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        specs = enumerate(specs)
+        events = queue.Queue()
+        in_flight = 0
+
+        def on_submitted(index, spec):
+            return lambda future: events.put(('submitted', index, spec, future))
+
+        def on_finished(index, spec, run_id):
+            return lambda future: events.put(('finished', index, spec, run_id, future))
+
+        with self.run_tracker(workers=workers, fetch_output=fetch_output, poll_intervals=poll_intervals) as tracker, \
+                ThreadPoolExecutor(max_workers=workers) as submitter:
+            while True:
+                # Top up the active runs before handing the next result back
+                while in_flight < max_in_flight:
+                    index, spec = next(specs, (None, None))
+                    if spec is None:
+                        break
+
+                    spec = _with_idempotency_token(spec)
+                    submitter.submit(self.runs_submit, **spec).add_done_callback(on_submitted(index, spec))
+                    in_flight += 1
+
+                if in_flight == 0:
+                    return
+
+                event = events.get()
+                if event[0] == 'submitted':
+                    _, index, spec, future = event
+                    if future.exception() is None:
+                        run_id = future.result()
+                        # Specs submitted as the same run - e.g. with one idempotency_token - each get its result
+                        tracker.track([run_id], callback=on_finished(index, spec, run_id))
+                        continue
+
+                    in_flight -= 1
+                    yield SubmittedRunResult(index=index, spec=spec, run_id=None, run=None, output=None,
+                                             error=future.exception())
+                else:
+                    _, index, spec, run_id, future = event
+                    in_flight -= 1
+
+                    if future.exception() is None:
+                        result = future.result()
+                        yield SubmittedRunResult(index=index, spec=spec, run_id=run_id, run=result.run,
+                                                 output=result.output, error=None)
+                    else:
+                        yield SubmittedRunResult(index=index, spec=spec, run_id=run_id, run=None, output=None,
+                                                 error=future.exception())
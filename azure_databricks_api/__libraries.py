@@ -5,7 +5,230 @@
 
 from azure_databricks_api.__base import RESTBase
 from azure_databricks_api.exceptions import ResourceDoesNotExist, LibraryNotFound, LibraryInstallFailed, APIError, AuthorizationError, ERROR_CODES
+import collections
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Seconds between libraries/cluster-status calls while waiting for libraries to install
+MIN_INSTALL_POLL_INTERVAL = 0.5
+MAX_INSTALL_POLL_INTERVAL = 10.0
+
+LIBRARY_TYPES = ('jar', 'egg', 'whl', 'pypi', 'maven', 'cran')
+
+# Statuses after which a library will not become INSTALLED without another request
+FAILED_LIBRARY_STATUSES = ('FAILED', 'SKIPPED')
+
+
+def _library_name(library):
+    """
+    Return the (library type, library name) of a library specification
+
+    e.g. pypi libraries are named by "package", maven libraries by "coordinates" and jar, egg and whl
+    libraries by their path
+    """
+    library_type, details = list(library.items())[0]
+
+    if library_type in ["jar", "egg", "whl"]:
+        return library_type, details
+    elif library_type == "maven":
+        return library_type, details['coordinates']
+    else:
+        return library_type, details["package"]
+
+
+def _find_library(cluster_status, cluster_id, library_name, library_type=None):
+    """Find the status of a library in the output of libraries/cluster-status"""
+    for library in cluster_status.get('library_statuses', []):
+        current_lib_type, current_lib_name = _library_name(library['library'])
+
+        if library_type is not None and not current_lib_type == library_type:
+            continue
+
+        # If the library name is the one we're searching for, return that library
+        if library_name == current_lib_name:
+            return library
+
+    lib_string = "'{0}' library ".format(
+        library_type) if library_type else ""
+    lib_string = lib_string + "'{0}'".format(library_name)
+
+    raise LibraryNotFound(
+        "{0} is not found on cluster '{1}'".format(lib_string, cluster_id))
+
+
+LibraryLocation = collections.namedtuple('LibraryLocation', ['cluster_id', 'status', 'version', 'library'])
+
+ClusterLibraryResult = collections.namedtuple('ClusterLibraryResult', ['cluster_id', 'library_statuses', 'error'])
+
+_PYPI_REQUIREMENT = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(?:==\s*([^\s,;]+))?')
+
+
+def _normalize_library(library_type, library_name):
+    """
+    Split a library name into a (normalized name, version) for the library index
+
+    PyPI names are normalized as in PEP 503, and an exact '==' version is split off. The version of Maven
+    coordinates is split off. Other names are used as they are, without a version.
+    """
+    if library_type == 'pypi':
+        match = _PYPI_REQUIREMENT.match(library_name)
+        if match:
+            return re.sub(r'[-_.]+', '-', match.group(1)).lower(), match.group(2)
+
+    elif library_type == 'maven':
+        parts = library_name.split(':')
+        if len(parts) >= 3:
+            return ':'.join(parts[:2]), ':'.join(parts[2:])
+
+    return library_name, None
+
+
+class LibraryIndex(object):
+    """
+    An index of the libraries on every cluster, built from the output of libraries/all-cluster-statuses
+
+    Look up libraries by name with find() in constant time, instead of scanning each cluster's library statuses.
+    The index is a snapshot: it doesn't change until update() is called - see LibrariesAPI.refresh_library_index
+    """
+
+    def __init__(self, all_cluster_statuses=None):
+        self._locations = {}
+        self._types = collections.defaultdict(set)
+        self.updated = None
+
+        if all_cluster_statuses is not None:
+            self.update(all_cluster_statuses)
+
+    def update(self, all_cluster_statuses):
+        """Rebuild the index from the output of libraries/all-cluster-statuses"""
+        locations = collections.defaultdict(list)
+        types = collections.defaultdict(set)
+
+        for cluster in all_cluster_statuses.get('statuses', []):
+            for library in cluster.get('library_statuses', []):
+                library_type, library_name = _library_name(library['library'])
+                name, version = _normalize_library(library_type, library_name)
+
+                locations[(library_type, name)].append(
+                    LibraryLocation(cluster_id=cluster['cluster_id'], status=library['status'], version=version,
+                                    library=library['library']))
+                types[name].add(library_type)
+
+        # Swap in the new index in one step, so readers never see a partly built index
+        self._locations, self._types = dict(locations), types
+        self.updated = time.time()
+
+    def find(self, library_name, library_type=None, version=None):
+        """
+        Find the clusters a library is on
+
+        Parameters
+        ----------
+        library_name : str
+            The name of the library - pip name, maven coordinates, etc. PyPI names are matched as in PEP 503, so
+            'Foo_Bar' matches 'foo-bar'. A version in the name (e.g. 'foo==1.0' or 'org.jsoup:jsoup:1.7.2') is
+            used as the version to match.
+
+        library_type : str, optional
+            The type of library - maven, pypi, cran, etc. By default, libraries of any type are found.
+
+        version : str, optional
+            Only find the library at this version
+
+        Returns
+        -------
+        list of LibraryLocation(cluster_id, status, version, library)
+        """
+        if library_type:
+            library_types = [library_type]
+        else:
+            # Names are normalized by type, so try the name as each type
+            library_types = [known_type for known_type in LIBRARY_TYPES
+                             if known_type in self._types.get(_normalize_library(known_type, library_name)[0], ())]
+
+        found = []
+        for found_type in library_types:
+            name, name_version = _normalize_library(found_type, library_name)
+            wanted_version = version or name_version
+
+            found.extend(location for location in self._locations.get((found_type, name), [])
+                         if wanted_version is None or location.version == wanted_version)
+
+        return found
+
+    def __len__(self):
+        return len(self._locations)
+
+
+def _check_libraries(cluster_status, cluster_id, library_keys):
+    """
+    Check the status of a set of libraries in the output of libraries/cluster-status
+
+    Parameters
+    ----------
+    library_keys : list of (library type, library name)
+        The libraries to check. A library type of None matches any type.
+
+    Returns
+    -------
+    (library_statuses, done) - the status of each library, and whether all of them are INSTALLED
+
+    Raises
+    ------
+    LibraryNotFound
+        When a library isn't on the cluster
+    LibraryInstallFailed
+        When any of the libraries failed to install
+    """
+    library_statuses = [_find_library(cluster_status, cluster_id, library_name, library_type)
+                        for library_type, library_name in library_keys]
+
+    failed = [library for library in library_statuses if library['status'] in FAILED_LIBRARY_STATUSES]
+    if failed:
+        raise LibraryInstallFailed("{0} failed to install on cluster '{1}'. Response: {2}".format(
+            ", ".join("'{0}'".format(_library_name(library['library'])[1]) for library in failed), cluster_id, failed))
+
+    return library_statuses, all(library['status'] == 'INSTALLED' for library in library_statuses)
+
+
+def _cluster_result(cluster_id, cluster_status):
+    """The ClusterLibraryResult of a successful call for one cluster, which returned its status or None"""
+    library_statuses = cluster_status.get('library_statuses', []) if cluster_status is not None else None
+    return ClusterLibraryResult(cluster_id=cluster_id, library_statuses=library_statuses, error=None)
+
+
+def _advance_fleet(all_cluster_statuses, pending, library_keys):
+    """
+    Check the libraries being waited for on many clusters against one all_cluster_statuses() response
+
+    Parameters
+    ----------
+    pending : set of str
+        The IDs of the clusters still being waited for
+
+    Returns
+    -------
+    dict of cluster ID to ClusterLibraryResult, for the clusters that are finished - all libraries installed, or
+    failed
+    """
+    cluster_statuses = {cluster['cluster_id']: cluster for cluster in all_cluster_statuses.get('statuses', [])}
+
+    finished = {}
+    for cluster_id in pending:
+        cluster_status = cluster_statuses.get(cluster_id, {})
+
+        try:
+            library_statuses, done = _check_libraries(cluster_status, cluster_id, library_keys)
+        except (LibraryInstallFailed, LibraryNotFound) as error:
+            finished[cluster_id] = ClusterLibraryResult(cluster_id=cluster_id, library_statuses=None, error=error)
+            continue
+
+        if done:
+            finished[cluster_id] = ClusterLibraryResult(cluster_id=cluster_id, library_statuses=library_statuses,
+                                                        error=None)
+
+    return finished
 
 
 class LibrariesAPI(RESTBase):
@@ -13,6 +236,46 @@ class LibrariesAPI(RESTBase):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
+        self._library_index = None
+
+    def library_index(self):
+        """
+        Returns an index of the libraries on every cluster, for fast fleet-wide lookups.
+
+        The index is built from one all_cluster_statuses() call the first time this is called, and reused after
+        that. Call refresh_library_index() to rebuild it.
+
+        Returns
+        -------
+        LibraryIndex
+
+        Examples
+        --------
+        >>> client.libraries.library_index().find('simplejson', 'pypi', version='3.8.0')
+        [LibraryLocation(cluster_id='0923-164208-meows279', status='INSTALLED', version='3.8.0', library={...})]
+        """
+        if self._library_index is None:
+            self._library_index = LibraryIndex(self.all_cluster_statuses())
+
+        return self._library_index
+
+    def refresh_library_index(self):
+        """
+        Rebuilds the library index with a new all_cluster_statuses() call
+
+        Returns
+        -------
+        LibraryIndex
+        """
+        all_cluster_statuses = self.all_cluster_statuses()
+
+        if self._library_index is None:
+            self._library_index = LibraryIndex(all_cluster_statuses)
+        else:
+            self._library_index.update(all_cluster_statuses)
+
+        return self._library_index
+
     def all_cluster_statuses(self):
         """
         Returns library status for all clusters.
@@ -108,34 +371,7 @@ class LibrariesAPI(RESTBase):
 
             See https://docs.azuredatabricks.net/dev-tools/api/latest/libraries.html#libraryfullstatus
         """
-        all_packages = self.cluster_status(cluster_id)
-
-        for library in all_packages['library_statuses']:
-            lib_details = list(library['library'].items())[0]
-
-            if library_type is not None:
-                if not lib_details[0] == library_type:
-                    continue
-
-            # Get the current library name - depending on library type
-            # e.g. pypi libraries are named "package", maven are named "coordinates"
-            if lib_details[0] in ["jar", "egg", "whl"]:
-                current_lib_name = lib_details[1]
-            elif lib_details[0] == "maven":
-                current_lib_name = lib_details[1]['coordinates']
-            else:
-                current_lib_name = lib_details[1]["package"]
-
-            # If the library name is the one we're searching for, return that name
-            if library_name == current_lib_name:
-                return library
-
-        lib_string = "'{0}' library ".format(
-            library_type) if library_type else ""
-        lib_string = lib_string + "'{0}'".format(library_name)
-
-        raise LibraryNotFound(
-            "{0} is not found on cluster '{1}'".format(lib_string, cluster_id))
+        return _find_library(self.cluster_status(cluster_id), cluster_id, library_name, library_type)
 
     def wait_for_install_complete(self, cluster_id, library_name, library_type=None, timeout=120):
         """
@@ -157,30 +393,66 @@ class LibrariesAPI(RESTBase):
         timeout : int
             The time in seconds to wait for the installation to complete
         """
-        iteration = 0
-        start_time = time.time()
-        status = None
+        _, library_statuses = self.__wait_for_libraries(cluster_id, [(library_type, library_name)], timeout)
+        return library_statuses[0]
 
-        while status != 'INSTALLED':
-            lib_details = self.get_library_details(
-                cluster_id, library_name, library_type)
-            status = lib_details['status']
-            if status == 'INSTALLED':
-                break
-            elif status == 'FAILED':
-                raise LibraryInstallFailed(
-                    "'{0}' failed to install. Response: {1}".format(library_name, lib_details))
+    def wait_for_libraries(self, cluster_id, libraries, timeout=120):
+        """
+        Blocks the code until all of the libraries are "INSTALLED" on the cluster.
 
-            if time.time() - start_time >= timeout:
-                raise TimeoutError("The status check timed out")
+        The libraries' status is checked with one libraries/cluster-status call per poll, backing off from
+        MIN_INSTALL_POLL_INTERVAL to MAX_INSTALL_POLL_INTERVAL seconds between polls.
+
+        Parameters
+        ----------
+        cluster_id : str
+            The ID of the cluster the libraries are being installed on
+
+        libraries : array of libraries
+            The libraries, of any type, as passed to install()
 
-            # Exponential backoff in tenths of a second
-            sleep_time = (2**iteration) / 10
-            time.sleep(sleep_time)
+        timeout : int
+            The time in seconds to wait for the installation to complete
+
+        Returns
+        -------
+        The status of each library, in the same order as libraries.
+
+        See https://docs.azuredatabricks.net/dev-tools/api/latest/libraries.html#libraryfullstatus
+
+        Raises
+        ------
+        LibraryInstallFailed
+            As soon as any of the libraries is FAILED or SKIPPED
+        LibraryNotFound
+            When a library isn't on the cluster
+        TimeoutError
+            When the libraries aren't all installed after timeout seconds
+        """
+        _, library_statuses = self.__wait_for_libraries(cluster_id, [_library_name(library) for library in libraries],
+                                                        timeout)
+        return library_statuses
+
+    def __wait_for_libraries(self, cluster_id, library_keys, timeout):
+        """Poll the cluster's library status until all of the libraries are installed"""
+        deadline = time.monotonic() + timeout
+        interval = MIN_INSTALL_POLL_INTERVAL
+
+        while True:
+            cluster_status = self.cluster_status(cluster_id)
+            library_statuses, done = _check_libraries(cluster_status, cluster_id, library_keys)
+
+            if done:
+                return cluster_status, library_statuses
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("The status check timed out")
 
-        return lib_details
+            time.sleep(min(interval, remaining))
+            interval = min(MAX_INSTALL_POLL_INTERVAL, interval * 2)
 
-    def install(self, cluster_id, libraries, wait_for_completion=False, timeout=120):
+    def install(self, cluster_id, libraries, wait_for_completion=False, timeout=120, return_status=True):
         """
         Installs new libraries on the cluster
 
@@ -194,6 +466,15 @@ class LibrariesAPI(RESTBase):
         libraries : array of libraries
             see https://docs.azuredatabricks.net/dev-tools/api/latest/libraries.html#install
 
+        wait_for_completion : bool, optional, default=False
+            Block until all of the libraries are installed - see wait_for_libraries()
+
+        timeout : int, optional, default=120
+            The time in seconds to wait for the installation to complete
+
+        return_status : bool, optional, default=True
+            Fetch and return the cluster's library status. Set to False to skip that call, returning None.
+
         Returns
         -------
         Cluster library status for given cluster
@@ -205,11 +486,16 @@ class LibrariesAPI(RESTBase):
         data = {'cluster_id': cluster_id,
                 'libraries': libraries}
 
-        # Make REST call
-        resp = self._rest_call[METHOD](API_PATH, data=data)
+        # Make REST call - libraries already installed or pending on the cluster are skipped, so it is safe to retry
+        resp = self._rest_call[METHOD](API_PATH, data=data, retry=True)
 
-        if resp.status_code == 200:
-            return self.cluster_status(cluster_id)
+        if resp.status_code == 200 and wait_for_completion:
+            cluster_status, _ = self.__wait_for_libraries(cluster_id, [_library_name(library) for library in libraries],
+                                                          timeout)
+            return cluster_status
+
+        elif resp.status_code == 200:
+            return self.cluster_status(cluster_id) if return_status else None
 
         elif resp.status_code == 403:
             raise AuthorizationError(
@@ -224,6 +510,92 @@ class LibrariesAPI(RESTBase):
                                                                    resp.json().get('error_code'),
                                                                    resp.json().get('message')))
 
+    def install_many(self, cluster_ids, libraries, workers=8, wait_for_completion=False, timeout=600,
+                     return_status=False):
+        """
+        Installs libraries on many clusters concurrently
+
+        The install calls are made by a pool of workers, without fetching each cluster's status afterwards unless
+        return_status is set. If wait_for_completion is set, all of the clusters are then polled together, with
+        one all_cluster_statuses() call per poll, until every cluster has installed the libraries or failed. For
+        best performance, the client's pool_maxsize should be at least the number of workers.
+
+        Parameters
+        ----------
+        cluster_ids : list of str
+            The IDs of the clusters on which to install libraries
+
+        libraries : array of libraries
+            see https://docs.azuredatabricks.net/dev-tools/api/latest/libraries.html#install
+
+        workers : int, optional, default=8
+            The number of install calls made at the same time
+
+        wait_for_completion : bool, optional, default=False
+            Wait until the libraries are installed on every cluster
+
+        timeout : int, optional, default=600
+            The time in seconds to wait for the installation to complete on all of the clusters
+
+        return_status : bool, optional, default=False
+            Fetch each cluster's library status after its install call - see install()
+
+        Returns
+        -------
+        dict of cluster ID to ClusterLibraryResult(cluster_id, library_statuses, error). library_statuses is the
+        status of each library once installed if wait_for_completion is set, else the status of every library on
+        the cluster if return_status is set, else None. error is the exception raised for the cluster - e.g.
+        LibraryInstallFailed or TimeoutError - or None.
+        """
+        results = self.__for_each_cluster(
+            cluster_ids, workers, lambda cluster_id: self.install(cluster_id, libraries, return_status=return_status))
+
+        if wait_for_completion:
+            pending = {cluster_id for cluster_id, result in results.items() if result.error is None}
+            results.update(self.__wait_for_fleet(pending, [_library_name(library) for library in libraries],
+                                                 timeout))
+
+        return results
+
+    def __for_each_cluster(self, cluster_ids, workers, call):
+        """Make a call for each cluster with a pool of workers, and collect the errors by cluster"""
+
+        def call_one(cluster_id):
+            try:
+                cluster_status = call(cluster_id)
+            except Exception as error:
+                return ClusterLibraryResult(cluster_id=cluster_id, library_statuses=None, error=error)
+
+            return _cluster_result(cluster_id, cluster_status)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return {result.cluster_id: result for result in executor.map(call_one, cluster_ids)}
+
+    def __wait_for_fleet(self, pending, library_keys, timeout):
+        """Poll all_cluster_statuses until the libraries are installed or failed on every pending cluster"""
+        deadline = time.monotonic() + timeout
+        interval = MIN_INSTALL_POLL_INTERVAL
+        results = {}
+
+        while pending:
+            finished = _advance_fleet(self.all_cluster_statuses(), pending, library_keys)
+            results.update(finished)
+            pending = pending - set(finished)
+
+            remaining = deadline - time.monotonic()
+            if pending and remaining <= 0:
+                for cluster_id in pending:
+                    results[cluster_id] = ClusterLibraryResult(
+                        cluster_id=cluster_id, library_statuses=None,
+                        error=TimeoutError("The status check timed out"))
+                break
+
+            if pending:
+                time.sleep(min(interval, remaining))
+                interval = min(MAX_INSTALL_POLL_INTERVAL, interval * 2)
+
+        return results
+
     def install_pypi(self, cluster_id, package, repo=None, wait_for_completion=False, timeout=120):
         """
         Installs a new Pypi library on the cluster.
@@ -334,7 +706,7 @@ class LibrariesAPI(RESTBase):
 
         return resp
 
-    def uninstall(self, cluster_id, libraries):
+    def uninstall(self, cluster_id, libraries, return_status=True):
         """
         Uninstalls a library from the cluster
 
@@ -348,6 +720,9 @@ class LibrariesAPI(RESTBase):
         libraries : array of libraries
             see https://docs.azuredatabricks.net/dev-tools/api/latest/libraries.html#uninstall
 
+        return_status : bool, optional, default=True
+            Fetch and return the cluster's library status. Set to False to skip that call, returning None.
+
         Returns
         -------
         """
@@ -359,11 +734,11 @@ class LibrariesAPI(RESTBase):
         data = {'cluster_id': cluster_id,
                 'libraries': libraries}
 
-        # Make REST call
-        resp = self._rest_call[METHOD](API_PATH, data=data)
+        # Make REST call - libraries already marked for removal stay marked, so it is safe to retry
+        resp = self._rest_call[METHOD](API_PATH, data=data, retry=True)
 
         if resp.status_code == 200:
-            return self.cluster_status(cluster_id)
+            return self.cluster_status(cluster_id) if return_status else None
 
         elif resp.status_code == 403:
             raise AuthorizationError(
@@ -378,6 +753,36 @@ class LibrariesAPI(RESTBase):
                                                                    resp.json().get('error_code'),
                                                                    resp.json().get('message')))
 
+    def uninstall_many(self, cluster_ids, libraries, workers=8, return_status=False):
+        """
+        Uninstalls libraries from many clusters concurrently
+
+        Libraries are uninstalled when each cluster is restarted. The uninstall calls are made by a pool of
+        workers, without fetching each cluster's status afterwards unless return_status is set.
+
+        Parameters
+        ----------
+        cluster_ids : list of str
+            The IDs of the clusters from which to uninstall libraries
+
+        libraries : array of libraries
+            see https://docs.azuredatabricks.net/dev-tools/api/latest/libraries.html#uninstall
+
+        workers : int, optional, default=8
+            The number of uninstall calls made at the same time
+
+        return_status : bool, optional, default=False
+            Fetch each cluster's library status after its uninstall call - see uninstall()
+
+        Returns
+        -------
+        dict of cluster ID to ClusterLibraryResult(cluster_id, library_statuses, error). library_statuses is the
+        status of every library on the cluster if return_status is set, else None. error is the exception raised
+        for the cluster, or None.
+        """
+        return self.__for_each_cluster(
+            cluster_ids, workers, lambda cluster_id: self.uninstall(cluster_id, libraries, return_status=return_status))
+
     def uninstall_pypi(self, cluster_id, package):
         """
         Uninstalls a Pypi library on the cluster
@@ -0,0 +1,291 @@
+# Copyright (c) 2018 Microsoft
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import bisect
+import logging
+import socket
+import threading
+import time
+from collections import namedtuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets - as used by Prometheus client libraries
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+RequestMetrics = namedtuple('RequestMetrics', ['method', 'endpoint', 'status_code', 'error', 'retries',
+                                               'bytes_sent', 'bytes_received', 'dns_seconds', 'connect_seconds',
+                                               'ttfb_seconds', 'total_seconds'])
+RequestMetrics.__doc__ = """
+The measurements of one HTTP request - one attempt of an API call
+
+status_code is None, and error the exception raised, if no response was received. retries is the number of
+attempts of the same call before this one. dns_seconds and connect_seconds are 0 when a pooled connection was
+reused. ttfb_seconds is the time until the response headers were received, and total_seconds until the whole
+response was read.
+"""
+
+_local = threading.local()
+
+
+class ConnectionTimings(object):
+    """The time spent resolving and connecting while sending one request, recorded by the timed connections"""
+    __slots__ = ('dns_seconds', 'connect_seconds')
+
+    def __init__(self):
+        self.dns_seconds = 0.0
+        self.connect_seconds = 0.0
+
+
+def start_connection_timing():
+    """
+    Start recording the connection timings of the calling thread
+
+    requests sends a request on the thread that calls it, so the connections it opens record their timings
+    here, where the caller can read them once the request is sent.
+    """
+    _local.timings = ConnectionTimings()
+    return _local.timings
+
+
+def _current_timings():
+    timings = getattr(_local, 'timings', None)
+    return timings if timings is not None else ConnectionTimings()
+
+
+class _TimedConnectionMixin(object):
+    """Records how long new connections spend on DNS resolution and on connecting (TCP and TLS)"""
+
+    def _new_conn(self):
+        host = self._dns_host
+
+        start = time.perf_counter()
+        try:
+            address = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)[0][4][0]
+        except (OSError, IndexError):
+            # Let urllib3 resolve the host again, so it raises its usual errors
+            return super()._new_conn()
+        _current_timings().dns_seconds += time.perf_counter() - start
+
+        # Connect to the address just resolved, rather than resolving it again. urllib3 wraps connection errors
+        # (OSError) as NewConnectionError, a ConnectTimeoutError - on any of them, fall back to urllib3's own
+        # resolution, which tries every address of the host.
+        self._dns_host = address
+        try:
+            return super()._new_conn()
+        except ConnectTimeoutError:
+            self._dns_host = host
+            return super()._new_conn()
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        timings = _current_timings()
+        dns_before = timings.dns_seconds
+
+        start = time.perf_counter()
+        super().connect()
+        timings.connect_seconds += time.perf_counter() - start - (timings.dns_seconds - dns_before)
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter whose connections record their DNS and connect times - see start_connection_timing()"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _TimedHTTPConnectionPool,
+                                                   'https': _TimedHTTPSConnectionPool}
+
+
+def body_size(body):
+    """The number of bytes in a request or response body - a str, bytes or a sized file-like object"""
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+def notify_observers(observers, metrics):
+    """Pass metrics to each observer. An observer that raises is logged, rather than failing the API call."""
+    for observer in observers:
+        try:
+            observer.request_finished(metrics)
+        except Exception:
+            logger.exception("Request observer %r failed", observer)
+
+
+class RequestObserver(object):
+    """
+    Receives the RequestMetrics of every request made through a client
+
+    Subclass this and pass instances to the client's observers parameter - e.g. to feed Prometheus or StatsD.
+    request_finished is called on the thread (or, in the async client, the event loop) that made the request,
+    so it should be quick.
+    """
+
+    def request_finished(self, metrics):
+        """Called with the RequestMetrics of each request once its response has been read, or it has failed"""
+        pass
+
+
+class _EndpointStats(object):
+
+    def __init__(self, bucket_count):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.connections = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.seconds_sum = 0.0
+        self.ttfb_seconds_sum = 0.0
+        self.dns_seconds_sum = 0.0
+        self.connect_seconds_sum = 0.0
+        self.max_seconds = 0.0
+        self.bucket_counts = [0] * (bucket_count + 1)
+
+
+class MetricsAggregator(RequestObserver):
+    """
+    A thread-safe RequestObserver that aggregates request metrics per endpoint, with a latency histogram
+
+    Parameters
+    ----------
+    buckets : sequence of float, optional
+        The upper bounds of the latency histogram buckets, in seconds. Defaults to DEFAULT_LATENCY_BUCKETS.
+
+    Examples
+    --------
+    >>> metrics = MetricsAggregator()
+    >>> client = AzureDatabricksRESTClient(region=azure_region, token=token, observers=[metrics])
+    >>> client.dbfs.download_directory('/data', './data')
+    >>> metrics.slowest(3)
+    [('dbfs/read', {'count': 412, 'mean_seconds': 0.21, ...}), ...]
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def request_finished(self, metrics):
+        endpoint = metrics.endpoint.lstrip('/')
+
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats(len(self.buckets))
+
+            stats.count += 1
+            stats.errors += metrics.error is not None or metrics.status_code >= 400
+            stats.retries += metrics.retries > 0
+            stats.connections += metrics.connect_seconds > 0
+            stats.bytes_sent += metrics.bytes_sent
+            stats.bytes_received += metrics.bytes_received
+            stats.seconds_sum += metrics.total_seconds
+            stats.ttfb_seconds_sum += metrics.ttfb_seconds
+            stats.dns_seconds_sum += metrics.dns_seconds
+            stats.connect_seconds_sum += metrics.connect_seconds
+            stats.max_seconds = max(stats.max_seconds, metrics.total_seconds)
+            stats.bucket_counts[bisect.bisect_left(self.buckets, metrics.total_seconds)] += 1
+
+    def snapshot(self):
+        """
+        Returns
+        -------
+        dict of endpoint - e.g. 'dbfs/read' - to a dict of its counts, byte and second totals, means, and
+        'buckets': a list of (upper bound, cumulative count) pairs ending with (inf, count), as in Prometheus.
+        errors counts requests that failed or returned a 4xx or 5xx status, retries those that were retries of
+        an earlier attempt, and connections those that opened a new connection.
+        """
+        with self._lock:
+            return {endpoint: self.__describe(stats) for endpoint, stats in self._endpoints.items()}
+
+    def __describe(self, stats):
+        cumulative, buckets = 0, []
+        for upper_bound, bucket_count in zip(self.buckets + (float('inf'), ), stats.bucket_counts):
+            cumulative += bucket_count
+            buckets.append((upper_bound, cumulative))
+
+        return {'count': stats.count,
+                'errors': stats.errors,
+                'retries': stats.retries,
+                'connections': stats.connections,
+                'bytes_sent': stats.bytes_sent,
+                'bytes_received': stats.bytes_received,
+                'seconds_sum': stats.seconds_sum,
+                'mean_seconds': stats.seconds_sum / stats.count,
+                'mean_ttfb_seconds': stats.ttfb_seconds_sum / stats.count,
+                'dns_seconds_sum': stats.dns_seconds_sum,
+                'connect_seconds_sum': stats.connect_seconds_sum,
+                'max_seconds': stats.max_seconds,
+                'buckets': buckets}
+
+    def quantile(self, endpoint, q):
+        """
+        Estimate a latency quantile of an endpoint from its histogram, interpolating linearly within a bucket
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint, e.g. 'dbfs/read'
+        q : float
+            The quantile, between 0 and 1 - e.g. 0.99
+
+        Returns
+        -------
+        float seconds, or None if no requests to the endpoint have been observed
+        """
+        with self._lock:
+            stats = self._endpoints.get(endpoint.lstrip('/'))
+            if stats is None:
+                return None
+            bucket_counts, max_seconds = list(stats.bucket_counts), stats.max_seconds
+
+        rank = q * sum(bucket_counts)
+        cumulative, lower_bound = 0, 0.0
+        for upper_bound, bucket_count in zip(self.buckets + (max_seconds, ), bucket_counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                upper_bound = min(upper_bound, max_seconds)
+                return lower_bound + (upper_bound - lower_bound) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower_bound = upper_bound
+
+        return max_seconds
+
+    def slowest(self, n=5, key='mean_seconds'):
+        """The n endpoints with the highest value of key - e.g. 'mean_seconds' or 'seconds_sum' - and their stats"""
+        return sorted(self.snapshot().items(), key=lambda item: item[1][key], reverse=True)[:n]
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
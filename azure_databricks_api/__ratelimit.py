@@ -0,0 +1,157 @@
+# Copyright (c) 2018 Microsoft
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import threading
+import time
+
+
+def _endpoint_family(api_endpoint):
+    """The first segment of an API endpoint - e.g. 'dbfs' for 'dbfs/add-block'"""
+    return api_endpoint.lstrip('/').split('/', 1)[0]
+
+
+class TokenBucket(object):
+    """
+    A thread-safe token bucket, refilled at rate tokens per second up to capacity
+
+    Tokens are reserved rather than waited for: reserve() always takes its tokens, letting the balance go
+    negative, and returns how long the caller must wait before using them. Callers that arrive while the
+    bucket is empty are queued in order of arrival, and no lock is held while they wait.
+
+    Parameters
+    ----------
+    rate : float
+        Tokens added per second
+
+    capacity : float, optional
+        The largest number of tokens the bucket holds, i.e. the largest burst. Defaults to one second of tokens.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens=1):
+        """
+        Take tokens from the bucket
+
+        Returns
+        -------
+        float - the number of seconds to wait before the tokens may be used
+        """
+        with self._lock:
+            self.__refill()
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def pause(self, seconds):
+        """Empty the bucket so that no tokens are available for at least the given number of seconds"""
+        with self._lock:
+            self.__refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class RateLimiter(object):
+    """
+    Limits the rate of API calls made through a client, to stay under the workspace's rate limits
+
+    A call takes a token from the global bucket, and from the bucket of its endpoint family (the first
+    segment of the endpoint, e.g. 'dbfs' or 'clusters') if a rate has been set for that family, and waits
+    until both are available. A throttled (429) response pauses the buckets the call went through for the
+    time the retry policy waits, so that other threads hold back too instead of being throttled in turn.
+
+    A RateLimiter is shared by all of the API objects of a client - and may be shared between clients of
+    the same workspace.
+
+    Parameters
+    ----------
+    rate : float, optional
+        The maximum number of calls per second across all endpoints. None means no global limit.
+
+    burst : float, optional
+        The number of calls that may be made at once after a quiet period. Defaults to one second of calls.
+
+    family_rates : dict, optional
+        The maximum number of calls per second to an endpoint family, e.g. {'dbfs': 20, 'clusters': 5}.
+        A value may also be a (rate, burst) tuple; by default each family may burst one second of calls.
+
+    Notes
+    -----
+    A bucket allows up to burst + rate calls in its first second. To stay under a limit of N calls in any
+    one second, set rate and burst so that their sum is at most N - e.g. RateLimiter(rate=45, burst=5).
+    """
+
+    def __init__(self, rate=None, burst=None, family_rates=None):
+        self._global = TokenBucket(rate, burst) if rate is not None else None
+        self._families = {family.strip('/'): TokenBucket(*family_rate) if isinstance(family_rate, tuple)
+                          else TokenBucket(family_rate)
+                          for family, family_rate in (family_rates or {}).items()}
+
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def __buckets(self, api_endpoint):
+        buckets = [self._global] if self._global is not None else []
+
+        family_bucket = self._families.get(_endpoint_family(api_endpoint))
+        if family_bucket is not None:
+            buckets.append(family_bucket)
+
+        return buckets
+
+    def reserve(self, api_endpoint):
+        """
+        Reserve a call to the given endpoint
+
+        Returns
+        -------
+        float - the number of seconds to wait before making the call
+        """
+        delay = max([bucket.reserve() for bucket in self.__buckets(api_endpoint)], default=0.0)
+
+        if delay > 0:
+            with self._lock:
+                self._waits += 1
+                self._wait_seconds += delay
+
+        return delay
+
+    def acquire(self, api_endpoint):
+        """Block until a call to the given endpoint may be made"""
+        delay = self.reserve(api_endpoint)
+        if delay > 0:
+            time.sleep(delay)
+
+    def throttled(self, api_endpoint, seconds):
+        """Record that a call to the given endpoint was throttled, and hold back calls for the given seconds"""
+        for bucket in self.__buckets(api_endpoint):
+            bucket.pause(seconds)
+
+    def stats(self):
+        """
+        Returns
+        -------
+        dict with the number of 'waits' - calls that had to wait for a token - and the total 'wait_seconds'
+        """
+        with self._lock:
+            return {'waits': self._waits,
+                    'wait_seconds': self._wait_seconds}
+
+    def reset_stats(self):
+        with self._lock:
+            self._waits = 0
+            self._wait_seconds = 0.0
@@ -3,12 +3,17 @@
 # This software is released under the MIT License.
 # https://opensource.org/licenses/MIT
 
+from azure_databricks_api.__base import create_session, workspace_host, DEFAULT_POOL_CONNECTIONS, \
+    DEFAULT_POOL_MAXSIZE
+from azure_databricks_api.__cache import MetadataCache
 from azure_databricks_api.__clusters import ClusterAPI
 from azure_databricks_api.__groups import GroupsAPI
 from azure_databricks_api.__token import TokensAPI
 from azure_databricks_api.__workspace import WorkspaceAPI
 from azure_databricks_api.__dbfs import DbfsAPI
 from azure_databricks_api.__libraries import LibrariesAPI
+from azure_databricks_api.__jobs import JobsAPI
+from azure_databricks_api.__retry import RetryPolicy
 
 class AzureDatabricksRESTClient(object):
 
@@ -20,17 +25,94 @@ class AzureDatabricksRESTClient(object):
             Profiles Remove
     """
 
-    def __init__(self, region, token):
+    def __init__(self, region=None, token=None, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 pool_block=False, keep_alive=True, retry_policy=None, rate_limiter=None,
+                 cluster_index_ttl=60, metadata_cache=None, host=None,
+                 observers=None):
+        """
+        Parameters
+        ----------
+        region : str
+            The Azure region the workspace is located in. Not needed if host is given.
+
+        token : str
+            A Databricks Personal Access Token
+
+        pool_connections : int, optional, default=10
+            The number of per-host connection pools to cache
+
+        pool_maxsize : int, optional, default=10
+            The maximum number of keep-alive connections to the workspace. Set this to at least the number
+            of threads making calls through this client.
+
+        pool_block : bool, optional, default=False
+            If True, never open more than pool_maxsize connections to the workspace - callers wait for a free one
+
+        keep_alive : bool, optional, default=True
+            Reuse connections between API calls
+
+        retry_policy : RetryPolicy, optional
+            When and how long to wait before retrying throttled or failed calls. Defaults to RetryPolicy().
+            Pass RetryPolicy(max_attempts=1) to disable retries.
+
+        rate_limiter : RateLimiter, optional
+            Limits the rate of calls made through this client. Defaults to no limit.
+
+        cluster_index_ttl : float, optional, default=60
+            Seconds the cluster name to cluster ID index is reused for, by calls that take a cluster_name.
+            0 lists the clusters on every such call.
+
+        metadata_cache : MetadataCache, optional
+            Caches the available Spark versions and node types. Defaults to an in-memory MetadataCache that
+            keeps them for an hour. Pass MetadataCache(path=...) to reuse them between process runs.
+
+        host : str, optional
+            The base URL of the workspace, e.g. 'http://localhost:8080' for a local test server. Defaults to
+            https://{region}.azuredatabricks.net
+
+        observers : list of RequestObserver, optional
+            Called with the RequestMetrics - endpoint, status, bytes, timings and retries - of every request made
+            through this client. Pass a MetricsAggregator to collect latency histograms per endpoint. DNS and
+            connect times are only measured if observers are given here - observers added to client.observers
+            later get 0 for them.
+        """
+        if token is None:
+            raise ValueError("A token must be given")
+
         self._region = region
         self._token = token
-        self._host = 'https://{region}.azuredatabricks.net'.format(region=self._region)
+        self._host = workspace_host(region=region, host=host)
         self.api_version = '2.0'
 
-        parameters = {'host': self._host, 'api_version': self.api_version, 'token': self._token}
+        # One connection pool is shared by all of the API objects below
+        self._session = create_session(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                       pool_block=pool_block, keep_alive=keep_alive, timed_connections=bool(observers))
+
+        # The retry policy is shared too, so its stats() cover every call made through this client
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.observers = list(observers or [])
 
-        self.clusters = ClusterAPI(**parameters)
+        parameters = {'host': self._host, 'api_version': self.api_version, 'token': self._token,
+                      'session': self._session, 'retry_policy': self.retry_policy,
+                      'rate_limiter': self.rate_limiter, 'observers': self.observers}
+
+        self.metadata_cache = metadata_cache if metadata_cache is not None else MetadataCache()
+        self.clusters = ClusterAPI(cluster_index_ttl=cluster_index_ttl, metadata_cache=self.metadata_cache,
+                                   **parameters)
         self.groups = GroupsAPI(**parameters)
         self.tokens = TokensAPI(**parameters)
         self.workspace = WorkspaceAPI(**parameters)
         self.dbfs = DbfsAPI(**parameters)
-        self.libraries = LibrariesAPI(**parameters)
\ No newline at end of file
+        self.libraries = LibrariesAPI(**parameters)
+        self.jobs = JobsAPI(**parameters)
+
+    def close(self):
+        """Close all pooled connections to the workspace"""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
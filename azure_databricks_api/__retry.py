@@ -0,0 +1,154 @@
+# Copyright (c) 2018 Microsoft
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+def _parse_retry_after(value):
+    """
+    Parse the value of a Retry-After header - either a number of seconds or an HTTP date - into seconds
+
+    Returns None if the value can't be parsed
+    """
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RetryPolicy(object):
+    """
+    When and how long to wait before retrying a throttled (429) or failed (5xx) API call
+
+    Retries use exponential backoff with full jitter: before retry n, a random delay between 0 and
+    min(backoff_cap, backoff_base * 2 ** (n - 1)) seconds is chosen. If the response has a Retry-After header,
+    the delay is at least that long.
+
+    Only idempotent calls are retried: by default GET requests, plus the POST endpoints the API objects mark
+    as safe to repeat (e.g. mkdirs). Other POST endpoints can be opted in with retry_endpoints.
+
+    A RetryPolicy is shared by all of the API objects of a client, and counts the retries made through it.
+
+    Parameters
+    ----------
+    max_attempts : int, optional, default=5
+        The maximum number of times a call is made, including the first. 1 disables retries.
+
+    backoff_base : float, optional, default=0.5
+        The maximum delay, in seconds, before the first retry
+
+    backoff_cap : float, optional, default=30
+        The largest delay, in seconds, before any retry
+
+    retry_statuses : iterable of int, optional, default=(429, 500, 502, 503, 504)
+        The HTTP status codes that are retried
+
+    idempotent_methods : iterable of str, optional, default=('GET',)
+        HTTP methods that are always retried
+
+    retry_endpoints : iterable of str, optional
+        Additional API endpoints (e.g. 'dbfs/add-block') to retry regardless of the HTTP method
+
+    respect_retry_after : bool, optional, default=True
+        Wait at least as long as a response's Retry-After header asks
+    """
+
+    def __init__(self, max_attempts=5, backoff_base=0.5, backoff_cap=30.0, retry_statuses=(429, 500, 502, 503, 504),
+                 idempotent_methods=('GET',), retry_endpoints=(), respect_retry_after=True):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent_methods = frozenset(method.upper() for method in idempotent_methods)
+        self.retry_endpoints = frozenset(endpoint.lstrip('/') for endpoint in retry_endpoints)
+        self.respect_retry_after = respect_retry_after
+
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def is_retryable(self, method, api_endpoint, retry=False):
+        """
+        Whether a call may be retried at all
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method of the call
+        api_endpoint : str
+            The API endpoint of the call
+        retry : bool
+            True if the caller has marked this call as safe to repeat
+        """
+        return retry or method.upper() in self.idempotent_methods or api_endpoint.lstrip('/') in self.retry_endpoints
+
+    def should_retry(self, attempt, status_code=None):
+        """
+        Whether to retry after the given attempt (starting at 1) failed
+
+        Pass status_code=None if the attempt failed without a response (e.g. a connection error)
+        """
+        if attempt >= self.max_attempts:
+            return False
+
+        return status_code is None or status_code in self.retry_statuses
+
+    def get_delay(self, attempt, retry_after=None):
+        """
+        The number of seconds to wait before retrying the given attempt (starting at 1)
+
+        Parameters
+        ----------
+        attempt : int
+            The attempt that failed
+        retry_after : str, optional
+            The Retry-After header of the failed response
+        """
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** (attempt - 1)))
+
+        retry_after = _parse_retry_after(retry_after) if self.respect_retry_after else None
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        return delay
+
+    def record_retry(self, delay):
+        """Count a retry and the time spent waiting before it"""
+        with self._lock:
+            self._retries += 1
+            self._backoff_seconds += delay
+
+    def record_exhausted(self):
+        """Count a call that still failed after max_attempts"""
+        with self._lock:
+            self._exhausted += 1
+
+    def stats(self):
+        """
+        Returns
+        -------
+        dict with the number of 'retries' made, the total 'backoff_seconds' spent waiting before them, and the
+        number of calls 'exhausted' - that failed with a retryable error on every attempt
+        """
+        with self._lock:
+            return {'retries': self._retries,
+                    'backoff_seconds': self._backoff_seconds,
+                    'exhausted': self._exhausted}
+
+    def reset_stats(self):
+        with self._lock:
+            self._retries = 0
+            self._backoff_seconds = 0.0
+            self._exhausted = 0
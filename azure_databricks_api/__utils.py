@@ -3,12 +3,25 @@
 # This software is released under the MIT License.
 # https://opensource.org/licenses/MIT
 import base64
-import collections
+import collections.abc
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import wait, FIRST_COMPLETED
 
 import requests
 
 from azure_databricks_api.exceptions import APIError, AuthorizationError, ERROR_CODES
 
+SYNC_DIRECTIONS = ('push', 'pull')
+
+SyncTransfer = collections.namedtuple('SyncTransfer', ['source', 'destination', 'reason'])
+SyncPlan = collections.namedtuple('SyncPlan', ['direction', 'transfers', 'deletes', 'unchanged'])
+SyncReport = collections.namedtuple('SyncReport', ['plan', 'results', 'deleted', 'total_bytes', 'seconds',
+                                                   'bytes_per_second'])
+DeleteResult = collections.namedtuple('DeleteResult', ['path', 'error'])
+
 
 def dict_update(source, updates):
     """Update a nested dictionary or similar mapping.
@@ -18,7 +31,7 @@ def dict_update(source, updates):
     From REST_API_Py_Requests_Lib provided by Alex Zeltov
     """
     for key, value in updates.items():
-        if isinstance(value, collections.Mapping) and value:
+        if isinstance(value, collections.abc.Mapping) and value:
             returned = dict_update(source.get(key, {}), value)
             source[key] = returned
         else:
@@ -40,6 +53,209 @@ def file_content_to_b64(file):
     return encoded_content
 
 
+def file_sha256(file_path, chunk_size=1048576):
+    """The hex SHA-256 digest of a file's content, read chunk_size bytes at a time"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file_obj:
+        for chunk in iter(lambda: file_obj.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    """Load a sync manifest - a JSON object - returning an empty one if the file is missing or corrupt"""
+    try:
+        with open(path, 'r', encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_manifest(path, manifest):
+    """Save a sync manifest, writing a temporary file first so that a partly written manifest is never read"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def remove_local_file(path):
+    """Delete a local file, returning a DeleteResult"""
+    try:
+        os.remove(path)
+    except OSError as error:
+        return DeleteResult(path=path, error=error)
+
+    return DeleteResult(path=path, error=None)
+
+
+def delete_remote(delete, path):
+    """Delete a DBFS or workspace path with an API's delete method, returning a DeleteResult"""
+    try:
+        delete(path, not_exists_ok=True)
+    except Exception as error:
+        return DeleteResult(path=path, error=error)
+
+    return DeleteResult(path=path, error=None)
+
+
+class Base64JSONBody(object):
+    """
+    A file-like JSON request body with one field holding the base64 encoding of part of a file.
+
+    The encoding is produced incrementally as the body is read, so sending it needs memory for one small
+    encoded block rather than for the raw data, its base64 encoding and the JSON document. Base64 output
+    needs no JSON escaping, so the document is the JSON of the other fields with the encoded data spliced in.
+
+    Parameters
+    ----------
+        fields: dict of the other (JSON serializable) fields of the body
+        data_field: The name of the field holding the base64 encoded data
+        file_obj: A binary file object, opened for reading
+        offset: The position in file_obj of the first byte to encode
+        length: The number of bytes of file_obj to encode
+    """
+
+    # Must be a multiple of 3, so each block encodes without padding
+    BLOCK_SIZE = 3 * 16384
+
+    def __init__(self, fields, data_field, file_obj, offset, length):
+        head = json.dumps(fields, ensure_ascii=False)[:-1]
+        if fields:
+            head += ', '
+
+        self._prefix = (head + json.dumps(data_field) + ': "').encode('utf-8')
+        self._suffix = b'"}'
+        self._file_obj = file_obj
+        self._offset = offset
+        self._length = length
+        self._size = len(self._prefix) + 4 * ((length + 2) // 3) + len(self._suffix)
+        self.seek(0)
+
+    def __len__(self):
+        return self._size
+
+    def tell(self):
+        return self._position
+
+    def seek(self, position, whence=0):
+        """Rewind the body so it can be sent again. Only seeking to the start is supported."""
+        if position != 0 or whence != 0:
+            raise ValueError("A Base64JSONBody can only be rewound to the start")
+
+        self._position = 0
+        self._pending = self._prefix
+        self._remaining = self._length
+        self._suffix_sent = False
+        self._file_obj.seek(self._offset)
+        return 0
+
+    def __next_piece(self):
+        if self._remaining > 0:
+            raw = self._file_obj.read(min(self.BLOCK_SIZE, self._remaining))
+            if not raw:
+                raise EOFError("The file ended before {0} bytes were read".format(self._length))
+            self._remaining -= len(raw)
+            return base64.b64encode(raw)
+
+        if not self._suffix_sent:
+            self._suffix_sent = True
+            return self._suffix
+
+        return b''
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._size - self._position
+
+        pieces = []
+        wanted = size
+        while wanted > 0:
+            if not self._pending:
+                self._pending = self.__next_piece()
+                if not self._pending:
+                    break
+
+            piece, self._pending = self._pending[:wanted], self._pending[wanted:]
+            pieces.append(piece)
+            wanted -= len(piece)
+
+        data = b''.join(pieces)
+        self._position += len(data)
+        return data
+
+
+def minimal_directories(directories):
+    """
+    Reduce a collection of directory paths to the deepest ones - the paths that aren't a parent of any other path.
+
+    Creating each of the returned directories with its parents (e.g. with mkdirs) creates all of the given
+    directories.
+
+    Parameters
+    ----------
+        directories: An iterable of absolute, '/' separated directory paths
+
+    Returns
+    -------
+        list: The deepest directories, sorted
+    """
+    directories = {directory.rstrip('/') or '/' for directory in directories}
+
+    parents = set()
+    for directory in directories:
+        parent = directory.rsplit('/', 1)[0]
+        while parent and parent not in parents:
+            parents.add(parent)
+            parent = parent.rsplit('/', 1)[0]
+        parents.add('/')
+
+    return sorted(directories - parents)
+
+
+def walk_concurrently(executor, root, list_directory, is_directory):
+    """
+    Walk a remote directory tree, listing directories concurrently as soon as they are discovered.
+
+    Parameters
+    ----------
+        executor: The concurrent.futures.Executor used to list directories
+        root: The path of the directory to walk
+        list_directory: A function returning the entries (objects with a 'path' attribute) in a directory path
+        is_directory: A function returning True if an entry is a directory
+
+    Returns
+    -------
+        tuple: (directory entries, other entries) found below root, in the order they were discovered
+    """
+    directories, files = [], []
+
+    pending = {executor.submit(list_directory, root)}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            for entry in future.result():
+                if is_directory(entry):
+                    directories.append(entry)
+                    pending.add(executor.submit(list_directory, entry.path))
+                else:
+                    files.append(entry)
+
+    return directories, files
+
+
 def choose_exception(response: requests.Response) -> Exception:
     """ Choose the correct error handling message if status is not 200
 
@@ -55,10 +271,16 @@ def choose_exception(response: requests.Response) -> Exception:
         return_error = AuthorizationError("User is not authorized or token is incorrect.")
 
     else:  # pragma: no cover
-        if response.json().get("error_code") in ERROR_CODES:
-            return_error = ERROR_CODES[response.json().get('error_code')](response.json().get('message'))
+        # Gateways can return non-JSON error pages (e.g. for a 502 or 503)
+        try:
+            error = response.json()
+        except ValueError:
+            error = {'message': response.content[:200]}
+
+        if error.get("error_code") in ERROR_CODES:
+            return_error = ERROR_CODES[error.get('error_code')](error.get('message'))
         else:
             return_error = APIError("Response code {0}: {1} {2}".format(response.status_code,
-                                                                        response.json().get('error_code'),
-                                                                        response.json().get('message')))
+                                                                        error.get('error_code'),
+                                                                        error.get('message')))
     return return_error
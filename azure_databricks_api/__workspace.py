@@ -3,19 +3,193 @@
 # This software is released under the MIT License.
 # https://opensource.org/licenses/MIT
 
+import os
+import posixpath
+import threading
+import time
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 from azure_databricks_api.__base import RESTBase
-from azure_databricks_api.__utils import url_content_to_b64, file_content_to_b64
+from azure_databricks_api.__dbfs import TransferResult
+from azure_databricks_api.__utils import url_content_to_b64, file_content_to_b64, minimal_directories, \
+    walk_concurrently, file_sha256, load_manifest, remove_local_file, save_manifest, SYNC_DIRECTIONS, SyncTransfer, \
+    SyncPlan, SyncReport, delete_remote
 from azure_databricks_api.exceptions import APIError, UnknownFormat, \
-    AuthorizationError, ERROR_CODES
+    AuthorizationError, ResourceDoesNotExist, ERROR_CODES
 
-WorkspaceObjectInfo = namedtuple("ObjectInfo", ['object_type', 'path', 'language', 'object_id'])
-WorkspaceObjectInfo.__new__.__defaults__ = (None, [None, None, None, None])
+WorkspaceObjectInfo = namedtuple("ObjectInfo", ['object_type', 'path', 'language', 'object_id', 'modified_at'])
+WorkspaceObjectInfo.__new__.__defaults__ = (None, ) * len(WorkspaceObjectInfo._fields)
 
 EXPORT_FORMATS = ['SOURCE', 'JUPYTER', 'DBC', 'HTML']
 LANGUAGES = ['PYTHON', 'R', 'SQL', 'SCALA']
 
+# Bytes of an export read into memory at a time
+EXPORT_CHUNK_SIZE = 1048576
+
+# The file extension of an exported notebook - by language for SOURCE, otherwise by format
+SOURCE_EXTENSIONS = {'PYTHON': '.py', 'SCALA': '.scala', 'SQL': '.sql', 'R': '.r'}
+FORMAT_EXTENSIONS = {'JUPYTER': '.ipynb', 'HTML': '.html', 'DBC': '.dbc'}
+
+# The format and language a local file is imported as, by its extension
+IMPORT_EXTENSIONS = dict([(extension, ('SOURCE', language)) for language, extension in SOURCE_EXTENSIONS.items()] +
+                         [(extension, (file_format, '')) for file_format, extension in FORMAT_EXTENSIONS.items()])
+
+# Object types that list() can be called on
+CONTAINER_OBJECT_TYPES = ('DIRECTORY', 'REPO')
+
+# The file, in the local directory of an export_tree, recording the notebooks already exported
+EXPORT_JOURNAL = '.export_journal'
+
+# The file, in the local directory of a sync, recording the notebooks as they were when last synced
+SYNC_MANIFEST = '.workspace_sync.json'
+
+ExportReport = namedtuple("ExportReport", ['results', 'skipped', 'total_bytes', 'seconds', 'bytes_per_second'])
+ImportReport = namedtuple("ImportReport", ['results', 'skipped', 'total_bytes', 'seconds', 'bytes_per_second'])
+
+
+def _workspace_object(obj):
+    """A WorkspaceObjectInfo from an object returned by the API, ignoring any fields it doesn't have"""
+    return WorkspaceObjectInfo(**{field: value for field, value in obj.items()
+                                  if field in WorkspaceObjectInfo._fields})
+
+
+@contextmanager
+def _export_destination(file_path):
+    """
+    Open the destination of an export for writing - or use it as it is, if it is already a writable file-like
+    object. A file that was opened here is removed if the export fails, so no partial export is left behind.
+    """
+    if hasattr(file_path, 'write'):
+        yield file_path
+        return
+
+    try:
+        with open(file_path, 'wb') as file_obj:
+            yield file_obj
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+
+def _export_extension(language, file_format):
+    """The extension of a notebook in the given language exported in the given format"""
+    if file_format.upper() == 'SOURCE':
+        return SOURCE_EXTENSIONS.get((language or '').upper(), '')
+
+    return FORMAT_EXTENSIONS[file_format.upper()]
+
+
+def _tree_report(report_type, results, skipped, start_time):
+    """Summarize the TransferResults of an export_tree or import_tree into an ExportReport or ImportReport"""
+    elapsed = time.time() - start_time
+    total_bytes = sum(result.bytes for result in results)
+
+    return report_type(results=results, skipped=skipped, total_bytes=total_bytes, seconds=elapsed,
+                       bytes_per_second=total_bytes / elapsed if elapsed > 0 else 0.0)
+
+
+class _ExportJournal(object):
+    """
+    The local files written by an export_tree that hasn't finished yet, one per line - so an export_tree that
+    is run again after failing or being interrupted skips them
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        try:
+            with open(path, 'r', encoding='utf-8') as journal_file:
+                self.completed = set(journal_file.read().splitlines())
+        except FileNotFoundError:
+            self.completed = set()
+
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def record(self, relative_path):
+        with self._lock:
+            self._file.write(relative_path + '\n')
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _local_source_notebooks(local_dir):
+    """
+    The source notebooks below a local directory - the files with an extension in SOURCE_EXTENSIONS, excluding
+    hidden files and directories - as a dict of their '/' separated path relative to local_dir, without the
+    extension, to (file path, language)
+    """
+    languages = {extension: language for language, extension in SOURCE_EXTENSIONS.items()}
+
+    notebooks = {}
+    for root, dir_names, file_names in os.walk(local_dir):
+        dir_names[:] = [name for name in dir_names if not name.startswith('.')]
+
+        relative_root = os.path.relpath(root, local_dir).replace(os.sep, '/')
+        for file_name in file_names:
+            name, extension = os.path.splitext(file_name)
+            if file_name.startswith('.') or extension.lower() not in languages:
+                continue
+
+            relative_path = name if relative_root == '.' else relative_root + '/' + name
+            if relative_path in notebooks:
+                raise ValueError("{0} and {1} would both be synced with the notebook {2}."
+                                 .format(notebooks[relative_path][0], os.path.join(root, file_name), relative_path))
+
+            notebooks[relative_path] = (os.path.join(root, file_name), languages[extension.lower()])
+
+    return notebooks
+
+
+def _notebook_sync_reason(entry, obj, content_hash, language):
+    """
+    Why a notebook needs to be synced - 'new' or 'changed' - or None if it is unchanged since its manifest entry
+
+    obj is the workspace notebook, and content_hash and language describe the local file - any of them are None
+    if the notebook is missing on that side.
+    """
+    if obj is None or content_hash is None:
+        return 'new'
+
+    if entry is None or entry.get('hash') != content_hash or entry.get('language') != language:
+        return 'changed'
+
+    if entry.get('object_id') != obj.object_id or entry.get('modified_at') != obj.modified_at:
+        return 'changed'
+
+    return None
+
+
+def _validate_import(file_format, language, url, filepath):
+    """Raise an AttributeError if the arguments to a workspace import are inconsistent"""
+    # url XOR filepath defined
+    if not (url or filepath):
+        raise AttributeError("Must pass either URL or filepath to Workspace Import")
+    elif file_format.upper() == 'SOURCE' and language.upper() not in LANGUAGES:
+        raise AttributeError("If file_format=SOURCE, language must be Scala, Jupyter, Python or R")
+    elif file_format.upper() not in EXPORT_FORMATS:
+        raise AttributeError("File format must be SOURCE, DBC, JUPYTER or HTML")
+
+
+def _build_import_payload(dbx_path, file_format, language, overwrite, content):
+    """Build the JSON payload sent to workspace/import from base64 encoded content"""
+    data = {
+        "content": content.decode('utf-8'),
+        "format": file_format.upper(),
+        "overwrite": overwrite,
+        "path": dbx_path
+    }
+
+    if file_format.upper() == 'SOURCE':
+        data['language'] = language.upper()
+
+    return data
+
 
 class WorkspaceAPI(RESTBase):
 
@@ -77,20 +251,27 @@ class WorkspaceAPI(RESTBase):
                                                                    resp.json().get('error_code'),
                                                                    resp.json().get('message')))
 
-    def export(self, dbx_path, file_path, file_format='DBC'):
+    def export(self, dbx_path, file_path, file_format='DBC', chunk_size=EXPORT_CHUNK_SIZE):
         """ Exports the Databricks path to a file on the local PC.
 
+        The export is streamed to the file chunk_size bytes at a time, so memory use doesn't grow with the size
+        of the notebook or archive.
+
         Parameters
         ----------
         dbx_path : str
             The path, in the Databricks workspace, to export
 
-        file_path : str
-            The path, on the local PC, where the file should be created
+        file_path : str or file-like object
+            The path, on the local PC, where the file should be created - or a binary file-like object to write
+            the export to
 
         file_format: str, optional
             The format of the file to be saved. Defaults to DBC. Must be in SOURCT
 
+        chunk_size : int, optional, default=1048576
+            The number of bytes read from the response and written at a time
+
         Returns
         -------
         file_path if successful
@@ -110,17 +291,19 @@ class WorkspaceAPI(RESTBase):
         API_PATH = '/workspace/export'
 
         if file_format.upper() not in EXPORT_FORMATS:
-            raise UnknownFormat('{0} is not a supported format type. Please use DBC, SOURCE, HTML, or JUPYTER')
+            raise UnknownFormat('{0} is not a supported format type. Please use DBC, SOURCE, HTML, or JUPYTER'
+                                .format(file_format))
 
         data = {'path': dbx_path,
                 'format': file_format,
                 'direct_download': True}
 
-        resp = self._rest_call[METHOD](API_PATH, data=data)
+        resp = self._rest_call[METHOD](API_PATH, data=data, stream=True)
 
         if resp.status_code == 200:
-            with open(file_path, 'wb+') as fo:
-                fo.write(resp.content)
+            with resp, _export_destination(file_path) as fo:
+                for chunk in resp.iter_content(chunk_size=chunk_size):
+                    fo.write(chunk)
 
             return file_path
 
@@ -135,6 +318,314 @@ class WorkspaceAPI(RESTBase):
                                                                    resp.json().get('error_code'),
                                                                    resp.json().get('message')))
 
+    def export_tree(self, workspace_path, local_dir, file_format='SOURCE', overwrite=False, workers=8,
+                    chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Exports the notebooks below a workspace directory, recursively, to a local directory
+
+        The workspace tree is discovered with concurrent list calls, and notebooks are exported concurrently.
+        Each notebook is saved at its path relative to workspace_path, with an extension for its language (in
+        SOURCE format) or for the format. For best performance, the client's pool_maxsize should be at least
+        the number of workers.
+
+        Each export is written to a '.part' file that is renamed once complete, and recorded in a journal file
+        (.export_journal) in local_dir. If the export_tree fails or is interrupted, running it again skips the
+        notebooks already exported. The journal is removed once every notebook has been exported.
+
+        Parameters
+        ----------
+        workspace_path : str
+            The workspace directory to be exported, e.g. /Users or /Shared
+        local_dir : str
+            The local directory the notebooks are saved into. It is created if it doesn't exist.
+        file_format : str, optional, default='SOURCE'
+            The format the notebooks are exported in - SOURCE, JUPYTER, HTML or DBC
+        overwrite : bool, optional
+            If a file exists at the destination, and wasn't exported by an unfinished run of export_tree,
+            overwrite the file
+        workers : int, optional, default=8
+            The number of list calls or notebooks exported at the same time
+        chunk_size : int, optional, default=1048576
+            The number of bytes of each export read and written at a time
+
+        Returns
+        -------
+        ExportReport named tuple with a TransferResult per notebook exported (source, destination, bytes, seconds
+        and error - the exception raised if the notebook failed to export, otherwise None), the workspace paths
+        of the notebooks skipped because they were already exported, the total bytes exported, the elapsed
+        seconds and the overall bytes per second
+
+        Raises
+        ------
+        UnknownFormat:
+            If file_format is not one of the supported formats
+
+        ResourceDoesNotExist:
+            If workspace_path does not exist
+        """
+        start_time = time.time()
+
+        if file_format.upper() not in EXPORT_FORMATS:
+            raise UnknownFormat('{0} is not a supported format type. Please use DBC, SOURCE, HTML, or JUPYTER'
+                                .format(file_format))
+
+        def relative_path(obj):
+            relative = posixpath.relpath(obj.path, workspace_path)
+            if obj.object_type == 'NOTEBOOK':
+                relative += _export_extension(obj.language, file_format)
+            return relative
+
+        def local_path(relative):
+            return os.path.join(local_dir, *relative.split('/'))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            directories, objects = walk_concurrently(executor, workspace_path, self.list,
+                                                     lambda obj: obj.object_type in CONTAINER_OBJECT_TYPES)
+
+            os.makedirs(local_dir, exist_ok=True)
+            for directory in directories:
+                os.makedirs(local_path(relative_path(directory)), exist_ok=True)
+
+            journal = _ExportJournal(os.path.join(local_dir, EXPORT_JOURNAL))
+
+            skipped, exports = [], []
+            for obj in objects:
+                if obj.object_type != 'NOTEBOOK':
+                    continue
+
+                relative = relative_path(obj)
+                if relative in journal.completed and os.path.exists(local_path(relative)):
+                    skipped.append(obj.path)
+                else:
+                    exports.append((obj, relative))
+
+            try:
+                results = list(executor.map(lambda export: self.__export_one(export[0], export[1],
+                                                                             local_path(export[1]),
+                                                                             file_format=file_format,
+                                                                             overwrite=overwrite,
+                                                                             chunk_size=chunk_size,
+                                                                             journal=journal),
+                                            exports))
+            finally:
+                journal.close()
+
+        if all(result.error is None for result in results):
+            os.remove(journal.path)
+
+        return _tree_report(ExportReport, results, skipped, start_time)
+
+    def __export_one(self, obj, relative_path, local_path, file_format, overwrite, chunk_size, journal):
+        start_time = time.time()
+        try:
+            if os.path.exists(local_path) and not overwrite:
+                raise FileExistsError("The local path {0} already exists.".format(local_path))
+
+            # Export to a temporary file, so an interrupted export never leaves a partial notebook behind
+            self.export(obj.path, local_path + '.part', file_format=file_format, chunk_size=chunk_size)
+            os.replace(local_path + '.part', local_path)
+            journal.record(relative_path)
+        except Exception as error:
+            return TransferResult(source=obj.path, destination=local_path, bytes=0,
+                                  seconds=time.time() - start_time, error=error)
+
+        return TransferResult(source=obj.path, destination=local_path, bytes=os.path.getsize(local_path),
+                              seconds=time.time() - start_time, error=None)
+
+    def sync(self, local_dir, workspace_path, direction='push', delete=False, dry_run=False, workers=8,
+             manifest_path=None):
+        """
+        Synchronizes the source notebooks of a local directory and a workspace directory, transferring only the
+        notebooks that have changed
+
+        A manifest - by default .workspace_sync.json in local_dir - records the content hash, language, object_id
+        and modification time of each notebook as of its last sync. A notebook is transferred if it is new, if
+        its local content or language no longer match the manifest, or if its workspace object_id or
+        modification time do. Unchanged notebooks aren't transferred, so a sync after a one-notebook change
+        makes a single import or export.
+
+        Only source notebooks are synced: local files with a .py, .scala, .sql or .r extension, and workspace
+        notebooks exported in SOURCE format with the extension of their language.
+
+        Parameters
+        ----------
+        local_dir : str
+            The local directory of notebooks
+        workspace_path : str
+            The workspace directory of notebooks
+        direction : str, optional, default='push'
+            'push' imports changed local notebooks to the workspace; 'pull' exports changed workspace notebooks
+            to local_dir
+        delete : bool, optional
+            Also delete the notebooks at the destination that were synced before but have since been removed
+            from the source. Notebooks that were never synced aren't deleted.
+        dry_run : bool, optional
+            Return the plan without transferring or deleting anything
+        workers : int, optional, default=8
+            The number of list calls, or notebooks transferred, at the same time
+        manifest_path : str, optional
+            The manifest file to use, instead of .workspace_sync.json in local_dir
+
+        Returns
+        -------
+        SyncReport named tuple with the SyncPlan (the direction, a SyncTransfer per notebook to be transferred -
+        its source, destination and the reason, 'new' or 'changed' - the paths to be deleted and the number of
+        unchanged notebooks), a TransferResult per notebook transferred, a DeleteResult per path deleted, the
+        total bytes transferred, the elapsed seconds and the overall bytes per second
+
+        Raises
+        ------
+        ValueError:
+            If direction is not 'push' or 'pull', or two local files would be synced with the same notebook
+
+        FileNotFoundError:
+            If direction is 'push' and local_dir is not a directory
+
+        ResourceAlreadyExists:
+            If direction is 'push' and a workspace directory can't be created because a notebook exists at that path
+
+        ResourceDoesNotExist:
+            If direction is 'pull' and workspace_path does not exist
+        """
+        if direction not in SYNC_DIRECTIONS:
+            raise ValueError("direction must be one of {0}".format(', '.join(SYNC_DIRECTIONS)))
+
+        # A mistyped local_dir must not look like an empty one, or a push with delete would remove every notebook
+        # in the manifest
+        if direction == 'push' and not os.path.isdir(local_dir):
+            raise FileNotFoundError("The local directory {0} does not exist.".format(local_dir))
+
+        start_time = time.time()
+        workspace_path = workspace_path.rstrip('/') or '/'
+        manifest_path = manifest_path or os.path.join(local_dir, SYNC_MANIFEST)
+
+        manifest = load_manifest(manifest_path)
+        # A manifest of another workspace directory says nothing about this one
+        entries = manifest.get('notebooks', {}) if manifest.get('workspace_path') == workspace_path else {}
+
+        local = _local_source_notebooks(local_dir) if os.path.isdir(local_dir) else {}
+
+        def workspace_notebook(relative_path):
+            return posixpath.join(workspace_path, relative_path)
+
+        def local_notebook(relative_path, language):
+            return os.path.join(local_dir, *relative_path.split('/')) + SOURCE_EXTENSIONS.get(language, '')
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                directories, objects = walk_concurrently(executor, workspace_path, self.list,
+                                                         lambda obj: obj.object_type in CONTAINER_OBJECT_TYPES)
+                existing_directories = {workspace_path} | {directory.path for directory in directories}
+            except ResourceDoesNotExist:
+                if direction == 'pull':
+                    raise
+                objects, existing_directories = [], set()
+
+            remote = {posixpath.relpath(obj.path, workspace_path): obj for obj in objects
+                      if obj.object_type == 'NOTEBOOK' and obj.language in SOURCE_EXTENSIONS}
+            hashes = dict(zip(local, executor.map(lambda notebook: file_sha256(notebook[0]), local.values())))
+
+            changes, deletes, unchanged = [], [], 0
+            if direction == 'push':
+                for relative_path, (file_path, language) in sorted(local.items()):
+                    reason = _notebook_sync_reason(entries.get(relative_path), remote.get(relative_path),
+                                                   hashes[relative_path], language)
+                    if reason:
+                        changes.append((relative_path, SyncTransfer(file_path, workspace_notebook(relative_path),
+                                                                    reason)))
+                    else:
+                        unchanged += 1
+
+                deletes = [workspace_notebook(relative_path) for relative_path in sorted(entries)
+                           if relative_path not in local and relative_path in remote]
+            else:
+                for relative_path, obj in sorted(remote.items()):
+                    file_path, language = local.get(relative_path, (None, None))
+                    reason = _notebook_sync_reason(entries.get(relative_path), obj, hashes.get(relative_path), language)
+                    if reason:
+                        changes.append((relative_path, SyncTransfer(obj.path, local_notebook(relative_path,
+                                                                                             obj.language), reason)))
+                    else:
+                        unchanged += 1
+
+                deletes = [local[relative_path][0] for relative_path in sorted(entries)
+                           if relative_path not in remote and relative_path in local]
+
+            plan = SyncPlan(direction=direction, transfers=[transfer for _, transfer in changes],
+                            deletes=deletes if delete else [], unchanged=unchanged)
+
+            if dry_run:
+                return SyncReport(plan=plan, results=[], deleted=[], total_bytes=0,
+                                  seconds=time.time() - start_time, bytes_per_second=0.0)
+
+            if direction == 'push':
+                parents = {posixpath.dirname(transfer.destination) for transfer in plan.transfers}
+                list(executor.map(self.mkdirs, minimal_directories(parents - existing_directories)))
+
+                synced = list(executor.map(lambda change: self.__push_one(change[1], local[change[0]][1],
+                                                                          hashes[change[0]]),
+                                           changes))
+                deleted = list(executor.map(lambda path: delete_remote(self.delete, path), plan.deletes))
+            else:
+                synced = list(executor.map(lambda change: self.__pull_one(change[1], remote[change[0]]), changes))
+                deleted = [remove_local_file(path) for path in plan.deletes]
+
+        # Keep the entries of the notebooks that are in sync, and forget those that were deleted
+        entries = {relative_path: entry for relative_path, entry in entries.items()
+                   if relative_path in local or relative_path in remote}
+        for (relative_path, _), (result, entry) in zip(changes, synced):
+            if result.error is None:
+                entries[relative_path] = entry
+            else:
+                entries.pop(relative_path, None)
+        for result in deleted:
+            if result.error is None:
+                relative_path = (posixpath.relpath(result.path, workspace_path) if direction == 'push' else
+                                 os.path.splitext(os.path.relpath(result.path, local_dir))[0].replace(os.sep, '/'))
+                entries.pop(relative_path, None)
+
+        save_manifest(manifest_path, {'workspace_path': workspace_path, 'notebooks': entries})
+
+        results = [result for result, _ in synced]
+        elapsed = time.time() - start_time
+        total_bytes = sum(result.bytes for result in results)
+
+        return SyncReport(plan=plan, results=results, deleted=deleted, total_bytes=total_bytes, seconds=elapsed,
+                          bytes_per_second=total_bytes / elapsed if elapsed > 0 else 0.0)
+
+    def __push_one(self, transfer, language, content_hash):
+        start_time = time.time()
+        try:
+            self.import_file(transfer.destination, 'SOURCE', language=language, overwrite=True,
+                             filepath=transfer.source)
+            obj = self.get_status(transfer.destination)
+        except Exception as error:
+            return TransferResult(source=transfer.source, destination=transfer.destination, bytes=0,
+                                  seconds=time.time() - start_time, error=error), None
+
+        entry = {'hash': content_hash, 'language': language, 'object_id': obj.object_id,
+                 'modified_at': obj.modified_at}
+        return TransferResult(source=transfer.source, destination=transfer.destination,
+                              bytes=os.path.getsize(transfer.source), seconds=time.time() - start_time,
+                              error=None), entry
+
+    def __pull_one(self, transfer, obj):
+        start_time = time.time()
+        try:
+            os.makedirs(os.path.dirname(transfer.destination), exist_ok=True)
+
+            self.export(obj.path, transfer.destination + '.part', file_format='SOURCE')
+            os.replace(transfer.destination + '.part', transfer.destination)
+        except Exception as error:
+            return TransferResult(source=transfer.source, destination=transfer.destination, bytes=0,
+                                  seconds=time.time() - start_time, error=error), None
+
+        entry = {'hash': file_sha256(transfer.destination), 'language': obj.language, 'object_id': obj.object_id,
+                 'modified_at': obj.modified_at}
+        return TransferResult(source=transfer.source, destination=transfer.destination,
+                              bytes=os.path.getsize(transfer.destination), seconds=time.time() - start_time,
+                              error=None), entry
+
     def get_status(self, path):
         """ Gets the status of a given Databricks path
 
@@ -163,7 +654,7 @@ class WorkspaceAPI(RESTBase):
 
         # Process response
         if resp.status_code == 200:
-            return WorkspaceObjectInfo(**resp.json())
+            return _workspace_object(resp.json())
 
         elif resp.status_code == 403:
             raise AuthorizationError("User is not authorized or token is incorrect.")
@@ -225,30 +716,18 @@ class WorkspaceAPI(RESTBase):
         METHOD = 'POST'
         API_PATH = '/workspace/import'
 
-        # url XOR filepath defined
-        if not (url or filepath):
-            raise AttributeError("Must pass either URL or filepath to Workspace Import")
-        elif file_format.upper() == 'SOURCE' and language.upper() not in LANGUAGES:
-            raise AttributeError("If file_format=SOURCE, language must be Scala, Jupyter, Python or R")
-        elif file_format.upper() not in EXPORT_FORMATS:
-            raise AttributeError("File format must be SOURCE, DBC, JUPYTER or HTML")
+        _validate_import(file_format=file_format, language=language, url=url, filepath=filepath)
 
         if url:
             content = url_content_to_b64(url)
         else:
             content = file_content_to_b64(filepath)
 
-        data = {
-            "content": content.decode('utf-8'),
-            "format": file_format.upper(),
-            "overwrite": overwrite,
-            "path": dbx_path
-        }
+        data = _build_import_payload(dbx_path=dbx_path, file_format=file_format, language=language,
+                                     overwrite=overwrite, content=content)
 
-        if file_format.upper() == 'SOURCE':
-            data['language'] = language.upper()
-
-        resp = self._rest_call[METHOD](API_PATH, data=data)
+        # Without overwrite, repeating an import that reached the server fails on the notebook it created
+        resp = self._rest_call[METHOD](API_PATH, data=data, retry=overwrite)
 
         if resp.status_code == 200:
             return dbx_path
@@ -264,6 +743,93 @@ class WorkspaceAPI(RESTBase):
                                                                    resp.json().get('error_code'),
                                                                    resp.json().get('message')))
 
+    def import_tree(self, local_dir, workspace_path, overwrite=False, workers=8):
+        """
+        Imports the notebooks in a local directory, recursively, to a workspace directory
+
+        The format and language of each file is inferred from its extension: .py, .scala, .sql and .r files are
+        imported as SOURCE in their language, and .ipynb, .html and .dbc files as JUPYTER, HTML and DBC. Each
+        file is imported at its path relative to local_dir, without the extension. Files with other extensions,
+        and hidden files and directories (such as .git), are skipped.
+
+        The workspace directories are created first - only the deepest directories of the tree are sent to
+        mkdirs. Files are then imported concurrently with import_file. For best performance, the client's
+        pool_maxsize should be at least the number of workers.
+
+        Parameters
+        ----------
+        local_dir : str
+            The local directory to be imported
+        workspace_path : str
+            The workspace directory the contents of local_dir are imported into
+        overwrite : bool, optional
+            If an object exists at the destination, overwrite it (not supported for DBC)
+        workers : int, optional, default=8
+            The number of directories created, or files imported, at the same time
+
+        Returns
+        -------
+        ImportReport named tuple with a TransferResult per file imported (source, destination, bytes, seconds and
+        error - the exception raised if the file failed to import, otherwise None), the local paths of the files
+        skipped because their extension isn't a notebook format, the total bytes imported, the elapsed seconds
+        and the overall bytes per second
+
+        Raises
+        ------
+        FileNotFoundError:
+            If local_dir is not a directory
+
+        ResourceAlreadyExists:
+            If a workspace directory can't be created because a notebook exists at that path
+        """
+        if not os.path.isdir(local_dir):
+            raise FileNotFoundError("The local directory {0} does not exist.".format(local_dir))
+
+        workspace_path = workspace_path.rstrip('/')
+        start_time = time.time()
+
+        directories = {workspace_path or '/'}
+        imports, skipped = {}, []
+        for root, dir_names, file_names in os.walk(local_dir):
+            dir_names[:] = sorted(name for name in dir_names if not name.startswith('.'))
+
+            relative_root = os.path.relpath(root, local_dir).replace(os.sep, '/')
+            workspace_root = workspace_path if relative_root == '.' else workspace_path + '/' + relative_root
+
+            directories.add(workspace_root)
+            for file_name in sorted(file_names):
+                file_path = os.path.join(root, file_name)
+                name, extension = os.path.splitext(file_name)
+
+                if file_name.startswith('.') or extension.lower() not in IMPORT_EXTENSIONS:
+                    skipped.append(file_path)
+                    continue
+
+                imports.setdefault(workspace_root + '/' + name, []).append(file_path)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(self.mkdirs, minimal_directories(directories)))
+
+            results = list(executor.map(lambda item: self.__import_one(item[1], item[0], overwrite=overwrite),
+                                        sorted(imports.items())))
+
+        return _tree_report(ImportReport, results, skipped, start_time)
+
+    def __import_one(self, file_paths, dbx_path, overwrite):
+        start_time = time.time()
+        try:
+            if len(file_paths) > 1:
+                raise ValueError("{0} would all be imported to {1}.".format(', '.join(file_paths), dbx_path))
+
+            file_format, language = IMPORT_EXTENSIONS[os.path.splitext(file_paths[0])[1].lower()]
+            self.import_file(dbx_path, file_format, language=language, overwrite=overwrite, filepath=file_paths[0])
+        except Exception as error:
+            return TransferResult(source=file_paths[0], destination=dbx_path, bytes=0,
+                                  seconds=time.time() - start_time, error=error)
+
+        return TransferResult(source=file_paths[0], destination=dbx_path, bytes=os.path.getsize(file_paths[0]),
+                              seconds=time.time() - start_time, error=None)
+
     def list(self, path):
         """Lists the contents of the given director
 
@@ -293,7 +859,7 @@ class WorkspaceAPI(RESTBase):
         # Process response
         if resp.status_code == 200:
             if resp.json().get('objects'):
-                return [WorkspaceObjectInfo(**obj) for obj in resp.json().get('objects')]
+                return [_workspace_object(obj) for obj in resp.json().get('objects')]
             else:
                 return []
 
@@ -340,7 +906,9 @@ class WorkspaceAPI(RESTBase):
         API_PATH = '/workspace/mkdirs'
 
         data = {'path': path}
-        resp = self._rest_call[METHOD](API_PATH, data=data)
+        # A retry finds the directory made by an attempt that reached the server, which mkdirs accepts. Only an object
+        # that is not a directory raises RESOURCE_ALREADY_EXISTS, and the first attempt can't have created one.
+        resp = self._rest_call[METHOD](API_PATH, data=data, retry=True)
 
         # Process response
         if resp.status_code == 200:
@@ -60,6 +60,22 @@ class InvalidState(HTTPError):
     """The cluster is in an invalid state for the given request"""
 
 
+class RequestLimitExceeded(HTTPError):
+    """The workspace's request rate limit was exceeded"""
+
+
+class TemporarilyUnavailable(HTTPError):
+    """The service is temporarily unavailable"""
+
+
+class TransferFailed(Exception):
+    """Raise this exception if some of the files of a directory transfer failed. report is its TransferReport."""
+
+    def __init__(self, message, report):
+        super(TransferFailed, self).__init__(message)
+        self.report = report
+
+
 ERROR_CODES = {
     "RESOURCE_DOES_NOT_EXIST": ResourceDoesNotExist,
     "RESOURCE_ALREADY_EXISTS": ResourceAlreadyExists,
@@ -69,5 +85,7 @@ ERROR_CODES = {
     "IO_ERROR": IoError,
     "INVALID_PARAMETER_VALUE": InvalidParameterValue,
     "DIRECTORY_NOT_EMPTY": DirectoryNotEmpty,
-    "INVALID_STATE": InvalidState
+    "INVALID_STATE": InvalidState,
+    "REQUEST_LIMIT_EXCEEDED": RequestLimitExceeded,
+    "TEMPORARILY_UNAVAILABLE": TemporarilyUnavailable
 }
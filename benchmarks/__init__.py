@@ -0,0 +1,7 @@
+"""
+Benchmarks of the client's hot paths, run offline against the stand-in server in tests/fake_server.py
+
+    python -m benchmarks run --output after.json
+    python -m benchmarks compare before.json after.json
+    python -m benchmarks compare-refs master HEAD
+"""
@@ -0,0 +1,141 @@
+"""
+Command line entry point
+
+    python -m benchmarks run [--suite dbfs ...] [--repeat 20] [--latency 0.005] [--output results.json]
+    python -m benchmarks compare BASE.json NEW.json [--threshold 0.1]
+    python -m benchmarks compare-refs BASE_REF [NEW_REF] [--suite ...]
+
+compare and compare-refs exit with status 1 if any case regressed.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(args):
+    # The library is imported from --library, so the same benchmarks can time another checkout of it
+    library_path = os.path.abspath(args.library) if args.library else REPO_ROOT
+    sys.path.insert(0, library_path)
+
+    from benchmarks.harness import run_suites, save, print_result
+    from benchmarks.suites import SUITES
+
+    suites = {name: SUITES[name] for name in (args.suite or SUITES)}
+    workdir = tempfile.mkdtemp(prefix='benchmarks-')
+    try:
+        results = run_suites(suites, workdir, repeat=args.repeat, latency=args.latency, library_path=library_path,
+                             report=None if args.quiet else print_result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        save(results, args.output)
+    return 0
+
+
+def print_comparison(base, new, threshold):
+    from benchmarks.harness import compare, format_result
+
+    rows = compare(base, new, threshold)
+    print('base: {0}, new: {1}'.format(base.get('commit') or '-', new.get('commit') or '-'))
+    for name, old, current, regressed in rows:
+        change = ''
+        if old and current and 'error' not in old and 'error' not in current and old['p50_ms']:
+            change = ' (p50 {0:+.0%})'.format(current['p50_ms'] / old['p50_ms'] - 1)
+
+        print('{0}{1}{2}'.format('REGRESSED ' if regressed else '', name, change))
+        print('    base  {0}'.format(format_result(old)))
+        print('    new   {0}'.format(format_result(current)))
+
+    regressions = [row for row in rows if row[3]]
+    print('{0} of {1} cases regressed'.format(len(regressions), len(rows)))
+    return 1 if regressions else 0
+
+
+def compare_files(args):
+    from benchmarks.harness import load
+
+    return print_comparison(load(args.base), load(args.new), args.threshold)
+
+
+def compare_refs(args):
+    """Run the benchmarks of this checkout against the library at two git refs, and compare them"""
+    from benchmarks.harness import load
+
+    tempdir = tempfile.mkdtemp(prefix='benchmarks-')
+    results = []
+    try:
+        for index, ref in enumerate([args.base, args.new]):
+            library_path = REPO_ROOT
+            if ref is not None:
+                library_path = os.path.join(tempdir, 'checkout-{0}'.format(index))
+                subprocess.check_call(['git', 'worktree', 'add', '--detach', '--quiet', library_path, ref],
+                                      cwd=REPO_ROOT)
+
+            output = os.path.join(tempdir, 'results-{0}.json'.format(index))
+            command = [sys.executable, '-m', 'benchmarks', 'run', '--library', library_path, '--output', output,
+                       '--repeat', str(args.repeat), '--latency', str(args.latency)]
+            for suite in args.suite or []:
+                command += ['--suite', suite]
+
+            print('Benchmarking {0}'.format(ref or 'the working tree'))
+            try:
+                subprocess.check_call(command, cwd=REPO_ROOT)
+            finally:
+                if ref is not None:
+                    subprocess.call(['git', 'worktree', 'remove', '--force', library_path], cwd=REPO_ROOT)
+
+            results.append(load(output))
+    finally:
+        shutil.rmtree(tempdir, ignore_errors=True)
+
+    return print_comparison(results[0], results[1], args.threshold)
+
+
+def main(argv=None):
+    from benchmarks.suites import SUITES
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    def add_run_options(command):
+        command.add_argument('--suite', action='append', choices=sorted(SUITES),
+                             help="a suite to run - may be repeated. Defaults to every suite.")
+        command.add_argument('--repeat', type=int, default=20, help="timed calls per case")
+        command.add_argument('--latency', type=float, default=0.005,
+                             help="seconds the fake server adds to each response")
+
+    run_command = commands.add_parser('run', help="run the benchmarks")
+    add_run_options(run_command)
+    run_command.add_argument('--output', help="a JSON file to save the results in")
+    run_command.add_argument('--library', help="the checkout to import azure_databricks_api from")
+    run_command.add_argument('--quiet', action='store_true')
+    run_command.set_defaults(handler=run)
+
+    compare_command = commands.add_parser('compare', help="compare two saved results")
+    compare_command.add_argument('base')
+    compare_command.add_argument('new')
+    compare_command.set_defaults(handler=compare_files)
+
+    refs_command = commands.add_parser('compare-refs', help="benchmark two git refs and compare them")
+    refs_command.add_argument('base', help="the git ref to compare against")
+    refs_command.add_argument('new', nargs='?', help="the git ref to compare. Defaults to the working tree.")
+    add_run_options(refs_command)
+    refs_command.set_defaults(handler=compare_refs)
+
+    for command in (compare_command, refs_command):
+        command.add_argument('--threshold', type=float, default=0.1,
+                             help="the relative slowdown that counts as a regression")
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
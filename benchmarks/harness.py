@@ -0,0 +1,182 @@
+"""Runs benchmark cases against a fake workspace, and compares their results"""
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+from tests.fake_server import FakeDatabricksServer
+
+MB_BYTES = 1048576
+PERCENTILES = (50, 95, 99)
+
+# Slowdowns smaller than this are noise, however large they are relative to a very fast case
+MIN_REGRESSION_MS = 1.0
+
+# A benchmark case - operation is called repeat times, and moves bytes bytes each time, if it transfers data
+Case = namedtuple('Case', ['name', 'operation', 'bytes', 'repeat'])
+
+# What a suite is given to set up its cases
+Context = namedtuple('Context', ['client', 'fake', 'workdir', 'repeat'])
+
+
+def percentile(values, percent):
+    """The nearest-rank percentile of values"""
+    ordered = sorted(values)
+    rank = int(math.ceil(percent / 100.0 * len(ordered)))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def connect(host, token):
+    """A client for host, falling back to pointing each API object at it for versions without a host option"""
+    from azure_databricks_api import AzureDatabricksRESTClient
+
+    try:
+        return AzureDatabricksRESTClient(host=host, token=token)
+    except TypeError:
+        client = AzureDatabricksRESTClient(region='benchmark', token=token)
+        for api in vars(client).values():
+            if hasattr(api, '_uri'):
+                api._uri = '{0}/api/2.0/'.format(host)
+        return client
+
+
+def git_commit(path):
+    """The commit checked out at path, or None if it isn't a git repository"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=path,
+                                       stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_case(fake, case, warmup=1):
+    """Time one case, returning its latency percentiles, requests per operation and throughput"""
+    try:
+        for _ in range(warmup):
+            case.operation()
+
+        requests_before = sum(fake.request_counts.values())
+        latencies = []
+        for _ in range(case.repeat):
+            start = time.perf_counter()
+            case.operation()
+            latencies.append(time.perf_counter() - start)
+        requests = sum(fake.request_counts.values()) - requests_before
+    except Exception as exception:
+        return {'error': '{0}: {1}'.format(type(exception).__name__, exception)}
+
+    result = {'ops': len(latencies),
+              'mean_ms': 1000 * sum(latencies) / len(latencies),
+              'requests_per_op': requests / float(len(latencies)),
+              'mb_per_s': None}
+    for percent in PERCENTILES:
+        result['p{0}_ms'.format(percent)] = 1000 * percentile(latencies, percent)
+
+    if case.bytes:
+        result['mb_per_s'] = case.bytes * len(latencies) / sum(latencies) / MB_BYTES
+
+    return result
+
+
+def run_suites(suites, workdir, repeat=20, latency=0.005, library_path=None, report=None):
+    """
+    Run the cases of each suite against a fresh fake server
+
+    Parameters
+    ----------
+    suites : dict of name to suite function
+        Each function takes a Context and yields Cases. Setup done before a yield is not timed.
+    workdir : str
+        A directory for the local files the cases read and write
+    repeat : int
+        The default number of timed calls per case
+    latency : float
+        Seconds the fake server adds to every response
+    library_path : str, optional
+        The directory azure_databricks_api was imported from, to record its commit
+    report : callable, optional
+        Called with the name and result of each case as it finishes
+
+    Returns
+    -------
+    dict with the environment and a 'results' dict of case name to result
+    """
+    results = {}
+
+    for suite_name, suite in suites.items():
+        with FakeDatabricksServer(latency=latency, token='benchmark') as fake:
+            context = Context(client=connect(fake.host, 'benchmark'), fake=fake, workdir=workdir, repeat=repeat)
+
+            for case in suite(context):
+                results[case.name] = run_case(fake, case)
+                if report is not None:
+                    report(case.name, results[case.name])
+
+    return {'commit': git_commit(library_path) if library_path else None,
+            'python': platform.python_version(),
+            'latency': latency,
+            'repeat': repeat,
+            'results': results}
+
+
+def compare(base, new, threshold=0.1):
+    """
+    Compare two sets of results
+
+    A case regresses if its p50 latency grows by more than threshold (and MIN_REGRESSION_MS), its throughput
+    falls by more than threshold, it makes more requests per operation, or it fails where it used to succeed.
+
+    Returns
+    -------
+    list of (name, base result, new result, regressed) for each case in either set
+    """
+    rows = []
+    names = list(base['results']) + [name for name in new['results'] if name not in base['results']]
+
+    for name in names:
+        old, current = base['results'].get(name), new['results'].get(name)
+        regressed = False
+
+        if old and current and 'error' not in old:
+            if 'error' in current:
+                regressed = True
+            else:
+                regressed = (current['p50_ms'] > max(old['p50_ms'] * (1 + threshold),
+                                                     old['p50_ms'] + MIN_REGRESSION_MS) or
+                             current['requests_per_op'] > old['requests_per_op'] + 1e-9 or
+                             (old['mb_per_s'] is not None and
+                              current['mb_per_s'] < old['mb_per_s'] * (1 - threshold)))
+
+        rows.append((name, old, current, regressed))
+
+    return rows
+
+
+def load(path):
+    with open(path, 'r') as results_file:
+        return json.load(results_file)
+
+
+def save(results, path):
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+
+
+def format_result(result):
+    if result is None:
+        return '-'
+    if 'error' in result:
+        return 'error ({0})'.format(result['error'])
+
+    text = 'p50 {p50_ms:.1f} / p95 {p95_ms:.1f} / p99 {p99_ms:.1f} ms, {requests_per_op:.2f} req/op'.format(**result)
+    if result['mb_per_s'] is not None:
+        text += ', {0:.1f} MB/s'.format(result['mb_per_s'])
+    return text
+
+
+def print_result(name, result, stream=sys.stdout):
+    stream.write('{0:<60} {1}\n'.format(name, format_result(result)))
+    stream.flush()
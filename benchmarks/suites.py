@@ -0,0 +1,129 @@
+"""The benchmark suites - each takes a harness.Context and yields harness.Cases"""
+import os
+from functools import partial
+
+from benchmarks.harness import Case, MB_BYTES
+
+DBFS_FILE_SIZES = (MB_BYTES // 4, 4 * MB_BYTES, 16 * MB_BYTES)
+DBFS_CHUNK_SIZES = (MB_BYTES // 4, MB_BYTES)
+NOTEBOOK_SIZES = (10 * 1024, MB_BYTES)
+FLEET_SIZE = 200
+LIBRARIES_PER_CLUSTER = 20
+
+
+def _size_name(size):
+    return '{0}MB'.format(size // MB_BYTES) if size >= MB_BYTES else '{0}KB'.format(size // 1024)
+
+
+def _local_file(workdir, name, size):
+    path = os.path.join(workdir, name)
+    with open(path, 'wb') as local_file:
+        local_file.write(os.urandom(size))
+    return path
+
+
+def _seed_clusters(fake, count):
+    """Add clusters straight into the fake workspace, without timing or counting the calls"""
+    with fake.state.lock:
+        return [fake.state.clusters_api('create', {'cluster_name': 'benchmark-{0}'.format(index),
+                                                   'spark_version': '7.3.x-scala2.12',
+                                                   'node_type_id': 'Standard_DS3_v2'})['cluster_id']
+                for index in range(count)]
+
+
+def dbfs(context):
+    client = context.client
+
+    for size in DBFS_FILE_SIZES:
+        local_path = _local_file(context.workdir, 'dbfs-{0}'.format(size), size)
+        download_path = local_path + '.download'
+        dbfs_path = '/benchmarks/{0}'.format(os.path.basename(local_path))
+        # Larger files take longer per call, so fewer calls are timed
+        repeat = max(3, context.repeat * MB_BYTES // max(size, MB_BYTES) // 2)
+
+        for chunk_size in DBFS_CHUNK_SIZES:
+            label = 'size={0},chunk={1}'.format(_size_name(size), _size_name(chunk_size))
+
+            yield Case('dbfs.upload[{0}]'.format(label),
+                       partial(client.dbfs.upload_file_by_path, local_path, dbfs_path, overwrite=True,
+                               chunk_size=chunk_size),
+                       size, repeat)
+            yield Case('dbfs.download[{0}]'.format(label),
+                       partial(client.dbfs.download_file, download_path, dbfs_path, overwrite=True,
+                               chunk_size=chunk_size),
+                       size, repeat)
+
+
+def workspace(context):
+    client = context.client
+    client.workspace.mkdirs('/benchmarks')
+
+    for size in NOTEBOOK_SIZES:
+        label = 'size={0}'.format(_size_name(size))
+        local_path = os.path.join(context.workdir, 'notebook-{0}.py'.format(size))
+        with open(local_path, 'w') as notebook:
+            notebook.write('# Databricks notebook source\n')
+            notebook.write('x = 1\n' * (size // 6))
+        export_path = local_path + '.export'
+        workspace_path = '/benchmarks/notebook-{0}'.format(size)
+
+        yield Case('workspace.import[{0}]'.format(label),
+                   partial(client.workspace.import_file, workspace_path, 'SOURCE', language='PYTHON', overwrite=True,
+                           filepath=local_path),
+                   size, context.repeat)
+        yield Case('workspace.export[{0}]'.format(label),
+                   partial(client.workspace.export, workspace_path, export_path, 'SOURCE'),
+                   size, context.repeat)
+
+    yield Case('workspace.list', partial(client.workspace.list, '/benchmarks'), None, context.repeat)
+
+
+def clusters(context):
+    client = context.client
+    cluster_ids = _seed_clusters(context.fake, FLEET_SIZE)
+    names = ['benchmark-{0}'.format(index) for index in range(0, FLEET_SIZE, FLEET_SIZE // 10)]
+    label = 'clusters={0}'.format(FLEET_SIZE)
+
+    def each_name(operation):
+        return lambda: [operation(name) for name in names]
+
+    yield Case('clusters.get_cluster_id[{0},names=10]'.format(label),
+               each_name(client.clusters.get_cluster_id), None, context.repeat)
+    yield Case('clusters.get_by_name[{0},names=10]'.format(label),
+               each_name(lambda name: client.clusters.get(cluster_name=name)), None, context.repeat)
+    yield Case('clusters.pin_by_name[{0},names=10]'.format(label),
+               each_name(lambda name: client.clusters.pin(cluster_name=name)), None, context.repeat)
+    yield Case('clusters.get_by_id[{0}]'.format(label),
+               partial(client.clusters.get, cluster_id=cluster_ids[0]), None, context.repeat)
+    yield Case('clusters.spark_versions', client.clusters.spark_versions, None, context.repeat)
+
+
+def libraries(context):
+    client = context.client
+    cluster_ids = _seed_clusters(context.fake, FLEET_SIZE // 2)
+
+    packages = ['package-{0}'.format(index) for index in range(LIBRARIES_PER_CLUSTER)]
+    with context.fake.state.lock:
+        for cluster_id in cluster_ids:
+            context.fake.state.libraries_api('install', {'cluster_id': cluster_id,
+                                                         'libraries': [{'pypi': {'package': package}}
+                                                                       for package in packages]})
+    label = 'clusters={0},libraries={1}'.format(len(cluster_ids), LIBRARIES_PER_CLUSTER)
+
+    yield Case('libraries.cluster_status[{0}]'.format(label),
+               partial(client.libraries.cluster_status, cluster_ids[0]), None, context.repeat)
+    yield Case('libraries.get_library_details[{0}]'.format(label),
+               partial(client.libraries.get_library_details, cluster_ids[0], packages[-1], 'pypi'),
+               None, context.repeat)
+    yield Case('libraries.all_cluster_statuses[{0}]'.format(label),
+               client.libraries.all_cluster_statuses, None, context.repeat)
+    # Where is a library installed, across the fleet
+    yield Case('libraries.find_across_clusters[{0}]'.format(label),
+               lambda: client.libraries.refresh_library_index().find(packages[-1], 'pypi'),
+               None, context.repeat)
+
+
+SUITES = {'dbfs': dbfs,
+          'workspace': workspace,
+          'clusters': clusters,
+          'libraries': libraries}
@@ -0,0 +1,22 @@
+import pytest
+
+from tests.fake_server import FakeDatabricksServer
+from tests.utils import FAKE_TOKEN, create_fake_client
+
+
+@pytest.fixture
+def fake():
+    """An in-process FakeDatabricksServer, for tests that script its responses or count the requests it receives"""
+    with FakeDatabricksServer(token=FAKE_TOKEN) as server:
+        yield server
+
+
+@pytest.fixture
+def fake_notebook(fake, tmp_path):
+    """A notebook, larger than one export chunk, in the fake workspace - returns its (path, content)"""
+    content = b''.join(b'print(%d)\n' % number for number in range(10000))
+    source_path = tmp_path / "source.py"
+    source_path.write_bytes(content)
+    create_fake_client(fake).workspace.import_file('/Shared/exported', file_format='SOURCE', language='PYTHON',
+                                                   filepath=str(source_path))
+    return '/Shared/exported', content
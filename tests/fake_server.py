@@ -0,0 +1,711 @@
+"""
+A local stand-in for the Databricks REST API 2.0, for running the tests and benchmarks offline
+
+It models a workspace in memory and implements the endpoints used by this library - dbfs, clusters, libraries,
+workspace, jobs, groups and token - with configurable latency, throttling (429) and injected 503 errors. Use it
+from Python:
+
+    with FakeDatabricksServer(latency=0.02) as fake:
+        client = AzureDatabricksRESTClient(host=fake.host, token='token')
+
+or run it on a fixed port and point the test suite at it with DATABRICKS_HOST:
+
+    python -m tests.fake_server --port 8080 --token token --latency 0.02 --throttle-rate 30
+    DATABRICKS_HOST=http://127.0.0.1:8080 PAT_TOKEN=token pytest
+"""
+import argparse
+import base64
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, parse_qsl
+
+MB_BYTES = 1048576
+
+
+class FakeError(Exception):
+
+    def __init__(self, status_code, error_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
+        self.message = message
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _not_found(path):
+    return FakeError(404, 'RESOURCE_DOES_NOT_EXIST', "No file or directory exists on path {0}.".format(path))
+
+
+class FakeDatabricksState(object):
+    """In-memory model of a workspace"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.ids = itertools.count(1)
+
+        self.dbfs_files = {}
+        self.dbfs_modification_times = {}
+        self.dbfs_dirs = {'/', '/FileStore', '/databricks-datasets', '/tmp', '/user'}
+        self.dbfs_handles = {}
+
+        self.clusters = {}
+        self.libraries = {}
+        # Library (its package, maven coordinates or path), or (cluster ID, library) for one cluster, to the status,
+        # or the statuses in turn, it reports after it is installed - each status call moves on to the next, and the
+        # last is kept. Other libraries are INSTALLED at once.
+        self.library_install_states = {}
+        self._library_progress = {}
+
+        self.workspace_objects = {'/': {'object_type': 'DIRECTORY', 'path': '/', 'object_id': 0}}
+        self.workspace_content = {}
+        self._workspace_mkdirs('/Shared')
+        self._workspace_mkdirs('/Users')
+
+        # Group name to its members - ('user_name', name) or ('group_name', name) pairs
+        self.groups = {'admins': set(), 'users': set()}
+        self.tokens = {}
+
+        self.jobs = {}
+        self.runs = {}
+        self.run_tokens = {}
+        # Seconds a run spends PENDING, then RUNNING, before it terminates
+        self.run_seconds = (0.0, 0.0)
+
+    # DBFS helpers
+    @staticmethod
+    def _check_absolute(path):
+        if not path or not path.startswith('/'):
+            raise FakeError(400, 'INVALID_PARAMETER_VALUE', "Path must be absolute: {0}".format(path))
+
+    @staticmethod
+    def _parent(path):
+        parent = path.rstrip('/').rsplit('/', 1)[0]
+        return parent or '/'
+
+    def _dbfs_mkdirs(self, path):
+        path = path.rstrip('/') or '/'
+        while path not in self.dbfs_dirs:
+            if path in self.dbfs_files:
+                raise FakeError(400, 'RESOURCE_ALREADY_EXISTS', "A file exists at {0}".format(path))
+            self.dbfs_dirs.add(path)
+            path = self._parent(path)
+
+    def _dbfs_write(self, path, contents, overwrite):
+        self._check_absolute(path)
+        if path in self.dbfs_dirs or (path in self.dbfs_files and not overwrite):
+            raise FakeError(400, 'RESOURCE_ALREADY_EXISTS', "A file or directory already exists at {0}".format(path))
+        self._dbfs_mkdirs(self._parent(path))
+        self.dbfs_files[path] = contents
+        self.dbfs_modification_times[path] = _now_ms()
+
+    def _dbfs_info(self, path):
+        if path in self.dbfs_dirs:
+            return {'path': path, 'is_dir': True, 'file_size': 0, 'modification_time': 0}
+        return {'path': path, 'is_dir': False, 'file_size': len(self.dbfs_files[path]),
+                'modification_time': self.dbfs_modification_times.get(path, 0)}
+
+    def _dbfs_children(self, path):
+        prefix = path.rstrip('/') + '/'
+        names = [p for p in itertools.chain(self.dbfs_dirs, self.dbfs_files)
+                 if p != '/' and p.startswith(prefix) and '/' not in p[len(prefix):]]
+        return [self._dbfs_info(p) for p in sorted(names)]
+
+    def dbfs_api(self, action, body):
+        path = body.get('path')
+        if action == 'put':
+            self._dbfs_write(path, base64.b64decode(body.get('contents', '')), body.get('overwrite', False))
+            return {}
+        if action == 'create':
+            self._dbfs_write(path, b'', body.get('overwrite', False))
+            handle = next(self.ids)
+            self.dbfs_handles[handle] = (path, [])
+            return {'handle': handle}
+        if action == 'add-block':
+            if body['handle'] not in self.dbfs_handles:
+                raise FakeError(404, 'RESOURCE_DOES_NOT_EXIST', "Handle not found")
+            block = base64.b64decode(body['data'])
+            if len(block) > MB_BYTES:
+                raise FakeError(400, 'MAX_BLOCK_SIZE_EXCEEDED', "Block exceeds 1 MB")
+            self.dbfs_handles[body['handle']][1].append(block)
+            return {}
+        if action == 'close':
+            if body['handle'] not in self.dbfs_handles:
+                raise FakeError(404, 'RESOURCE_DOES_NOT_EXIST', "Handle not found")
+            path, blocks = self.dbfs_handles.pop(body['handle'])
+            self.dbfs_files[path] = b''.join(blocks)
+            self.dbfs_modification_times[path] = _now_ms()
+            return {}
+        if action == 'mkdirs':
+            self._check_absolute(path)
+            self._dbfs_mkdirs(path)
+            return {}
+        if action == 'move':
+            source, destination = body['source_path'], body['destination_path']
+            if source not in self.dbfs_files and source not in self.dbfs_dirs:
+                raise _not_found(source)
+            if destination in self.dbfs_files or destination in self.dbfs_dirs:
+                raise FakeError(400, 'RESOURCE_ALREADY_EXISTS', "{0} already exists".format(destination))
+            for p in [p for p in self.dbfs_files if p == source or p.startswith(source + '/')]:
+                self.dbfs_files[destination + p[len(source):]] = self.dbfs_files.pop(p)
+                self.dbfs_modification_times[destination + p[len(source):]] = self.dbfs_modification_times.pop(p, 0)
+            for p in [p for p in self.dbfs_dirs if p == source or p.startswith(source + '/')]:
+                self.dbfs_dirs.discard(p)
+                self.dbfs_dirs.add(destination + p[len(source):])
+            return {}
+
+        self._check_absolute(path)
+        if path != '/':
+            path = path.rstrip('/')
+
+        if action == 'get-status':
+            if path not in self.dbfs_dirs and path not in self.dbfs_files:
+                raise _not_found(path)
+            return self._dbfs_info(path)
+        if action == 'list':
+            if path in self.dbfs_files:
+                return {'files': [self._dbfs_info(path)]}
+            if path not in self.dbfs_dirs:
+                raise _not_found(path)
+            return {'files': self._dbfs_children(path)}
+        if action == 'read':
+            if path not in self.dbfs_files:
+                raise _not_found(path)
+            offset, length = int(body.get('offset', 0)), int(body.get('length', MB_BYTES))
+            if offset < 0 or length < 0:
+                raise FakeError(400, 'INVALID_PARAMETER_VALUE', "Negative offset or length")
+            if length > MB_BYTES:
+                raise FakeError(400, 'MAX_READ_SIZE_EXCEEDED', "Read length exceeds 1 MB")
+            data = self.dbfs_files[path][offset:offset + length]
+            return {'bytes_read': len(data), 'data': base64.b64encode(data).decode('utf-8')}
+        if action == 'delete':
+            # Like DBFS, deleting a path that doesn't exist succeeds
+            children = [p for p in itertools.chain(self.dbfs_dirs, self.dbfs_files) if p.startswith(path + '/')]
+            if children and not body.get('recursive'):
+                raise FakeError(400, 'IO_ERROR', "Directory {0} is not empty".format(path))
+            for child in children + [path]:
+                self.dbfs_dirs.discard(child)
+                self.dbfs_files.pop(child, None)
+                self.dbfs_modification_times.pop(child, None)
+            return {}
+        raise FakeError(404, 'ENDPOINT_NOT_FOUND', "No API found for dbfs/{0}".format(action))
+
+    # Clusters
+    def clusters_api(self, action, body):
+        if action == 'list':
+            return {'clusters': list(self.clusters.values())} if self.clusters else {}
+        if action == 'spark-versions':
+            return {'versions': [{'key': '7.3.x-scala2.12', 'name': '7.3 LTS'},
+                                 {'key': '6.4.x-scala2.11', 'name': '6.4'}]}
+        if action == 'list-node-types':
+            return {'node_types': [{'node_type_id': 'Standard_DS3_v2', 'num_cores': 4.0,
+                                    'node_info': {'available_core_quota': 100}},
+                                   {'node_type_id': 'Standard_DS4_v2', 'num_cores': 8.0,
+                                    'node_info': {'available_core_quota': 100}}]}
+        if action == 'create':
+            cluster_id = '{0:04d}-000000-fake{0}'.format(next(self.ids))
+            cluster = dict(body, cluster_id=cluster_id, state='PENDING', start_time=int(time.time() * 1000))
+            self.clusters[cluster_id] = cluster
+            return {'cluster_id': cluster_id}
+
+        cluster = self.clusters.get(body.get('cluster_id'))
+        if cluster is None:
+            raise FakeError(400, 'INVALID_PARAMETER_VALUE', "Cluster {0} does not exist".format(body.get('cluster_id')))
+
+        if action == 'get':
+            return cluster
+        if action in ('start', 'restart'):
+            if action == 'start' and cluster['state'] not in ('TERMINATED', ):
+                raise FakeError(400, 'INVALID_STATE', "Cluster is in unexpected state {0}".format(cluster['state']))
+            cluster['state'] = 'RUNNING'
+            return {}
+        if action == 'delete':
+            cluster['state'] = 'TERMINATED'
+            return {}
+        if action == 'permanent-delete':
+            if cluster.get('pinned'):
+                raise FakeError(400, 'INVALID_STATE', "Cluster is pinned")
+            del self.clusters[cluster['cluster_id']]
+            return {}
+        if action in ('pin', 'unpin'):
+            cluster['pinned'] = action == 'pin'
+            return {}
+        raise FakeError(404, 'ENDPOINT_NOT_FOUND', "No API found for clusters/{0}".format(action))
+
+    # Libraries
+    @staticmethod
+    def _library_key(library):
+        details = list(library.values())[0]
+        if isinstance(details, dict):
+            return details.get('package') or details.get('coordinates')
+        return details
+
+    def _advance_libraries(self):
+        """Move each library with scripted install states on to its next state"""
+        for cluster_id, statuses in self.libraries.items():
+            for status in statuses:
+                progress = self._library_progress.get((cluster_id, self._library_key(status['library'])))
+                if progress:
+                    status['status'] = progress.pop(0)
+
+    def libraries_api(self, action, body):
+        if action in ('all-cluster-statuses', 'cluster-status'):
+            self._advance_libraries()
+
+        if action == 'all-cluster-statuses':
+            return {'statuses': [{'cluster_id': cluster_id, 'library_statuses': statuses}
+                                 for cluster_id, statuses in self.libraries.items()]}
+
+        cluster_id = body.get('cluster_id')
+        if cluster_id not in self.clusters:
+            raise FakeError(400, 'INVALID_PARAMETER_VALUE', "Cluster {0} does not exist".format(cluster_id))
+        statuses = self.libraries.setdefault(cluster_id, [])
+
+        if action == 'cluster-status':
+            return {'cluster_id': cluster_id, 'library_statuses': statuses}
+        if action == 'install':
+            for library in body['libraries']:
+                if library not in [status['library'] for status in statuses]:
+                    key = self._library_key(library)
+                    states = self.library_install_states.get(
+                        (cluster_id, key), self.library_install_states.get(key, 'INSTALLED'))
+                    states = [states] if isinstance(states, str) else list(states)
+                    self._library_progress[(cluster_id, key)] = states[1:]
+                    statuses.append({'library': library, 'status': states[0], 'is_library_for_all_clusters': False})
+            return {}
+        if action == 'uninstall':
+            for status in statuses:
+                if status['library'] in body['libraries']:
+                    status['status'] = 'UNINSTALL_ON_RESTART'
+            return {}
+        raise FakeError(404, 'ENDPOINT_NOT_FOUND', "No API found for libraries/{0}".format(action))
+
+    # Workspace
+    def _workspace_mkdirs(self, path):
+        parts = [p for p in path.split('/') if p]
+        current = ''
+        for part in parts:
+            current += '/' + part
+            existing = self.workspace_objects.get(current)
+            if existing is None:
+                self.workspace_objects[current] = {'object_type': 'DIRECTORY', 'path': current,
+                                                   'object_id': next(self.ids)}
+            elif existing['object_type'] != 'DIRECTORY':
+                raise FakeError(400, 'RESOURCE_ALREADY_EXISTS', "{0} already exists".format(current))
+
+    def workspace_api(self, action, body):
+        path = body.get('path')
+        if path is not None and path != '/':
+            path = path.rstrip('/')
+
+        if action == 'mkdirs':
+            self._workspace_mkdirs(path)
+            return {}
+        if action == 'import':
+            existing = self.workspace_objects.get(path)
+            if existing is not None and not body.get('overwrite'):
+                raise FakeError(400, 'RESOURCE_ALREADY_EXISTS', "{0} already exists".format(path))
+            content = base64.b64decode(body['content'])
+            if len(content) > 10 * MB_BYTES:
+                raise FakeError(400, 'MAX_NOTEBOOK_SIZE_EXCEEDED', "Notebook exceeds 10 MB")
+            self._workspace_mkdirs(path.rsplit('/', 1)[0] or '/')
+            # An overwritten notebook keeps its object_id
+            self.workspace_objects[path] = {'object_type': 'NOTEBOOK', 'path': path,
+                                            'language': body.get('language', 'PYTHON'),
+                                            'object_id': existing['object_id'] if existing else next(self.ids),
+                                            'created_at': existing['created_at'] if existing else _now_ms(),
+                                            'modified_at': _now_ms()}
+            self.workspace_content[path] = content
+            return {}
+
+        if path not in self.workspace_objects:
+            raise FakeError(404, 'RESOURCE_DOES_NOT_EXIST', "Path ({0}) doesn't exist.".format(path))
+
+        if action == 'get-status':
+            return self.workspace_objects[path]
+        if action == 'list':
+            prefix = path.rstrip('/') + '/'
+            return {'objects': [obj for p, obj in sorted(self.workspace_objects.items())
+                                if p != '/' and p.startswith(prefix) and '/' not in p[len(prefix):]]}
+        if action == 'export':
+            return self.workspace_content.get(path, b'')
+        if action == 'delete':
+            children = [p for p in self.workspace_objects if p.startswith(path + '/')]
+            if children and not body.get('recursive'):
+                raise FakeError(400, 'DIRECTORY_NOT_EMPTY', "Folder ({0}) is not empty".format(path))
+            for p in children + [path]:
+                self.workspace_objects.pop(p, None)
+                self.workspace_content.pop(p, None)
+            return {}
+        raise FakeError(404, 'ENDPOINT_NOT_FOUND', "No API found for workspace/{0}".format(action))
+
+    # Jobs
+    def _new_run(self, job_id, run_name, settings):
+        run_id = next(self.ids)
+        self.runs[run_id] = {'run_id': run_id, 'job_id': job_id, 'run_name': run_name,
+                             'number_in_job': run_id, 'start_time': int(time.time() * 1000),
+                             'cluster_spec': settings, '_started': time.monotonic(),
+                             '_result': settings.get('_result_state', 'SUCCESS')}
+        return run_id
+
+    def _run_view(self, run):
+        pending, running = self.run_seconds
+        elapsed = time.monotonic() - run['_started']
+        view = {k: v for k, v in run.items() if not k.startswith('_')}
+
+        if run.get('_cancelled'):
+            view['state'] = {'life_cycle_state': 'TERMINATED', 'result_state': 'CANCELED', 'state_message': ''}
+        elif elapsed < pending:
+            view['state'] = {'life_cycle_state': 'PENDING', 'state_message': ''}
+        elif elapsed < pending + running:
+            view['state'] = {'life_cycle_state': 'RUNNING', 'state_message': ''}
+        else:
+            view['state'] = {'life_cycle_state': 'TERMINATED', 'result_state': run['_result'], 'state_message': ''}
+        return view
+
+    def _get_run(self, body):
+        run = self.runs.get(int(body.get('run_id', 0)))
+        if run is None:
+            raise FakeError(400, 'INVALID_PARAMETER_VALUE', "Run {0} does not exist".format(body.get('run_id')))
+        return run
+
+    def _page(self, items, key, body):
+        offset, limit = int(body.get('offset', 0)), int(body.get('limit', 20))
+        page = items[offset:offset + limit]
+        result = {'has_more': offset + limit < len(items)}
+        if page:
+            result[key] = page
+        return result
+
+    def jobs_api(self, action, body):
+        if action == 'create':
+            job_id = next(self.ids)
+            self.jobs[job_id] = {'job_id': job_id, 'settings': body, 'created_time': int(time.time() * 1000)}
+            return {'job_id': job_id}
+        if action == 'list':
+            return self._page([self.jobs[k] for k in sorted(self.jobs)], 'jobs', body)
+        if action == 'runs/submit':
+            token = body.get('idempotency_token')
+            if token and token in self.run_tokens:
+                return {'run_id': self.run_tokens[token]}
+            run_id = self._new_run(None, body.get('run_name'), body)
+            if token:
+                self.run_tokens[token] = run_id
+            return {'run_id': run_id}
+        if action == 'runs/list':
+            runs = sorted(self.runs.values(), key=lambda run: -run['run_id'])
+            if body.get('job_id') is not None:
+                runs = [run for run in runs if run['job_id'] == int(body['job_id'])]
+            views = [self._run_view(run) for run in runs]
+            if str(body.get('active_only')).lower() == 'true':
+                views = [v for v in views if v['state']['life_cycle_state'] != 'TERMINATED']
+            if str(body.get('completed_only')).lower() == 'true':
+                views = [v for v in views if v['state']['life_cycle_state'] == 'TERMINATED']
+            return self._page(views, 'runs', body)
+        if action == 'runs/get':
+            return self._run_view(self._get_run(body))
+        if action == 'runs/get-output':
+            run = self._run_view(self._get_run(body))
+            return {'metadata': run, 'notebook_output': {'result': 'ok'}}
+        if action == 'runs/export':
+            self._get_run(body)
+            return {'views': [{'content': '<html></html>', 'name': 'notebook', 'type': 'NOTEBOOK'}]}
+        if action == 'runs/cancel':
+            self._get_run(body)['_cancelled'] = True
+            return {}
+        if action == 'runs/delete':
+            self.runs.pop(self._get_run(body)['run_id'])
+            return {}
+
+        job = self.jobs.get(int(body.get('job_id', 0)))
+        if job is None:
+            raise FakeError(400, 'INVALID_PARAMETER_VALUE', "Job {0} does not exist".format(body.get('job_id')))
+        if action == 'get':
+            return job
+        if action == 'delete':
+            del self.jobs[job['job_id']]
+            return {}
+        if action == 'reset':
+            job['settings'] = body['new_settings']
+            return {}
+        if action == 'run-now':
+            run_id = self._new_run(job['job_id'], job['settings'].get('name'), job['settings'])
+            return {'run_id': run_id, 'number_in_job': run_id}
+        raise FakeError(404, 'ENDPOINT_NOT_FOUND', "No API found for jobs/{0}".format(action))
+
+    # Groups & Tokens
+    def _get_group(self, group_name):
+        if group_name not in self.groups:
+            raise FakeError(404, 'RESOURCE_DOES_NOT_EXIST', "Group {0} does not exist".format(group_name))
+        return self.groups[group_name]
+
+    @staticmethod
+    def _member(body):
+        for key in ('user_name', 'group_name'):
+            if body.get(key):
+                return key, body[key]
+        raise FakeError(400, 'INVALID_PARAMETER_VALUE', "One of user_name or group_name is required")
+
+    def groups_api(self, action, body):
+        if action == 'list':
+            return {'group_names': sorted(self.groups)}
+        if action == 'create':
+            if body['group_name'] in self.groups:
+                raise FakeError(400, 'RESOURCE_ALREADY_EXISTS', "Group already exists")
+            self.groups[body['group_name']] = set()
+            return {'group_name': body['group_name']}
+        if action == 'delete':
+            self._get_group(body.get('group_name'))
+            del self.groups[body['group_name']]
+            for members in self.groups.values():
+                members.discard(('group_name', body['group_name']))
+            return {}
+        if action == 'list-members':
+            return {'members': [{key: name} for key, name in sorted(self._get_group(body.get('group_name')))]}
+        if action == 'add-member':
+            member = self._member(body)
+            if member[0] == 'group_name':
+                self._get_group(member[1])
+            self._get_group(body.get('parent_name')).add(member)
+            return {}
+        if action == 'remove-member':
+            members = self._get_group(body.get('parent_name'))
+            member = self._member(body)
+            if member not in members:
+                raise FakeError(404, 'RESOURCE_DOES_NOT_EXIST', "{0} is not a member".format(member[1]))
+            members.discard(member)
+            return {}
+        if action == 'list-parents':
+            member = self._member(body)
+            return {'group_names': sorted(name for name, members in self.groups.items() if member in members)}
+        raise FakeError(404, 'ENDPOINT_NOT_FOUND', "No API found for groups/{0}".format(action))
+
+    def token_api(self, action, body):
+        if action == 'list':
+            return {'token_infos': list(self.tokens.values())}
+        if action == 'create':
+            token_id = str(next(self.ids))
+            info = {'token_id': token_id, 'creation_time': int(time.time() * 1000),
+                    'expiry_time': -1, 'comment': body.get('comment', '')}
+            self.tokens[token_id] = info
+            return {'token_value': 'dapi' + token_id, 'token_info': info}
+        if action == 'delete':
+            if self.tokens.pop(body.get('token_id'), None) is None:
+                raise FakeError(400, 'RESOURCE_DOES_NOT_EXIST', "Token does not exist")
+            return {}
+        raise FakeError(404, 'ENDPOINT_NOT_FOUND', "No API found for token/{0}".format(action))
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FakeDatabricksServer(object):
+    """
+    Serves a FakeDatabricksState over HTTP on localhost
+
+    Parameters
+    ----------
+    latency : float, optional, default=0
+        Seconds added to every response
+    throttle_rate : int, optional
+        Requests allowed in any one second before the server responds 429 REQUEST_LIMIT_EXCEEDED
+    error_rate : float, optional, default=0
+        The fraction of requests that fail with 503 TEMPORARILY_UNAVAILABLE, before they are handled
+    token : str, optional
+        If given, requests without this bearer token are rejected with 403
+    port : int, optional, default=0
+        The port to listen on. 0 picks a free port.
+    """
+
+    def __init__(self, latency=0.0, throttle_rate=None, error_rate=0.0, token=None, port=0):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.token = token
+        self.state = FakeDatabricksState()
+        self.request_counts = Counter()
+        # The number of requests to each endpoint being handled now, and the most there have been at once
+        self.in_flight = Counter()
+        self.peak_in_flight = Counter()
+        self._injections = {}
+        self._window = []
+        self._lock = threading.Lock()
+        self._port = port
+        self._server = None
+        self._thread = None
+
+    @property
+    def host(self):
+        return "http://{0}:{1}".format(*self._server.server_address[:2])
+
+    def start(self):
+        handler = type('Handler', (_Handler,), {'fake': self})
+        self._server = _ThreadingHTTPServer(('127.0.0.1', self._port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def inject(self, endpoint, status_code=503, error_code='TEMPORARILY_UNAVAILABLE', headers=None,
+               after_handling=False, truncate=False, times=1):
+        """
+        Make the next requests to an endpoint fail, rather than at random as with error_rate
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint, e.g. 'jobs/runs/submit'
+        status_code, error_code : int, str
+            The error response
+        headers : dict, optional
+            Headers added to the error response, e.g. {'Retry-After': '1'}
+        after_handling : bool, optional
+            Handle the request before failing it, as if the response were lost on the way back
+        truncate : bool, optional
+            Instead of an error, send the successful response but close the connection halfway through its body
+        times : int, optional, default=1
+            The number of requests that fail
+        """
+        injection = {'status_code': status_code, 'error_code': error_code, 'headers': headers or {},
+                     'after_handling': after_handling, 'truncate': truncate}
+        with self._lock:
+            self._injections.setdefault(endpoint.strip('/'), []).extend([injection] * times)
+
+    def _throttled(self):
+        if not self.throttle_rate:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.throttle_rate:
+                return True
+            self._window.append(now)
+            return False
+
+    def dispatch(self, method, path, body):
+        """Returns the (status code, payload, headers, truncate) of the response to a request"""
+        endpoint = path.split('/api/2.0/', 1)[-1]
+        with self._lock:
+            self.request_counts[endpoint] += 1
+            self.in_flight[endpoint] += 1
+            self.peak_in_flight[endpoint] = max(self.peak_in_flight[endpoint], self.in_flight[endpoint])
+            injections = self._injections.get(endpoint)
+            injection = injections.pop(0) if injections else None
+
+        try:
+            return self._respond(endpoint, body, injection)
+        finally:
+            with self._lock:
+                self.in_flight[endpoint] -= 1
+
+    def _respond(self, endpoint, body, injection):
+        if self.latency:
+            time.sleep(self.latency)
+        if self._throttled():
+            return 429, {'error_code': 'REQUEST_LIMIT_EXCEEDED', 'message': 'Too many requests'}, {}, False
+        if self.error_rate and random.random() < self.error_rate:
+            return 503, {'error_code': 'TEMPORARILY_UNAVAILABLE', 'message': 'Injected error'}, {}, False
+
+        injected_error = (injection['status_code'], {'error_code': injection['error_code'],
+                                                     'message': 'Injected error'}, injection['headers'], False) \
+            if injection is not None else None
+        if injected_error and not (injection['after_handling'] or injection['truncate']):
+            return injected_error
+
+        family, _, action = endpoint.partition('/')
+        handler = getattr(self.state, '{0}_api'.format(family), None)
+        try:
+            if handler is None:
+                raise FakeError(404, 'ENDPOINT_NOT_FOUND', "No API found for {0}".format(endpoint))
+            with self.state.lock:
+                payload = handler(action, body)
+        except FakeError as error:
+            return error.status_code, {'error_code': error.error_code, 'message': error.message}, {}, False
+
+        if injected_error and injection['after_handling']:
+            return injected_error
+        return 200, payload, {}, bool(injection and injection['truncate'])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    fake = None
+    protocol_version = 'HTTP/1.1'
+    # The headers and body are written separately - without this, delayed ACKs add ~40 ms to small responses
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        url = urlparse(self.path)
+        body = json.loads(raw) if raw else {}
+        body.update(dict(parse_qsl(url.query)))
+
+        if self.fake.token and self.headers.get('Authorization') != 'Bearer {0}'.format(self.fake.token):
+            status, payload, headers, truncate = 403, {'error_code': 'PERMISSION_DENIED',
+                                                       'message': 'Invalid access token'}, {}, False
+        else:
+            status, payload, headers, truncate = self.fake.dispatch(method, url.path, body)
+
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        if truncate:
+            self.wfile.write(data[:len(data) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--throttle-rate', type=int, default=None, help="requests per second before 429s")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests failing with 503")
+    parser.add_argument('--token', default=None, help="the only bearer token accepted")
+    args = parser.parse_args()
+
+    fake = FakeDatabricksServer(latency=args.latency, throttle_rate=args.throttle_rate, error_rate=args.error_rate,
+                                token=args.token, port=args.port).start()
+    print("Serving a fake Databricks workspace on {0}".format(fake.host))
+    try:
+        fake._thread.join()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from azure_databricks_api import AsyncAzureDatabricksRESTClient, RetryPolicy
+from azure_databricks_api.exceptions import AuthorizationError, ResourceDoesNotExist
+from environs import Env
+from tests.utils import FAKE_TOKEN
+
+env = Env()
+env.read_env()
+
+PAT_TOKEN = env.str("PAT_TOKEN")
+# DATABRICKS_HOST points the tests at another server - e.g. python -m tests.fake_server
+HOST = env.str("DATABRICKS_HOST", None)
+REGION = None if HOST else env.str("DATABRICKS_REGION")
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def list_root(token):
+    async with AsyncAzureDatabricksRESTClient(region=REGION, host=HOST, token=token) as client:
+        return await client.dbfs.list('/')
+
+
+def fake_client(fake):
+    return AsyncAzureDatabricksRESTClient(host=fake.host, token=FAKE_TOKEN, retry_policy=RetryPolicy(backoff_base=0.01))
+
+
+def test_async_pat_token_auth():
+    assert len(run(list_root(PAT_TOKEN))) > 0
+
+
+def test_async_wrong_pat_token_raises_error():
+    with pytest.raises(AuthorizationError):
+        run(list_root("WRONGTOKEN"))
+
+
+def test_async_concurrent_calls():
+    async def list_many():
+        async with AsyncAzureDatabricksRESTClient(region=REGION, host=HOST, token=PAT_TOKEN) as client:
+            return await asyncio.gather(*[client.dbfs.list('/') for _ in range(10)])
+
+    listings = run(list_many())
+    assert all(listing == listings[0] for listing in listings)
+
+
+def test_async_get_status_not_found():
+    async def get_status():
+        async with AsyncAzureDatabricksRESTClient(region=REGION, host=HOST, token=PAT_TOKEN) as client:
+            return await client.dbfs.get_status("/THISPATHSHOULDNOTEXISTANYWHERE")
+
+    with pytest.raises(ResourceDoesNotExist):
+        run(get_status())
+
+
+def test_async_download_directory(tmp_path):
+    source = tmp_path / "source"
+    (source / "nested").mkdir(parents=True)
+    (source / "top.txt").write_text("A file at the top of the tree")
+    (source / "nested" / "bottom.txt").write_text("A file at the bottom of the tree")
+
+    async def round_trip():
+        async with AsyncAzureDatabricksRESTClient(region=REGION, host=HOST, token=PAT_TOKEN) as client:
+            for path in source.rglob('*.txt'):
+                await client.dbfs.upload_file_by_path(path, '/tmp/async-tree/' + path.relative_to(source).as_posix(),
+                                                      overwrite=True)
+            try:
+                return await client.dbfs.download_file(tmp_path / "downloaded", '/tmp/async-tree', workers=2)
+            finally:
+                await client.dbfs.delete('/tmp/async-tree', recursive=True)
+
+    run(round_trip())
+
+    assert (tmp_path / "downloaded" / "top.txt").read_bytes() == (source / "top.txt").read_bytes()
+    assert (tmp_path / "downloaded" / "nested" / "bottom.txt").read_bytes() == \
+        (source / "nested" / "bottom.txt").read_bytes()
+
+
+def test_async_upload_streams_and_replays_body(fake, tmp_path):
+    small = tmp_path / "small.bin"
+    small.write_bytes(bytes(range(256)) * 7)
+    large = tmp_path / "large.bin"
+    large.write_bytes(bytes(range(256)) * 5000)
+    fake.inject('dbfs/put')
+
+    async def upload():
+        async with fake_client(fake) as client:
+            await client.dbfs.upload_file_by_path(small, '/tmp/small.bin', overwrite=True)
+            await client.dbfs.upload_file_by_path(large, '/tmp/large.bin', chunk_size=500000)
+
+    run(upload())
+
+    # The failed put is sent again in full
+    assert fake.request_counts['dbfs/put'] == 2
+    assert fake.state.dbfs_files['/tmp/small.bin'] == small.read_bytes()
+    assert fake.request_counts['dbfs/add-block'] == 3
+    assert fake.state.dbfs_files['/tmp/large.bin'] == large.read_bytes()
+
+
+def test_async_call_retries_body_cut_short(fake, fake_notebook):
+    path, _ = fake_notebook
+    fake.inject('workspace/get-status', truncate=True)
+
+    async def get_status():
+        async with fake_client(fake) as client:
+            return await client.workspace.get_status(path)
+
+    assert run(get_status()).path == path
+    assert fake.request_counts['workspace/get-status'] == 2
+
+
+def test_async_export_not_retried_once_chunks_are_written(fake, fake_notebook, tmp_path):
+    path, _ = fake_notebook
+    fake.inject('workspace/export', truncate=True)
+
+    async def export():
+        async with fake_client(fake) as client:
+            return await client.workspace.export(path, tmp_path / "exported.py", file_format='SOURCE',
+                                                 chunk_size=4096)
+
+    with pytest.raises(aiohttp.ClientPayloadError):
+        run(export())
+
+    assert fake.request_counts['workspace/export'] == 1
+    assert not (tmp_path / "exported.py").exists()
@@ -1,7 +1,8 @@
 import pytest
 
+from azure_databricks_api import MetadataCache
 from azure_databricks_api.exceptions import ResourceDoesNotExist, InvalidState
-from tests.utils import create_client
+from tests.utils import create_client, create_fake_client
 import uuid
 from time import sleep
 
@@ -57,6 +58,20 @@ def autoscale_workers():
         "max_workers": 1
     }
 
+
+def test_metadata_cache_persists_between_clients(tmpdir, fake):
+    cache_path = str(tmpdir.join('metadata.json'))
+
+    first_client = create_fake_client(fake, metadata_cache=MetadataCache(path=cache_path))
+    spark_versions = first_client.clusters.spark_versions()
+    assert fake.request_counts['clusters/spark-versions'] == 1
+
+    # The second client reads the Spark versions from the file, without calling the API
+    second_client = create_fake_client(fake, metadata_cache=MetadataCache(path=cache_path))
+    assert second_client.clusters.spark_versions() == spark_versions
+    assert fake.request_counts['clusters/spark-versions'] == 1
+
+
 def test_create_cluster_invalid_spark_version_raises(cluster_name, smallest_node):
     with pytest.raises(ValueError):
         _ = client.clusters.create(cluster_name=cluster_name, num_workers=0,
@@ -118,6 +133,22 @@ def test_start_cluster_by_name(cluster_name):
                 sleep(sleep_time)
                 sleep_time += 2
 
+
+def test_wait_for_cluster_running(cluster_id):
+    futures = client.clusters.wait_for_states({cluster_id: ['RUNNING', 'TERMINATED']}, timeout=900)
+
+    cluster = futures[cluster_id].result()
+    assert cluster['cluster_id'] == cluster_id
+    assert cluster['state'] in ('RUNNING', 'TERMINATED')
+
+
+def test_wait_for_missing_cluster_raises():
+    futures = client.clusters.wait_for_states({'0000-000000-missing0': 'RUNNING'})
+
+    with pytest.raises(ResourceDoesNotExist):
+        futures['0000-000000-missing0'].result(timeout=60)
+
+
 def test_start_cluster_no_cluster_supplied():
     with pytest.raises(ValueError):
         client.clusters.start()
@@ -152,6 +183,15 @@ def test_get_cluster(cluster_name):
     cluster = client.clusters.get(cluster_name=cluster_name)
 
 
+def test_cluster_name_index(cluster_name, cluster_id):
+    assert client.clusters._cluster_index.get(cluster_name) == cluster_id
+
+    client.clusters.invalidate_cluster_index()
+    assert client.clusters._cluster_index.get(cluster_name) is None
+
+    assert client.clusters.get_cluster_id(cluster_name) == cluster_id
+
+
 def test_permanent_delete_all_clusters():
     clusters = client.clusters.list()
 
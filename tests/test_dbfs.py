@@ -1,11 +1,16 @@
+import base64
+import io
+import json
 from collections import namedtuple
 from random import choice
 from string import ascii_letters
 
 import pytest
 
-from azure_databricks_api.exceptions import ResourceAlreadyExists, IoError, ResourceDoesNotExist, InvalidParameterValue
-from tests.utils import create_client
+from azure_databricks_api.__utils import Base64JSONBody
+from azure_databricks_api.exceptions import ResourceAlreadyExists, IoError, ResourceDoesNotExist, InvalidParameterValue, \
+    TransferFailed
+from tests.utils import create_client, create_fake_client
 
 client = create_client()
 
@@ -13,6 +18,8 @@ DBFS_TEMP_DIR = '/tmp'
 SMALL_DBFS = '{temp_dir}/small.txt'.format(temp_dir=DBFS_TEMP_DIR)
 LARGE_DBFS = '{temp_dir}/large.txt'.format(temp_dir=DBFS_TEMP_DIR)
 DBFS_MOVED = '{temp_dir}/small-moved.txt'.format(temp_dir=DBFS_TEMP_DIR)
+DBFS_UPLOAD_DIR = '{temp_dir}/uploaded'.format(temp_dir=DBFS_TEMP_DIR)
+DBFS_SYNC_DIR = '{temp_dir}/synced'.format(temp_dir=DBFS_TEMP_DIR)
 
 
 @pytest.fixture(scope="module")
@@ -29,6 +36,18 @@ def temp_files(tmp_path_factory):
     return FileList(small=small_file_path, large=large_file_path, dir=temp_path)
 
 
+@pytest.fixture(scope="module")
+def temp_tree(tmp_path_factory):
+    tree_path = tmp_path_factory.mktemp('tree')
+    (tree_path / "nested" / "deeper").mkdir(parents=True)
+
+    (tree_path / "top.txt").write_text("A file at the top of the tree")
+    (tree_path / "nested" / "middle.txt").write_text("A file in the middle of the tree")
+    (tree_path / "nested" / "deeper" / "bottom.txt").write_text("A file at the bottom of the tree")
+
+    return tree_path
+
+
 def test_mkdir():
     client.dbfs.mkdirs(DBFS_TEMP_DIR)
     assert DBFS_TEMP_DIR in [file.path for file in client.dbfs.list('/')]
@@ -84,15 +103,150 @@ def test_download_overwrite_local_file(temp_files):
     client.dbfs.download_file(local_path=new_small_path, dbfs_path=SMALL_DBFS, overwrite=True)
 
 
+@pytest.mark.parametrize("offset,length", [(0, 0), (0, 9), (1, 10), (5, 3 * 16384 + 2)])
+def test_base64_json_body(offset, length):
+    raw = bytes(range(256)) * 256
+    body = Base64JSONBody({"path": "/tmp/b64.bin", "overwrite": True}, "contents", io.BytesIO(raw), offset=offset,
+                          length=length)
+    expected = json.dumps({"path": "/tmp/b64.bin", "overwrite": True,
+                           "contents": base64.b64encode(raw[offset:offset + length]).decode('ascii')}).encode('utf-8')
+
+    chunks = iter(lambda: body.read(7), b'')
+    assert b''.join(chunks) == expected
+    assert len(body) == len(expected)
+    assert body.tell() == len(expected)
+
+    body.seek(0)
+    assert body.read() == expected
+
+
 def test_upload_large_file(temp_files):
     client.dbfs.upload_file_by_path(file_path=temp_files.large, dbfs_path=LARGE_DBFS)
 
 
+def test_download_large_file_parallel(temp_files):
+    new_large_path = temp_files.dir.with_name("large_parallel.txt")
+    client.dbfs.download_file(local_path=new_large_path, dbfs_path=LARGE_DBFS, workers=4, chunk_size=262144)
+
+    assert new_large_path.read_bytes() == temp_files.large.read_bytes()
+
+
+def test_download_parallel_does_not_retry_missing_file(fake, tmp_path):
+    fake_client = create_fake_client(fake)
+    fake.state.dbfs_files['/tmp/ranged.bin'] = bytes(range(256)) * 4096
+    fake.inject('dbfs/read', status_code=404, error_code='RESOURCE_DOES_NOT_EXIST')
+
+    with pytest.raises(ResourceDoesNotExist):
+        fake_client.dbfs.download_file(local_path=tmp_path / "ranged.bin", dbfs_path='/tmp/ranged.bin', workers=4,
+                                       chunk_size=262144)
+
+
+def test_download_parallel_file_shrunk_raises(fake, tmp_path):
+    fake_client = create_fake_client(fake)
+    fake.state.dbfs_files['/tmp/ranged.bin'] = bytes(range(256)) * 4096
+    get_status = fake_client.dbfs.get_status
+
+    def get_status_then_truncate(path):
+        status = get_status(path)
+        fake.state.dbfs_files[path] = fake.state.dbfs_files[path][:262144]
+        return status
+
+    fake_client.dbfs.get_status = get_status_then_truncate
+
+    with pytest.raises(IOError):
+        fake_client.dbfs.download_file(local_path=tmp_path / "ranged.bin", dbfs_path='/tmp/ranged.bin', workers=4,
+                                       chunk_size=262144)
+
+
 def test_upload_existing_without_overwrite(temp_files):
     with pytest.raises(ResourceAlreadyExists):
         client.dbfs.upload_file_by_path(file_path=temp_files.small, dbfs_path=SMALL_DBFS, overwrite=False)
 
 
+def test_upload_directory(temp_tree):
+    report = client.dbfs.upload_directory(local_dir=temp_tree, dbfs_dir=DBFS_UPLOAD_DIR, workers=4)
+
+    assert len(report.results) == 3
+    assert all(result.error is None for result in report.results)
+    assert report.total_bytes == sum(path.stat().st_size for path in temp_tree.rglob('*') if path.is_file())
+    assert '{0}/nested/deeper/bottom.txt'.format(DBFS_UPLOAD_DIR) in \
+        [file.path for file in client.dbfs.list('{0}/nested/deeper'.format(DBFS_UPLOAD_DIR))]
+
+
+def test_upload_directory_existing_files_reported(temp_tree):
+    report = client.dbfs.upload_directory(local_dir=temp_tree, dbfs_dir=DBFS_UPLOAD_DIR, overwrite=False)
+
+    assert all(isinstance(result.error, ResourceAlreadyExists) for result in report.results)
+
+
+def test_download_directory(temp_tree, tmp_path):
+    report = client.dbfs.download_directory(dbfs_dir=DBFS_UPLOAD_DIR, local_dir=tmp_path / "downloaded", workers=4)
+
+    assert all(result.error is None for result in report.results)
+    for path in temp_tree.rglob('*'):
+        if path.is_file():
+            assert (tmp_path / "downloaded" / path.relative_to(temp_tree)).read_bytes() == path.read_bytes()
+
+
+def test_download_file_directory_reports_failed_files(temp_tree, tmp_path):
+    # A directory where a file should be written makes that one file fail
+    (tmp_path / "downloaded" / "top.txt").mkdir(parents=True)
+
+    with pytest.raises(TransferFailed) as error:
+        client.dbfs.download_file(local_path=tmp_path / "downloaded", dbfs_path=DBFS_UPLOAD_DIR, overwrite=True)
+
+    failures = [result for result in error.value.report.results if result.error is not None]
+    assert [result.source for result in failures] == [DBFS_UPLOAD_DIR + '/top.txt']
+    assert (tmp_path / "downloaded" / "nested" / "middle.txt").is_file()
+
+
+def test_sync_transfers_only_changed_files(temp_tree, tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+
+    report = client.dbfs.sync(local_dir=temp_tree, dbfs_dir=DBFS_SYNC_DIR, manifest_path=manifest_path, workers=4)
+    assert len(report.results) == 3
+    assert all(result.error is None for result in report.results)
+
+    report = client.dbfs.sync(local_dir=temp_tree, dbfs_dir=DBFS_SYNC_DIR, manifest_path=manifest_path)
+    assert report.plan.transfers == []
+    assert report.plan.unchanged == 3
+
+
+def test_sync_dry_run_plan(temp_tree, tmp_path):
+    (tmp_path / "top.txt").write_text("A changed file at the top of the tree")
+    (tmp_path / "new.txt").write_text("A new file")
+
+    report = client.dbfs.sync(local_dir=tmp_path, dbfs_dir=DBFS_SYNC_DIR, delete=True, dry_run=True)
+
+    assert sorted((transfer.destination, transfer.reason) for transfer in report.plan.transfers) == \
+        [(DBFS_SYNC_DIR + '/new.txt', 'new'), (DBFS_SYNC_DIR + '/top.txt', 'changed')]
+    assert sorted(report.plan.deletes) == [DBFS_SYNC_DIR + '/nested/deeper/bottom.txt',
+                                           DBFS_SYNC_DIR + '/nested/middle.txt']
+    assert report.results == []
+
+
+def test_sync_pull(temp_tree, tmp_path):
+    report = client.dbfs.sync(local_dir=tmp_path, dbfs_dir=DBFS_SYNC_DIR, direction='pull', workers=4)
+
+    assert all(result.error is None for result in report.results)
+    for path in temp_tree.rglob('*'):
+        if path.is_file():
+            assert (tmp_path / path.relative_to(temp_tree)).read_bytes() == path.read_bytes()
+
+
+def test_sync_push_from_missing_directory_raises(fake, tmp_path):
+    fake_client = create_fake_client(fake)
+    for name in ('first.txt', 'second.txt', 'nested/third.txt'):
+        fake.state.dbfs_files['/tmp/artifacts/' + name] = b'artifact'
+    fake.state.dbfs_dirs.update({'/tmp/artifacts', '/tmp/artifacts/nested'})
+
+    with pytest.raises(FileNotFoundError):
+        fake_client.dbfs.sync(tmp_path / "does-not-exist", '/tmp/artifacts', delete=True)
+
+    assert len([path for path in fake.state.dbfs_files if path.startswith('/tmp/artifacts/')]) == 3
+    assert fake.request_counts['dbfs/delete'] == 0
+
+
 def test_list():
     file_list = client.dbfs.list(DBFS_TEMP_DIR)
 
@@ -0,0 +1,247 @@
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import pytest
+
+from tests.utils import create_client, create_fake_client
+
+from azure_databricks_api.__jobs import RUN_POLL_INTERVALS, TERMINAL_LIFE_CYCLE_STATES, _next_run_poll_interval
+from azure_databricks_api.exceptions import InvalidParameterValue
+
+JOB_NAME = "THIS IS A JOB CREATED DURING THE CI/CD TESTING"
+
+client = create_client()
+
+
+def teardown_module(module):
+    for job in list(client.jobs.list()):
+        if job['settings']['name'] == JOB_NAME:
+            client.jobs.delete(job['job_id'])
+
+
+@pytest.fixture(scope='module')
+def job_id():
+    spark_version = list(client.clusters.spark_versions().keys())[0]
+    node_type_id = client.clusters.list_available_node_type_names()[0]
+
+    return client.jobs.create(name=JOB_NAME,
+                              new_cluster={'spark_version': spark_version, 'node_type_id': node_type_id,
+                                           'num_workers': 0},
+                              notebook_task={'notebook_path': '/Shared/does-not-run'})
+
+
+def test_get_job(job_id):
+    job = client.jobs.get(job_id)
+
+    assert job['job_id'] == job_id
+    assert job['settings']['name'] == JOB_NAME
+
+
+def test_list_is_lazy(fake):
+    fake_client = create_fake_client(fake)
+    for number in range(75):
+        fake_client.jobs.runs_submit(run_name='run {0}'.format(number),
+                                     notebook_task={'notebook_path': '/Shared/does-not-run'})
+
+    runs = fake_client.jobs.runs_list(limit=25)
+    assert isinstance(runs, types.GeneratorType)
+    assert fake.request_counts['jobs/runs/list'] == 0
+
+    assert len(list(islice(runs, 30))) == 30
+    assert fake.request_counts['jobs/runs/list'] == 2
+
+    # The third page is fetched in the background while the second is consumed
+    assert len(list(islice(fake_client.jobs.runs_list(limit=25, prefetch=True), 30))) == 30
+    deadline = time.monotonic() + 5
+    while fake.request_counts['jobs/runs/list'] < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert fake.request_counts['jobs/runs/list'] == 5
+
+
+def test_list_jobs(job_id):
+    assert job_id in [job['job_id'] for job in client.jobs.list(limit=1)]
+
+
+def test_runs_list_pages(job_id):
+    runs = list(islice(client.jobs.runs_list(limit=2, prefetch=True), 5))
+
+    assert len(runs) <= 5
+    assert all('run_id' in run for run in runs)
+
+
+def test_runs_list_active_and_completed_raises():
+    with pytest.raises(ValueError):
+        next(client.jobs.runs_list(active_only=True, completed_only=True))
+
+
+def test_reset_job(job_id):
+    settings = client.jobs.get(job_id)['settings']
+    settings['timeout_seconds'] = 600
+
+    client.jobs.reset(job_id, settings)
+    assert client.jobs.get(job_id)['settings']['timeout_seconds'] == 600
+
+
+def test_wait_for_missing_run_raises():
+    with pytest.raises(InvalidParameterValue):
+        client.jobs.wait_for_runs([999999999], timeout=60)
+
+
+def test_run_tracker_resolves_runs(job_id):
+    run_id = client.jobs.run_now(job_id)['run_id']
+    client.jobs.runs_cancel(run_id)
+
+    with client.jobs.run_tracker() as tracker:
+        futures = tracker.track([run_id])
+        result = futures[run_id].result(timeout=600)
+
+    assert result.run_id == run_id
+    assert result.run['state']['life_cycle_state'] in TERMINAL_LIFE_CYCLE_STATES
+    assert tracker.pending() == []
+
+
+def test_next_run_poll_interval():
+    # A run that is new, or has changed state, is polled after the shortest interval for its state
+    assert _next_run_poll_interval('PENDING', None, None, RUN_POLL_INTERVALS) == 5.0
+    assert _next_run_poll_interval('RUNNING', 'PENDING', 30.0, RUN_POLL_INTERVALS) == 2.0
+    # Then the interval backs off, up to the longest for the state
+    assert _next_run_poll_interval('RUNNING', 'RUNNING', 2.0, RUN_POLL_INTERVALS) == 3.0
+    assert _next_run_poll_interval('RUNNING', 'RUNNING', 50.0, RUN_POLL_INTERVALS) == 60.0
+    # States without intervals of their own use the default
+    assert _next_run_poll_interval('QUEUED', None, None, RUN_POLL_INTERVALS) == 5.0
+
+
+def test_run_tracker_adds_callback_to_tracked_run(fake):
+    fake_client = create_fake_client(fake)
+    fake.state.run_seconds = (0.0, 0.3)
+    run_id = fake_client.jobs.runs_submit(run_name='tracked twice')
+    first_done, second_done = threading.Event(), threading.Event()
+
+    with fake_client.jobs.run_tracker(poll_intervals={'RUNNING': (0.05, 0.05)}) as tracker:
+        first = tracker.track([run_id], callback=lambda future: first_done.set())
+        second = tracker.track([run_id], callback=lambda future: second_done.set())
+
+        assert second[run_id] is first[run_id]
+        assert first[run_id].result(timeout=10).run_id == run_id
+
+    assert first_done.wait(timeout=10)
+    assert second_done.wait(timeout=10)
+
+
+def test_run_tracker_wait_includes_finished_runs(fake):
+    fake_client = create_fake_client(fake)
+    first_id = fake_client.jobs.runs_submit(run_name='finished first')
+    second_id = fake_client.jobs.runs_submit(run_name='finished second')
+
+    with fake_client.jobs.run_tracker() as tracker:
+        first = tracker.track([first_id])[first_id]
+        first.result(timeout=10)
+        second = tracker.track([second_id])[second_id]
+
+        done, not_done = tracker.wait(timeout=10)
+
+    assert done == {first, second}
+    assert not not_done
+
+
+def test_run_tracker_bounds_concurrent_polls(fake):
+    fake_client = create_fake_client(fake)
+    fake.state.run_seconds = (0.0, 0.3)
+    run_ids = [fake_client.jobs.runs_submit(run_name='run {0}'.format(number)) for number in range(12)]
+    fake.latency = 0.05
+
+    with fake_client.jobs.run_tracker(workers=3, poll_intervals={'RUNNING': (0.01, 0.01)}) as tracker:
+        futures = tracker.track(run_ids)
+        assert all(future.result(timeout=30).run_id == run_id for run_id, future in futures.items())
+
+    assert fake.peak_in_flight['jobs/runs/get'] == 3
+    assert fake.peak_in_flight['jobs/runs/get-output'] <= 3
+
+
+def test_submit_many_without_specs():
+    assert list(client.jobs.submit_many([])) == []
+
+
+def test_submit_many_max_in_flight_raises():
+    with pytest.raises(ValueError):
+        next(client.jobs.submit_many([{'run_name': JOB_NAME}], max_in_flight=0))
+
+
+def submit_all(fake_client, specs, **kwargs):
+    """Consume submit_many in another thread, so that a test fails rather than hangs if it never finishes"""
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(lambda: list(fake_client.jobs.submit_many(specs, **kwargs))).result(timeout=30)
+
+
+def peak_active_runs(fake):
+    """The most runs of the fake workspace that were PENDING or RUNNING at the same time"""
+    duration = sum(fake.state.run_seconds)
+    events = sorted([(run['_started'], 1) for run in fake.state.runs.values()] +
+                    [(run['_started'] + duration, -1) for run in fake.state.runs.values()])
+
+    active, peak = 0, 0
+    for _, change in events:
+        active += change
+        peak = max(peak, active)
+    return peak
+
+
+def test_submit_many_keeps_max_in_flight(fake):
+    fake_client = create_fake_client(fake)
+    fake.state.run_seconds = (0.0, 0.2)
+    specs = [{'run_name': 'run {0}'.format(number)} for number in range(10)]
+
+    results = submit_all(fake_client, specs, max_in_flight=3, poll_intervals={'RUNNING': (0.01, 0.01)})
+
+    assert sorted(result.index for result in results) == list(range(10))
+    assert all(result.error is None for result in results)
+    assert peak_active_runs(fake) == 3
+
+
+def test_submit_many_gives_each_spec_an_idempotency_token(fake):
+    fake_client = create_fake_client(fake)
+    specs = [{'run_name': 'run {0}'.format(number)} for number in range(4)] + \
+        [{'run_name': 'own token', 'idempotency_token': 'own-token'}]
+
+    results = submit_all(fake_client, specs)
+
+    tokens = {result.index: result.spec['idempotency_token'] for result in results}
+    assert len(set(tokens.values())) == 5
+    assert tokens[4] == 'own-token'
+    assert set(fake.state.run_tokens) == set(tokens.values())
+    # The caller's specs aren't changed
+    assert all('idempotency_token' not in spec for spec in specs[:4])
+
+
+def test_submit_many_retries_submit_without_duplicate_run(fake):
+    fake_client = create_fake_client(fake)
+    # The first submission starts a run, but its response is lost to a 503
+    fake.inject('jobs/runs/submit', after_handling=True)
+
+    results = submit_all(fake_client, [{'run_name': 'run {0}'.format(number)} for number in range(3)])
+
+    assert all(result.error is None for result in results)
+    assert fake.request_counts['jobs/runs/submit'] == 4
+    assert len(fake.state.runs) == 3
+    assert fake_client.retry_policy.stats()['retries'] == 1
+
+
+def test_submit_many_specs_sharing_a_run(fake):
+    fake_client = create_fake_client(fake)
+    specs = [{'run_name': 'shared', 'idempotency_token': 'shared-token'}] * 2
+
+    results = submit_all(fake_client, specs)
+
+    assert sorted(result.index for result in results) == [0, 1]
+    assert results[0].run_id == results[1].run_id
+    assert len(fake.state.runs) == 1
+
+
+def test_delete_job(job_id):
+    client.jobs.delete(job_id)
+
+    with pytest.raises(InvalidParameterValue):
+        client.jobs.get(job_id)
@@ -0,0 +1,163 @@
+import pytest
+
+from azure_databricks_api.__libraries import LibraryIndex, _advance_fleet, _normalize_library
+from azure_databricks_api.exceptions import InvalidParameterValue, LibraryInstallFailed, LibraryNotFound
+from tests.utils import create_fake_client
+
+REQUESTS_LIBRARY = {'pypi': {'package': 'requests'}}
+NUMPY_LIBRARY = {'pypi': {'package': 'numpy==1.19.5'}}
+
+
+def add_clusters(fake, count=1):
+    """Add running clusters to the fake workspace, returning their ids"""
+    cluster_ids = ['0000-000000-libs{0}'.format(number) for number in range(count)]
+    for cluster_id in cluster_ids:
+        fake.state.clusters[cluster_id] = {'cluster_id': cluster_id, 'cluster_name': cluster_id, 'state': 'RUNNING'}
+    return cluster_ids
+
+
+@pytest.mark.parametrize("library_type,library_name,expected", [
+    ('pypi', 'Foo_Bar', ('foo-bar', None)),
+    ('pypi', 'foo.bar==1.0.2', ('foo-bar', '1.0.2')),
+    ('pypi', 'foo-bar[extra] == 2.0', ('foo-bar', '2.0')),
+    ('pypi', 'foo-bar>=2.0', ('foo-bar', None)),
+    ('maven', 'org.jsoup:jsoup:1.7.2', ('org.jsoup:jsoup', '1.7.2')),
+    ('maven', 'org.jsoup:jsoup', ('org.jsoup:jsoup', None)),
+    ('jar', 'dbfs:/mnt/libraries/library.jar', ('dbfs:/mnt/libraries/library.jar', None)),
+])
+def test_normalize_library(library_type, library_name, expected):
+    assert _normalize_library(library_type, library_name) == expected
+
+
+def test_library_index_find():
+    index = LibraryIndex({'statuses': [
+        {'cluster_id': 'first', 'library_statuses': [
+            {'library': {'pypi': {'package': 'Foo_Bar==1.0'}}, 'status': 'INSTALLED'},
+            {'library': {'maven': {'coordinates': 'org.jsoup:jsoup:1.7.2'}}, 'status': 'PENDING'}]},
+        {'cluster_id': 'second', 'library_statuses': [
+            {'library': {'pypi': {'package': 'foo-bar==2.0'}}, 'status': 'INSTALLED'}]}]})
+
+    assert {location.cluster_id for location in index.find('foo-bar')} == {'first', 'second'}
+    assert [location.cluster_id for location in index.find('FOO.bar', 'pypi', version='2.0')] == ['second']
+    assert [location.cluster_id for location in index.find('foo_bar==1.0')] == ['first']
+    assert [location.status for location in index.find('org.jsoup:jsoup:1.7.2')] == ['PENDING']
+    assert index.find('org.jsoup:jsoup:1.8.0') == []
+    assert index.find('foo-bar', 'maven') == []
+
+
+def test_refresh_library_index(fake):
+    fake_client = create_fake_client(fake)
+    cluster_id, = add_clusters(fake)
+
+    index = fake_client.libraries.library_index()
+    assert index.find('requests') == []
+
+    fake_client.libraries.install(cluster_id, [REQUESTS_LIBRARY], return_status=False)
+    # The index is a snapshot, which is reused until it is refreshed
+    assert fake_client.libraries.library_index().find('requests') == []
+    assert fake.request_counts['libraries/all-cluster-statuses'] == 1
+
+    assert fake_client.libraries.refresh_library_index() is index
+    assert [location.cluster_id for location in index.find('requests')] == [cluster_id]
+    assert fake.request_counts['libraries/all-cluster-statuses'] == 2
+
+
+def test_install_waits_for_library_to_be_installed(fake):
+    fake_client = create_fake_client(fake)
+    cluster_id, = add_clusters(fake)
+    fake.state.library_install_states['requests'] = ['PENDING', 'INSTALLING', 'INSTALLED']
+
+    cluster_status = fake_client.libraries.install(cluster_id, [REQUESTS_LIBRARY], wait_for_completion=True)
+
+    assert [library['status'] for library in cluster_status['library_statuses']] == ['INSTALLED']
+    assert fake.request_counts['libraries/cluster-status'] == 2
+
+
+def test_wait_for_libraries_returns_statuses_in_order(fake):
+    fake_client = create_fake_client(fake)
+    cluster_id, = add_clusters(fake)
+    fake_client.libraries.install(cluster_id, [REQUESTS_LIBRARY, NUMPY_LIBRARY], return_status=False)
+
+    library_statuses = fake_client.libraries.wait_for_libraries(cluster_id, [NUMPY_LIBRARY, REQUESTS_LIBRARY])
+
+    assert [library['library'] for library in library_statuses] == [NUMPY_LIBRARY, REQUESTS_LIBRARY]
+
+
+def test_install_failed_library_raises(fake):
+    fake_client = create_fake_client(fake)
+    cluster_id, = add_clusters(fake)
+    fake.state.library_install_states['numpy==1.19.5'] = ['INSTALLING', 'FAILED']
+
+    with pytest.raises(LibraryInstallFailed, match='numpy'):
+        fake_client.libraries.install(cluster_id, [REQUESTS_LIBRARY, NUMPY_LIBRARY], wait_for_completion=True)
+
+
+def test_install_times_out(fake):
+    fake_client = create_fake_client(fake)
+    cluster_id, = add_clusters(fake)
+    fake.state.library_install_states['requests'] = 'INSTALLING'
+
+    with pytest.raises(TimeoutError):
+        fake_client.libraries.install(cluster_id, [REQUESTS_LIBRARY], wait_for_completion=True, timeout=1)
+
+
+def test_advance_fleet():
+    all_cluster_statuses = {'statuses': [
+        {'cluster_id': 'installed', 'library_statuses': [{'library': REQUESTS_LIBRARY, 'status': 'INSTALLED'}]},
+        {'cluster_id': 'installing', 'library_statuses': [{'library': REQUESTS_LIBRARY, 'status': 'INSTALLING'}]},
+        {'cluster_id': 'failed', 'library_statuses': [{'library': REQUESTS_LIBRARY, 'status': 'FAILED'}]}]}
+
+    finished = _advance_fleet(all_cluster_statuses, {'installed', 'installing', 'failed', 'missing'},
+                              [('pypi', 'requests')])
+
+    assert set(finished) == {'installed', 'failed', 'missing'}
+    assert finished['installed'].error is None
+    assert finished['installed'].library_statuses[0]['status'] == 'INSTALLED'
+    assert isinstance(finished['failed'].error, LibraryInstallFailed)
+    assert isinstance(finished['missing'].error, LibraryNotFound)
+
+
+def test_install_many_reports_each_cluster(fake):
+    fake_client = create_fake_client(fake)
+    cluster_ids = add_clusters(fake, 3)
+    fake.state.library_install_states[(cluster_ids[1], 'requests')] = ['INSTALLING', 'FAILED']
+
+    results = fake_client.libraries.install_many(cluster_ids + ['0000-000000-missing'], [REQUESTS_LIBRARY],
+                                                 workers=2, wait_for_completion=True)
+
+    assert set(results) == set(cluster_ids + ['0000-000000-missing'])
+    assert results[cluster_ids[0]].error is None and results[cluster_ids[2]].error is None
+    assert results[cluster_ids[0]].library_statuses[0]['status'] == 'INSTALLED'
+    assert isinstance(results[cluster_ids[1]].error, LibraryInstallFailed)
+    assert isinstance(results['0000-000000-missing'].error, InvalidParameterValue)
+    assert fake.request_counts['libraries/cluster-status'] == 0
+
+
+def test_install_many_times_out_across_the_fleet(fake):
+    fake_client = create_fake_client(fake)
+    cluster_ids = add_clusters(fake, 3)
+    fake.state.library_install_states['requests'] = 'INSTALLING'
+
+    results = fake_client.libraries.install_many(cluster_ids, [REQUESTS_LIBRARY], wait_for_completion=True,
+                                                 timeout=1)
+
+    assert all(isinstance(result.error, TimeoutError) for result in results.values())
+    # The clusters are polled together, not one by one
+    assert fake.request_counts['libraries/all-cluster-statuses'] <= 3
+
+
+def test_many_return_status(fake):
+    fake_client = create_fake_client(fake)
+    cluster_ids = add_clusters(fake, 2)
+
+    results = fake_client.libraries.install_many(cluster_ids, [REQUESTS_LIBRARY, NUMPY_LIBRARY], return_status=True)
+    assert all(len(result.library_statuses) == 2 for result in results.values())
+
+    results = fake_client.libraries.uninstall_many(cluster_ids, [NUMPY_LIBRARY], return_status=True)
+    assert all([library['status'] for library in result.library_statuses] == ['INSTALLED', 'UNINSTALL_ON_RESTART']
+               for result in results.values())
+    assert fake.request_counts['libraries/cluster-status'] == 4
+
+    results = fake_client.libraries.uninstall_many(cluster_ids, [REQUESTS_LIBRARY])
+    assert all(result.library_statuses is None and result.error is None for result in results.values())
+    assert fake.request_counts['libraries/cluster-status'] == 4
@@ -1,24 +1,152 @@
-from azure_databricks_api import AzureDatabricksRESTClient
-from azure_databricks_api.exceptions import AuthorizationError
+from azure_databricks_api import AzureDatabricksRESTClient, RetryPolicy, RateLimiter, MetricsAggregator
+from azure_databricks_api.exceptions import AuthorizationError, RequestLimitExceeded
 from environs import Env
+from tests.utils import FAKE_TOKEN, create_fake_client
+
+import socket
+import time
 
 import pytest
 
 env = Env()
 env.read_env()
 
-REGION = env.str("DATABRICKS_REGION")
 PAT_TOKEN = env.str("PAT_TOKEN")
+# DATABRICKS_HOST points the tests at another server - e.g. python -m tests.fake_server
+HOST = env.str("DATABRICKS_HOST", None)
+REGION = None if HOST else env.str("DATABRICKS_REGION")
 
 
 def test_pat_token_auth():
-    client = AzureDatabricksRESTClient(region=REGION, token=PAT_TOKEN)
+    client = AzureDatabricksRESTClient(region=REGION, host=HOST, token=PAT_TOKEN)
 
     client.dbfs.list("/")
 
 
 def test_wrong_pat_token_raises_error():
-    client = AzureDatabricksRESTClient(region=REGION, token="WRONGTOKEN")
+    client = AzureDatabricksRESTClient(region=REGION, host=HOST, token="WRONGTOKEN")
 
     with pytest.raises(AuthorizationError):
         client.dbfs.list('/')
+
+
+def test_api_objects_share_one_session():
+    client = AzureDatabricksRESTClient(region=REGION, host=HOST, token=PAT_TOKEN)
+
+    sessions = {id(api._session) for api in [client.clusters, client.groups, client.tokens,
+                                             client.workspace, client.dbfs, client.libraries]}
+    assert sessions == {id(client._session)}
+
+
+def test_client_context_manager():
+    with AzureDatabricksRESTClient(region=REGION, host=HOST, token=PAT_TOKEN) as client:
+        client.dbfs.list('/')
+        client.dbfs.list('/')
+
+
+def test_api_objects_share_one_retry_policy():
+    policy = RetryPolicy(max_attempts=3)
+    client = AzureDatabricksRESTClient(region=REGION, host=HOST, token=PAT_TOKEN, retry_policy=policy)
+
+    policies = {id(api._retry_policy) for api in [client.clusters, client.groups, client.tokens,
+                                                  client.workspace, client.dbfs, client.libraries]}
+    assert policies == {id(policy)}
+
+    client.dbfs.list('/')
+    assert client.retry_policy.stats()['exhausted'] == 0
+
+
+def test_retry_delay_honours_retry_after():
+    policy = RetryPolicy(backoff_base=0.5, backoff_cap=1)
+
+    assert 0 <= policy.get_delay(attempt=5) <= 1
+    assert policy.get_delay(attempt=1, retry_after='3') >= 3
+    assert not policy.should_retry(attempt=policy.max_attempts, status_code=429)
+    assert not policy.should_retry(attempt=1, status_code=400)
+
+
+def test_throttled_get_is_retried_after_retry_after(fake):
+    fake_client = create_fake_client(fake)
+    fake.inject('dbfs/list', 429, 'REQUEST_LIMIT_EXCEEDED', headers={'Retry-After': '0'})
+
+    fake_client.dbfs.list('/')
+
+    assert fake.request_counts['dbfs/list'] == 2
+    assert fake_client.retry_policy.stats()['retries'] == 1
+
+
+def test_non_idempotent_post_is_not_retried(fake):
+    fake_client = create_fake_client(fake)
+    fake.state.dbfs_files['/tmp/moved.txt'] = b'moved'
+    fake.inject('dbfs/move', 429, 'REQUEST_LIMIT_EXCEEDED', headers={'Retry-After': '0'})
+
+    with pytest.raises(RequestLimitExceeded):
+        fake_client.dbfs.move('/tmp/moved.txt', '/tmp/moved-again.txt')
+
+    assert fake.request_counts['dbfs/move'] == 1
+    assert fake_client.retry_policy.stats()['retries'] == 0
+
+
+@pytest.mark.parametrize("after_handling", [False, True])
+def test_retried_streamed_body_is_sent_again_in_full(fake, tmp_path, after_handling):
+    fake_client = create_fake_client(fake)
+    local_file = tmp_path / "replayed.bin"
+    local_file.write_bytes(bytes(range(256)) * 1000)
+    fake.inject('dbfs/put', after_handling=after_handling)
+
+    fake_client.dbfs.upload_file_by_path(local_file, '/tmp/replayed.bin', overwrite=True)
+
+    assert fake.request_counts['dbfs/put'] == 2
+    assert fake_client.retry_policy.stats()['retries'] == 1
+    assert fake.state.dbfs_files['/tmp/replayed.bin'] == local_file.read_bytes()
+
+
+def test_rate_limiter_spaces_out_calls():
+    limiter = RateLimiter(rate=5, burst=1, family_rates={'dbfs': (2, 1)})
+    client = AzureDatabricksRESTClient(region=REGION, host=HOST, token=PAT_TOKEN, rate_limiter=limiter)
+
+    start = time.monotonic()
+    for _ in range(3):
+        client.dbfs.list('/')
+
+    # The first call uses the burst, the next two wait for the dbfs bucket at 2 calls per second
+    assert time.monotonic() - start >= 1
+    assert limiter.stats()['waits'] == 2
+
+
+def test_metrics_aggregator_observes_requests():
+    metrics = MetricsAggregator()
+    client = AzureDatabricksRESTClient(region=REGION, host=HOST, token=PAT_TOKEN, observers=[metrics])
+
+    for _ in range(3):
+        client.dbfs.list('/')
+
+    stats = metrics.snapshot()['dbfs/list']
+    assert stats['count'] >= 3
+    assert stats['connections'] == 1
+    assert stats['bytes_received'] > 0
+    assert stats['buckets'][-1] == (float('inf'), stats['count'])
+    assert 0 < metrics.quantile('dbfs/list', 0.5) <= stats['max_seconds']
+
+
+@pytest.mark.parametrize("observed", [False, True])
+def test_host_with_several_addresses_falls_back_to_next_address(fake, monkeypatch, observed):
+    port = int(fake.host.rsplit(':', 1)[1])
+    getaddrinfo = socket.getaddrinfo
+
+    def resolve(host, *args, **kwargs):
+        if host != 'several-addresses.test':
+            return getaddrinfo(host, *args, **kwargs)
+        # The first address refuses connections - the fake server only listens on 127.0.0.1
+        return [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', ('127.0.0.2', port + 1)),
+                (socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', ('127.0.0.1', port))]
+
+    monkeypatch.setattr(socket, 'getaddrinfo', resolve)
+    metrics = MetricsAggregator()
+    client = AzureDatabricksRESTClient(host='http://several-addresses.test:{0}'.format(port), token=FAKE_TOKEN,
+                                       observers=[metrics] if observed else None)
+
+    client.dbfs.list('/')
+
+    assert fake.request_counts['dbfs/list'] == 1
+    assert metrics.snapshot().get('dbfs/list', {}).get('count', 0) == (1 if observed else 0)
@@ -0,0 +1,216 @@
+import io
+import time
+
+import pytest
+import requests
+
+from tests.utils import create_client, create_fake_client
+
+from azure_databricks_api.exceptions import ResourceAlreadyExists, ResourceDoesNotExist, UnknownFormat
+
+WORKSPACE_TEST_DIR = '/Shared/azure-databricks-api-tests'
+NOTEBOOKS = {'top': 'PYTHON', 'nested/middle': 'SCALA', 'nested/deeper/bottom': 'SQL'}
+
+client = create_client()
+
+
+@pytest.fixture(scope="module")
+def notebook_tree(tmp_path_factory):
+    source_path = tmp_path_factory.mktemp('notebooks') / "notebook.txt"
+    source_path.write_text("1 + 1\n")
+
+    for notebook, language in NOTEBOOKS.items():
+        client.workspace.import_file('{0}/{1}'.format(WORKSPACE_TEST_DIR, notebook), file_format='SOURCE',
+                                     language=language, overwrite=True, filepath=str(source_path))
+
+    yield WORKSPACE_TEST_DIR
+
+    client.workspace.delete(WORKSPACE_TEST_DIR, recursive=True, not_exists_ok=True)
+
+
+def test_export_to_file_like_object(fake, fake_notebook):
+    path, content = fake_notebook
+    buffer = io.BytesIO()
+
+    assert create_fake_client(fake).workspace.export(path, buffer, file_format='SOURCE', chunk_size=4096) is buffer
+    assert buffer.getvalue() == content
+
+
+def test_failed_export_removes_partial_file(fake, fake_notebook, tmp_path):
+    path, _ = fake_notebook
+    fake.inject('workspace/export', truncate=True)
+
+    with pytest.raises(requests.RequestException):
+        create_fake_client(fake).workspace.export(path, tmp_path / "exported.py", file_format='SOURCE',
+                                                  chunk_size=4096)
+
+    assert not (tmp_path / "exported.py").exists()
+
+
+def test_export_retries_server_error(fake, fake_notebook, tmp_path):
+    path, content = fake_notebook
+    fake.inject('workspace/export')
+
+    create_fake_client(fake).workspace.export(path, tmp_path / "exported.py", file_format='SOURCE')
+
+    assert fake.request_counts['workspace/export'] == 2
+    assert (tmp_path / "exported.py").read_bytes() == content
+
+
+def test_export_tree(notebook_tree, tmp_path):
+    report = client.workspace.export_tree(notebook_tree, tmp_path / "exported", workers=4)
+
+    assert len(report.results) == len(NOTEBOOKS)
+    assert all(result.error is None for result in report.results)
+    assert (tmp_path / "exported" / "top.py").is_file()
+    assert (tmp_path / "exported" / "nested" / "middle.scala").is_file()
+    assert (tmp_path / "exported" / "nested" / "deeper" / "bottom.sql").is_file()
+    assert not (tmp_path / "exported" / ".export_journal").exists()
+
+
+def test_export_tree_skips_exported_notebooks(notebook_tree, tmp_path):
+    (tmp_path / "exported").mkdir()
+    (tmp_path / "exported" / "top.py").write_text("1 + 1\n")
+    (tmp_path / "exported" / ".export_journal").write_text("top.py\n")
+
+    report = client.workspace.export_tree(notebook_tree, tmp_path / "exported", workers=4)
+
+    assert report.skipped == ['{0}/top'.format(notebook_tree)]
+    assert len(report.results) == len(NOTEBOOKS) - 1
+
+
+def test_export_tree_missing_directory(tmp_path):
+    with pytest.raises(ResourceDoesNotExist):
+        client.workspace.export_tree('/THISDIRECTORYSHOULDNOTEXISTANYWHERE', tmp_path)
+
+
+def test_import_tree(notebook_tree, tmp_path):
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "top.py").write_text("1 + 1\n")
+    (tmp_path / "nested" / "middle.scala").write_text("1 + 1\n")
+    (tmp_path / "README.md").write_text("Not a notebook")
+
+    report = client.workspace.import_tree(tmp_path, notebook_tree + '/imported', workers=4)
+
+    assert all(result.error is None for result in report.results)
+    assert report.skipped == [str(tmp_path / "README.md")]
+    assert client.workspace.get_status(notebook_tree + '/imported/nested/middle').language == 'SCALA'
+
+
+def test_import_tree_existing_notebooks_reported(notebook_tree, tmp_path):
+    (tmp_path / "top.py").write_text("1 + 1\n")
+
+    report = client.workspace.import_tree(tmp_path, notebook_tree, overwrite=False)
+
+    assert all(isinstance(result.error, ResourceAlreadyExists) for result in report.results)
+
+
+def test_import_tree_notebook_in_place_of_directory_raises(fake, tmp_path):
+    fake_client = create_fake_client(fake)
+    (tmp_path / "notebook.py").write_text("1 + 1\n")
+    fake_client.workspace.import_file('/Shared/project/nested', file_format='SOURCE', language='PYTHON',
+                                      filepath=str(tmp_path / "notebook.py"))
+    (tmp_path / "project" / "nested").mkdir(parents=True)
+    (tmp_path / "project" / "top.py").write_text("1 + 1\n")
+    (tmp_path / "project" / "nested" / "middle.py").write_text("1 + 1\n")
+
+    with pytest.raises(ResourceAlreadyExists):
+        fake_client.workspace.import_tree(tmp_path / "project", '/Shared/project')
+
+    # The conflict is raised before any notebook is imported
+    assert fake.request_counts['workspace/import'] == 1
+
+
+def test_sync_push_notebook_in_place_of_directory_raises(fake, tmp_path):
+    fake_client = create_fake_client(fake)
+    (tmp_path / "notebook.py").write_text("1 + 1\n")
+    fake_client.workspace.import_file('/Shared/project/nested', file_format='SOURCE', language='PYTHON',
+                                      filepath=str(tmp_path / "notebook.py"))
+    (tmp_path / "project" / "nested").mkdir(parents=True)
+    (tmp_path / "project" / "nested" / "middle.py").write_text("1 + 1\n")
+
+    with pytest.raises(ResourceAlreadyExists):
+        fake_client.workspace.sync(tmp_path / "project", '/Shared/project')
+
+    assert fake.request_counts['workspace/import'] == 1
+
+
+def test_export_tree_unknown_format(tmp_path):
+    with pytest.raises(UnknownFormat, match='^PDF is not a supported format type'):
+        client.workspace.export_tree(WORKSPACE_TEST_DIR, tmp_path, file_format='PDF')
+
+
+def test_sync_transfers_only_changed_notebooks(notebook_tree, tmp_path):
+    (tmp_path / "first.py").write_text("1 + 1\n")
+    (tmp_path / "second.sql").write_text("SELECT 1\n")
+
+    report = client.workspace.sync(tmp_path, notebook_tree + '/synced')
+    assert len(report.results) == 2
+    assert all(result.error is None for result in report.results)
+
+    (tmp_path / "first.py").write_text("2 + 2\n")
+    (tmp_path / "second.sql").unlink()
+
+    plan = client.workspace.sync(tmp_path, notebook_tree + '/synced', delete=True, dry_run=True).plan
+    assert [transfer.destination for transfer in plan.transfers] == [notebook_tree + '/synced/first']
+    assert plan.deletes == [notebook_tree + '/synced/second']
+
+    report = client.workspace.sync(tmp_path, notebook_tree + '/synced', delete=True)
+    assert report.plan.unchanged == 0
+    assert [result.error for result in report.deleted] == [None]
+
+    assert client.workspace.sync(tmp_path, notebook_tree + '/synced').plan.transfers == []
+
+
+def test_sync_pull(fake, tmp_path):
+    fake_client = create_fake_client(fake)
+    for name, content in [('first', b'1 + 1\n'), ('second', b'2 + 2\n')]:
+        (tmp_path / "source.py").write_bytes(content)
+        fake_client.workspace.import_file('/Shared/synced/' + name, file_format='SOURCE', language='PYTHON',
+                                          filepath=str(tmp_path / "source.py"))
+    local_dir = tmp_path / "pulled"
+
+    report = fake_client.workspace.sync(str(local_dir), '/Shared/synced', direction='pull')
+    assert len(report.results) == 2
+    assert (local_dir / "first.py").read_bytes() == b'1 + 1\n'
+
+    # A notebook changed in the workspace is exported again, and only that one
+    (tmp_path / "source.py").write_bytes(b'3 + 3\n')
+    # Modification times are in milliseconds
+    time.sleep(0.01)
+    fake_client.workspace.import_file('/Shared/synced/first', file_format='SOURCE', language='PYTHON',
+                                      overwrite=True, filepath=str(tmp_path / "source.py"))
+
+    report = fake_client.workspace.sync(str(local_dir), '/Shared/synced', direction='pull')
+    assert [transfer.source for transfer in report.plan.transfers] == ['/Shared/synced/first']
+    assert report.plan.unchanged == 1
+    assert (local_dir / "first.py").read_bytes() == b'3 + 3\n'
+
+    # A notebook removed from the workspace is deleted locally
+    fake_client.workspace.delete('/Shared/synced/second')
+
+    report = fake_client.workspace.sync(str(local_dir), '/Shared/synced', direction='pull', delete=True)
+    assert report.plan.transfers == []
+    assert [result.error for result in report.deleted] == [None]
+    assert not (local_dir / "second.py").exists()
+    assert (local_dir / "first.py").exists()
+
+
+def test_sync_push_from_missing_directory_raises(fake, tmp_path):
+    fake_client = create_fake_client(fake)
+    (tmp_path / "project").mkdir()
+    (tmp_path / "project" / "a.py").write_text("1 + 1\n")
+    manifest_path = str(tmp_path / "manifest.json")
+    fake_client.workspace.sync(str(tmp_path / "project"), '/Shared/project', manifest_path=manifest_path)
+
+    with pytest.raises(FileNotFoundError):
+        fake_client.workspace.sync(str(tmp_path / "projcet"), '/Shared/project', delete=True,
+                                   manifest_path=manifest_path)
+
+    assert '/Shared/project/a' in fake.state.workspace_objects
+    assert fake.request_counts['workspace/delete'] == 0
+
+
+def test_sync_invalid_direction(tmp_path):
+    with pytest.raises(ValueError):
+        client.workspace.sync(tmp_path, WORKSPACE_TEST_DIR, direction='sideways')
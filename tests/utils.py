@@ -1,12 +1,26 @@
 from environs import Env
-from azure_databricks_api import AzureDatabricksRESTClient
+from azure_databricks_api import AzureDatabricksRESTClient, RetryPolicy
 
+FAKE_TOKEN = 'fake-token'
 
-def create_client():
+
+def create_client(**kwargs):
     env = Env()
     env.read_env()
 
     # Use PAT Token Authorization for this
     pat_token = env.str("PAT_TOKEN")
+
+    # DATABRICKS_HOST points the tests at another server - e.g. python -m tests.fake_server
+    host = env.str("DATABRICKS_HOST", None)
+    if host:
+        return AzureDatabricksRESTClient(host=host, token=pat_token, **kwargs)
+
     region = env.str("DATABRICKS_REGION")
-    return AzureDatabricksRESTClient(region=region, token=pat_token)
+    return AzureDatabricksRESTClient(region=region, token=pat_token, **kwargs)
+
+
+def create_fake_client(fake, **kwargs):
+    """A client of an in-process FakeDatabricksServer, which retries without waiting unless told otherwise"""
+    kwargs.setdefault('retry_policy', RetryPolicy(backoff_base=0.01))
+    return AzureDatabricksRESTClient(host=fake.host, token=FAKE_TOKEN, **kwargs)